@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""Measures how late a ticking task of an event loop runs while the
+store is saved by save(), which blocks the loop, and by asave(), which
+writes in an executor thread, and the writes made for many concurrent
+asave() calls
+
+usage: ./benchmarks/async_save.py [number of users] [concurrent saves]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+DATE = "2017-09-28T21:05:54.119427"
+TICK = 0.001
+
+
+async def ticker(lags):
+    """sleeps TICK at a time, noting how late it wakes up"""
+    while True:
+        tic = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - tic - TICK)
+
+
+async def measure(save):
+    """returns the seconds save() took and the longest lag of the loop"""
+    lags = []
+    task = asyncio.ensure_future(ticker(lags))
+    await asyncio.sleep(0.01)
+    tic = time.perf_counter()
+    await save()
+    elapsed = time.perf_counter() - tic
+    await asyncio.sleep(0.01)  # the lag of the tick blocked by save()
+    task.cancel()
+    return elapsed, max(lags)
+
+
+def main():
+    """runs the benchmark"""
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    concurrent = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage()
+        objs = [User(id=str(i), created_at=DATE, updated_at=DATE)
+                for i in range(users)]
+        for obj in objs:
+            strg.new(obj)
+        print("{} users".format(users))
+
+        async def blocking():
+            """saves on the loop's thread"""
+            strg.compact()
+
+        async def offloaded():
+            """saves in the executor"""
+            await strg.asave()
+
+        for name, save in (("save()", blocking), ("asave()", offloaded)):
+            for obj in objs:
+                strg.touch(obj)  # every object encoded again
+            elapsed, lag = asyncio.run(measure(save))
+            print("{:8} {:7.0f} ms, loop late by {:7.1f} ms at most".format(
+                name, elapsed * 1e3, lag * 1e3))
+        flush, writes = strg.flush, []
+
+        def counted():
+            """counts the writes"""
+            writes.append(None)
+            flush()
+
+        strg._FileStorage__saver.write = counted
+
+        async def many():
+            """changes a user and saves, concurrent times at once"""
+            async def one(obj):
+                obj.first_name = "name"
+                await strg.asave(obj)
+            await asyncio.gather(*(one(obj) for obj in objs[:concurrent]))
+
+        tic = time.perf_counter()
+        asyncio.run(many())
+        print("{} concurrent asave() calls: {} write(s) in {:.0f} ms".format(
+            concurrent, len(writes), (time.perf_counter() - tic) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
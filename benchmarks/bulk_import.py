@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""Measures importing Places from CSV and JSON lines files into a
+FileStorage, parsed by one worker then by a pool, and exporting them
+
+usage: ./benchmarks/bulk_import.py [number of places]
+Run from the root of the project. The files are written to a temporary
+directory"""
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.bulk import export_file, import_file  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def write_files(directory, count):
+    """writes count random Places to places.csv and places.jsonl"""
+    rand = random.Random(0)
+    columns = ("id", "city_id", "name", "number_rooms", "max_guest",
+               "price_by_night", "latitude", "longitude")
+    with open(os.path.join(directory, "places.csv"), "w") as fcsv, \
+            open(os.path.join(directory, "places.jsonl"), "w") as fjson:
+        writer = csv.writer(fcsv, lineterminator="\n")
+        writer.writerow(columns)
+        for i in range(count):
+            row = (str(i), "city-{}".format(rand.randrange(1000)),
+                   "Place {}".format(i), rand.randrange(1, 6),
+                   rand.randrange(1, 10), rand.randrange(20, 500),
+                   rand.uniform(-90, 90), rand.uniform(-180, 180))
+            writer.writerow(row)
+            fjson.write(json.dumps(dict(zip(columns, row))) + "\n")
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        write_files(tmp, count)
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        print("{} places, {} CPUs".format(count, os.cpu_count()))
+        for name in ("places.csv", "places.jsonl"):
+            for workers in (1, None):
+                FileStorage._FileStorage__objects = {}
+                strg = FileStorage()
+                tic = time.perf_counter()
+                import_file(strg, Place, os.path.join(tmp, name), workers)
+                print("import {:13} {:>4} workers {:8.1f} s".format(
+                    name, workers or os.cpu_count(),
+                    time.perf_counter() - tic))
+        for name in ("out.csv", "out.jsonl"):
+            tic = time.perf_counter()
+            export_file(strg, Place, os.path.join(tmp, name))
+            print("export {:26} {:8.1f} s".format(
+                name, time.perf_counter() - tic))
+
+
+if __name__ == "__main__":
+    main()
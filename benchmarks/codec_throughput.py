@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Measures FileStorage save and reload throughput for each installed codec
+
+usage: ./benchmarks/codec_throughput.py [number of objects]
+Run from the root of the project. Objects are written to a temporary
+directory, file.json is not touched"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine import codec  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def populate(count):
+    """creates count objects, a Place for every 9 Reviews"""
+    for i in range(count):
+        if i % 10:
+            obj = Review()
+            obj.place_id = "0" * 36
+            obj.text = "A lovely stay, would come back"
+        else:
+            obj = Place()
+            obj.name = "Loft {}".format(i)
+            obj.number_rooms = i % 5
+
+
+def bench(name, count):
+    """returns the (save, reload) objects/second of the codec called name"""
+    strg = FileStorage(codec=name)
+    FileStorage._FileStorage__encoded = {}  # encode everything
+    tic = time.perf_counter()
+    strg.save()
+    save = count / (time.perf_counter() - tic)
+    objects = FileStorage._FileStorage__objects
+    FileStorage._FileStorage__objects = {}
+    tic = time.perf_counter()
+    strg.reload()
+    reload = count / (time.perf_counter() - tic)
+    FileStorage._FileStorage__objects = objects
+    return save, reload
+
+
+def main():
+    """runs the benchmark of every installed codec"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        populate(count)
+        print("{} objects".format(count))
+        print("{:8} {:>14} {:>14}".format("codec", "save obj/s",
+                                          "reload obj/s"))
+        for name, available in codec.available.items():
+            if available:
+                save, reload = bench(name, count)
+                print("{:8} {:14,.0f} {:14,.0f}".format(name, save, reload))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Measures `show User <id>` run by a new console process on a store
+saved as file.json and as the file.snap snapshot: its time and the page
+faults it takes
+
+usage: ./benchmarks/cold_show.py [number of users]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    console = os.path.join(ROOT, "console.py")
+    print("{} users".format(count))
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        for fmt in ("json", "snapshot"):
+            FileStorage._FileStorage__objects = {}
+            strg = FileStorage(file_format=fmt)
+            for i in range(count):
+                strg.new(User(id=str(i), created_at="2017-09-28T21:05:54",
+                              updated_at="2017-09-28T21:05:54",
+                              email="user{}@mail.com".format(i)))
+            strg.save()
+            env = dict(os.environ, HBNB_STORAGE_FORMAT=fmt)
+            before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            tic = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, console, "--batch"], cwd=tmp, env=env,
+                input="show User {}\n".format(count // 2),
+                stdout=subprocess.PIPE, universal_newlines=True,
+                check=True).stdout
+            elapsed = time.perf_counter() - tic
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            assert "user{}@".format(count // 2) in out
+            print("{:9} {:8.0f} ms {:8d} page faults".format(
+                fmt, elapsed * 1000, after.ru_minflt - before.ru_minflt))
+
+
+if __name__ == "__main__":
+    main()
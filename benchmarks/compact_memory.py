@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Measures the memory taken by reloaded Reviews, plain and compact
+
+usage: ./benchmarks/compact_memory.py [number of reviews]
+Run from the root of the project. The reviews refer to 1000 Places and
+1000 Users and are written to a temporary directory, file.json is not
+touched"""
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def populate(count):
+    """creates count Reviews of 1000 Places by 1000 Users"""
+    places = [str(uuid.uuid4()) for i in range(1000)]
+    users = [str(uuid.uuid4()) for i in range(1000)]
+    for i in range(count):
+        obj = Review()
+        obj.place_id = places[i % 1000]
+        obj.user_id = users[i * 7 % 1000]
+        obj.text = "Review {}".format(i)
+
+
+def measure(compact):
+    """returns the bytes taken by the objects reloaded in compact mode or
+    not, after the reload then after a save"""
+    strg = FileStorage(compact=compact)
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__encoded = {}
+    gc.collect()
+    tracemalloc.start()
+    strg.reload()
+    gc.collect()
+    reloaded = tracemalloc.get_traced_memory()[0]
+    for obj in FileStorage._FileStorage__objects.values():
+        obj.to_dict()
+    gc.collect()
+    saved = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return reloaded, saved
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        populate(count)
+        FileStorage().save()
+        print("{} reviews".format(count))
+        plain = measure(False)
+        small = measure(True)
+        print("{:8} {:>16} {:>16}".format("", "bytes/obj reload",
+                                          "after to_dict"))
+        print("{:8} {:16.0f} {:16.0f}".format("plain", plain[0] / count,
+                                              plain[1] / count))
+        print("{:8} {:16.0f} {:16.0f}".format("compact", small[0] / count,
+                                              small[1] / count))
+        print("{:8} {:15.2f}x {:15.2f}x".format("ratio", plain[0] / small[0],
+                                                plain[1] / small[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Measures the memory taken by the console's all command, streamed, and
+by building the whole list of strings before printing it, as it used to
+
+usage: ./benchmarks/console_all.py [number of places]
+Run from the root of the project. Nothing is written to disk"""
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def measured(func):
+    """returns the time in ms and the peak memory in MB of func(), its
+    output going to /dev/null. Tracing the memory slows func() down, it
+    is run once more to measure it"""
+    with open(os.devnull, "w") as null, redirect_stdout(null):
+        tic = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - tic) * 1000
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak / (1 << 20)
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    FileStorage._FileStorage__objects = {}
+    for i in range(count):
+        storage.new(Place(id=str(i), created_at="2017-09-28T21:05:54.119427",
+                          updated_at="2017-09-28T21:05:54.119427",
+                          name="Place {}".format(i)))
+    console = HBNBCommand()
+    print("{} places".format(count))
+    for label, func in (
+            ("list built first", lambda: print(
+                [str(obj) for obj in storage.all("Place").values()])),
+            ("all Place", lambda: console.onecmd("all Place")),
+            ("all Place format=lines",
+             lambda: console.onecmd("all Place format=lines")),
+            ("all Place limit=100 offset=5000",
+             lambda: console.onecmd("all Place limit=100 offset=5000"))):
+        elapsed, peak = measured(func)
+        print("{:32} {:8.1f} ms {:8.2f} MB peak".format(label, elapsed,
+                                                        peak))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Measures a script of update commands run one by one, each saving the
+store, and in batch mode, saving once or every N commands
+
+usage: ./benchmarks/console_batch.py [number of users] [number of updates]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def main():
+    """runs the benchmark"""
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rand = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        for i in range(users):
+            storage.new(User(id=str(i), created_at="2017-09-28T21:05:54",
+                             updated_at="2017-09-28T21:05:54"))
+        storage.save()
+        script = ["update User {} first_name name{}".format(
+            rand.randrange(users), i) for i in range(updates)]
+        console = HBNBCommand()
+        print("{} users, {} updates".format(users, updates))
+        with redirect_stdout(io.StringIO()):
+            tic = time.perf_counter()
+            for line in script:
+                console.onecmd(line)
+            single = time.perf_counter() - tic
+        print("one save per command {:10.0f} commands/s".format(
+            updates / single))
+        for every in (0, 1000):
+            tic = time.perf_counter()
+            console.run_batch(script, every)
+            elapsed = time.perf_counter() - tic
+            print("--batch{:21} {:10.0f} commands/s".format(
+                " --flush-every {}".format(every) if every else "",
+                updates / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""Measures the commands per second run through the console's onecmd, in
+a storage batch so that what is measured is the parsing and dispatching
+
+usage: ./benchmarks/console_parse.py [number of commands]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+COMMANDS = (
+    "show User 1",
+    'update User 1 first_name "John Smith"',
+    'update User 1 {"first_name": "John", "last_name": "Smith"}',
+    'User.update("1", "first_name", "John")',
+    'User.update("1", {"first_name": "John", "last_name": "Smith"})',
+    "User.count()",
+)
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        storage.new(User(id="1", created_at="2017-09-28T21:05:54",
+                         updated_at="2017-09-28T21:05:54"))
+        console = HBNBCommand()
+        print("{} commands each".format(count))
+        for line in COMMANDS:
+            with redirect_stdout(io.StringIO()), storage.batch():
+                tic = time.perf_counter()
+                for _ in range(count):
+                    console.onecmd(line)
+                elapsed = time.perf_counter() - tic
+            print("{:62} {:8.0f}/s".format(line, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
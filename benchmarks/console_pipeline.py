@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Measures updating users with one command per line, each saving the
+store, with ; separated commands on a line and with update_many, which
+both save once per line
+
+usage: ./benchmarks/console_pipeline.py [number of users] [updates per line]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def main():
+    """runs the benchmark"""
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_line = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    lines = 10
+    rand = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        for i in range(users):
+            storage.new(User(id=str(i), created_at="2017-09-28T21:05:54",
+                             updated_at="2017-09-28T21:05:54"))
+        storage.save()
+        updates = [[(str(rand.randrange(users)), "name{}".format(i))
+                    for i in range(per_line)] for _ in range(lines)]
+        scripts = (
+            ("one command per line", [
+                "update User {} first_name {}".format(*update)
+                for line in updates for update in line]),
+            ("; separated commands", [
+                "; ".join("update User {} first_name {}".format(*update)
+                          for update in line) for line in updates]),
+            ("User.update_many()", [
+                "User.update_many({})".format(json.dumps(
+                    [{"id": id, "first_name": name} for id, name in line]))
+                for line in updates]))
+        console = HBNBCommand()
+        print("{} users, {} lines of {} updates".format(
+            users, lines, per_line))
+        for label, script in scripts:
+            with redirect_stdout(io.StringIO()):
+                tic = time.perf_counter()
+                for line in script:
+                    console.onecmd(line)
+                elapsed = time.perf_counter() - tic
+            print("{:24} {:10.0f} updates/s".format(
+                label, lines * per_line / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""Measures FileStorage.filter() on Places against a scan of all()
+
+usage: ./benchmarks/place_filter.py [number of places]
+Run from the root of the project. Nothing is written to disk"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine import columns  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def populate(count):
+    """adds count Places with random prices, sizes and positions"""
+    rand = random.Random(0)
+    objects = FileStorage._FileStorage__objects
+    for i in range(count):
+        obj = Place(id=str(i), created_at="2017-09-28T21:05:54.119427",
+                    updated_at="2017-09-28T21:05:54.119427",
+                    price_by_night=rand.randrange(20, 500),
+                    max_guest=rand.randrange(1, 10),
+                    number_rooms=rand.randrange(1, 6),
+                    latitude=rand.uniform(-90, 90),
+                    longitude=rand.uniform(-180, 180))
+        objects["Place." + obj.id] = obj
+
+
+def timed(func, repeat=5):
+    """returns the result of func and its best time in ms"""
+    best = None
+    for i in range(repeat):
+        tic = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - tic) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    FileStorage._FileStorage__objects = {}
+    populate(count)
+    strg = FileStorage()
+    lookups = {"price_by_night__le": 100, "max_guest__ge": 4,
+               "latitude__between": (40.0, 41.0)}
+    print("{} places, {}".format(count, "numpy" if columns.numpy
+                                 else "array"))
+    strg.count(Place)  # builds the class index
+    tic = time.perf_counter()
+    strg.filter(Place, **lookups)
+    print("first filter (builds the columns) {:10.1f} ms".format(
+        (time.perf_counter() - tic) * 1000))
+    found, filtered = timed(lambda: strg.filter(Place, **lookups))
+    scanned, scan = timed(lambda: [
+        obj for obj in strg.all(Place).values()
+        if obj.price_by_night <= 100 and obj.max_guest >= 4 and
+        40.0 <= obj.latitude <= 41.0], 1)
+    assert found == scanned
+    print("filter {:10.1f} ms".format(filtered))
+    print("scan   {:10.1f} ms".format(scan))
+    print("{} places found".format(len(found)))
+
+
+if __name__ == "__main__":
+    main()
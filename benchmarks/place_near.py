@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Measures FileStorage.near() on Places against a scan of all()
+
+usage: ./benchmarks/place_near.py [number of places]
+Run from the root of the project. Nothing is written to disk"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.spatial import distance  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def populate(count):
+    """adds count Places at random locations"""
+    rand = random.Random(0)
+    objects = FileStorage._FileStorage__objects
+    for i in range(count):
+        obj = Place(id=str(i), created_at="2017-09-28T21:05:54.119427",
+                    updated_at="2017-09-28T21:05:54.119427",
+                    latitude=rand.uniform(-60, 70),
+                    longitude=rand.uniform(-180, 180))
+        objects["Place." + obj.id] = obj
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    FileStorage._FileStorage__objects = {}
+    populate(count)
+    strg = FileStorage()
+    strg.count(Place)  # builds the class index
+    print("{} places".format(count))
+    tic = time.perf_counter()
+    strg.near(Place, 40.7, -74.0, 1)
+    print("first near (builds the grid) {:10.1f} ms".format(
+        (time.perf_counter() - tic) * 1000))
+    for km in (10, 50, 200):
+        tic = time.perf_counter()
+        found = strg.near(Place, 40.7, -74.0, km)
+        elapsed = (time.perf_counter() - tic) * 1000
+        print("near {:4} km {:10.2f} ms {:6} places".format(
+            km, elapsed, len(found)))
+    tic = time.perf_counter()
+    scanned = [obj for obj in strg.all(Place).values()
+               if distance(40.7, -74.0, obj.latitude, obj.longitude) <= 200]
+    print("scan  200 km {:10.2f} ms {:6} places".format(
+        (time.perf_counter() - tic) * 1000, len(scanned)))
+    tic = time.perf_counter()
+    strg.nearest(Place, 40.7, -74.0, 10)
+    print("nearest 10   {:10.2f} ms".format(
+        (time.perf_counter() - tic) * 1000))
+
+
+if __name__ == "__main__":
+    main()
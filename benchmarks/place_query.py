@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Measures the console's Place.where(...) queries against printing all
+Places and picking the matches out of the list
+
+usage: ./benchmarks/place_query.py [number of places]
+Run from the root of the project. Nothing is written to disk"""
+import io
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def populate(count):
+    """adds count Places in 1000 cities with random prices and sizes"""
+    rand = random.Random(0)
+    for i in range(count):
+        obj = Place(id=str(i), created_at="2017-09-28T21:05:54.119427",
+                    updated_at="2017-09-28T21:05:54.119427",
+                    city_id="city-{}".format(rand.randrange(1000)),
+                    price_by_night=rand.randrange(20, 500),
+                    max_guest=rand.randrange(1, 10))
+        storage.new(obj)
+
+
+def timed(line, repeat=5):
+    """returns the output of the console command line and its best time
+    in ms"""
+    console, best = HBNBCommand(), None
+    for i in range(repeat):
+        out = io.StringIO()
+        tic = time.perf_counter()
+        with redirect_stdout(out):
+            console.onecmd(line)
+        elapsed = (time.perf_counter() - tic) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return out.getvalue(), best
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    FileStorage._FileStorage__objects = {}
+    populate(count)
+    print("{} places".format(count))
+    for line in ('Place.where(city_id == "city-7", max_guest >= 4)'
+                 '.order_by(-price_by_night).limit(5)',
+                 "Place.where(max_guest >= 8, price_by_night <= 30)",
+                 "Place.where(name == \"\").limit(5)"):
+        plan, _ = timed("explain " + line, 1)
+        output, elapsed = timed(line)
+        print("{:10.1f} ms  {}\n{}".format(elapsed, line, plan))
+    output, elapsed = timed("Place.all()", 1)
+    print("{:10.1f} ms  Place.all(), {} MB printed".format(
+        elapsed, len(output) >> 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""Measures the full-text index of FileStorage: building it, querying it
+and the cost it adds to the writes of new Reviews
+
+usage: ./benchmarks/search_index.py [number of reviews]
+Run from the root of the project. Objects are written to a temporary
+directory, file.json is not touched"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+WORDS = ("quiet clean cozy loud bright spacious dirty friendly host view "
+         "beach park loft kitchen bed noisy street station cheap lovely "
+         "stay again perfect small large garden pool wifi broken").split()
+
+
+def text(rand):
+    """returns a random review text of 20 words"""
+    return " ".join(rand.choice(WORDS) for i in range(20))
+
+
+def writes(strg, rand, count):
+    """returns the reviews/second of count saves of a new Review"""
+    tic = time.perf_counter()
+    for i in range(count):
+        obj = Review()
+        obj.text = text(rand)
+        strg.save(obj)
+    return count / (time.perf_counter() - tic)
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rand = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        for i in range(count):
+            Review().text = text(rand)
+        strg = FileStorage(journal=True)
+        strg.compact()
+        print("{} reviews".format(count))
+        print("writes without index {:10,.0f} reviews/s".format(
+            writes(strg, rand, 1000)))
+        tic = time.perf_counter()
+        strg.search(Review, "quiet")
+        print("first search (builds the index) {:8.0f} ms".format(
+            (time.perf_counter() - tic) * 1000))
+        strg.save()
+        for query in ("quiet", "quiet clean loft", "pool wifi broken"):
+            tic = time.perf_counter()
+            strg.search(Review, query, limit=10)
+            print("search {:20} {:8.1f} ms".format(
+                repr(query), (time.perf_counter() - tic) * 1000))
+        print("writes with index    {:10,.0f} reviews/s".format(
+            writes(strg, rand, 1000)))
+        FileStorage._FileStorage__text = None
+        FileStorage._FileStorage__objects = {}
+        tic = time.perf_counter()
+        strg.reload()
+        strg.search(Review, "quiet")
+        print("reload and search (index loaded) {:7.0f} ms".format(
+            (time.perf_counter() - tic) * 1000))
+
+
+if __name__ == "__main__":
+    main()
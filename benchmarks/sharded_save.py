@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Measures saving one changed Review and reloading a store held in a
+single file, in a file per class and in 16 files per class
+
+usage: ./benchmarks/sharded_save.py [number of objects per class]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+DATE = "2017-09-28T21:05:54.119427"
+
+
+def size(directory):
+    """the number of bytes of the files in directory"""
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for name in os.listdir(directory))
+
+
+def main():
+    """runs the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print("{} objects per class, User, Place and Review".format(count))
+    for shards in (0, 1, 16):
+        with tempfile.TemporaryDirectory() as tmp:
+            FileStorage._FileStorage__file_path = os.path.join(tmp,
+                                                               "file.json")
+            FileStorage._FileStorage__objects = {}
+            strg = FileStorage(shards=shards)
+            for i in range(count):
+                for cls in (User, Place, Review):
+                    strg.new(cls(id=str(i), created_at=DATE,
+                                 updated_at=DATE, name="{} {}".format(
+                                     cls.__name__, i)))
+            strg.save()
+            store = size(tmp)
+            review = strg.all()["Review.0"]
+            saves = 20
+            tic = time.perf_counter()
+            for i in range(saves):
+                review.text = "changed {}".format(i)
+                strg.save(review)
+            elapsed = (time.perf_counter() - tic) / saves * 1000
+            written = os.path.getsize(os.path.join(
+                tmp, ("file.json", "file.Review.json",
+                      "file.Review.{}.json".format(
+                          strg._FileStorage__shard("Review.0")[1]))[
+                    min(shards, 2)]))
+            FileStorage._FileStorage__objects = {}
+            tic = time.perf_counter()
+            FileStorage(shards=shards).reload()
+            reload = time.perf_counter() - tic
+            print("shards={:<3} save of 1 Review {:8.1f} ms, {:6.0f} KB "
+                  "written of {:6.0f} KB, reload {:6.2f} s".format(
+                      shards, elapsed, written / 1024, store / 1024,
+                      reload))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Measures the latency of lookups made by a reader thread, on an idle
+store and while another thread keeps changing objects and saving the
+whole store, as a threaded web backend would
+
+usage: ./benchmarks/threaded_reads.py [number of users] [seconds]
+Run from the root of the project. The store is written to a temporary
+directory"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+DATE = "2017-09-28T21:05:54.119427"
+
+
+def read(strg, users, seconds):
+    """looks users up for seconds, returns the sorted latencies"""
+    rand = random.Random(0)
+    latencies = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        tic = time.perf_counter()
+        strg.get(User, str(rand.randrange(users)))
+        strg.count(User)
+        latencies.append(time.perf_counter() - tic)
+    return sorted(latencies)
+
+
+def report(name, latencies):
+    """prints the percentiles of latencies"""
+    print("{:24} {:9} lookups  p50 {:7.1f} us  p99 {:7.1f} us  "
+          "max {:8.1f} ms".format(
+              name, len(latencies),
+              latencies[len(latencies) // 2] * 1e6,
+              latencies[len(latencies) * 99 // 100] * 1e6,
+              latencies[-1] * 1e3))
+
+
+def main():
+    """runs the benchmark"""
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(threadsafe=True)
+        for i in range(users):
+            strg.new(User(id=str(i), created_at=DATE, updated_at=DATE))
+        tic = time.perf_counter()
+        strg.compact()
+        save = time.perf_counter() - tic
+        print("{} users, a full save takes {:.0f} ms".format(
+            users, save * 1e3))
+        report("idle", read(strg, users, seconds))
+        stop, saves = threading.Event(), []
+
+        def write():
+            """changes a user and saves the whole store until stopped"""
+            rand = random.Random(1)
+            while not stop.is_set():
+                user = strg.get(User, str(rand.randrange(users)))
+                user.first_name = "name"
+                strg.compact()
+                saves.append(None)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        latencies = read(strg, users, seconds)
+        stop.set()
+        writer.join()
+        report("during {} saves".format(len(saves)), latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,35 @@
 #!/usr/bin/env python3
 """The Console module: for interacting with the application backend"""
+import argparse
+import ast
 import cmd
 import re
 import os
 import json
+import sys
+from itertools import islice
 from models import storage
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine.bulk import export_file, import_file
+from models.engine.locking import ConflictError
+from models.engine.query import parse_query
+from models.engine.streaming import migrate
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 
 
+# the start of the text of an int or a float, inf and nan included
+NUMBER = re.compile(r'\s*[-+]?[\d.iInN]')
+
+
 def get_type(data: str):
     """Determine the data type contained in the string"""
+    if not NUMBER.match(data):  # spares raising for most words
+        return str
     try:
         return type(int(data))
     except Exception:
@@ -25,27 +39,118 @@ def get_type(data: str):
             return str
 
 
+# a word: runs of other characters and double quoted strings, whose
+# quotes are dropped and \" and \\ escapes unescaped
+WORD = re.compile(r'(?:"(?:\\.|[^"\\])*"?|[^\s"]+)+')
+QUOTED = re.compile(r'"((?:\\.|[^"\\])*)"?')
+ESCAPE = re.compile(r'\\(.)')
+# the text before the first { or [ outside of double quotes
+HEAD = re.compile(r'(?:"(?:\\.|[^"\\])*"?|[^"{[])*')
+# an argument of a call: the text up to a comma outside of double quotes
+ARG = re.compile(r'(?:"(?:\\.|[^"\\])*"?|[^",])+')
+
+
+def unquote(match):
+    """the text of a double quoted string matched by QUOTED"""
+    text = match.group(1)
+    return ESCAPE.sub(r"\1", text) if "\\" in text else text
+
+
+def unquote_word(word):
+    """the text of a word found by WORD"""
+    if word.count('"') == 2 and word[0] == word[-1] == '"' \
+            and "\\" not in word:
+        return word[1:-1]  # a mere quoted string
+    return QUOTED.sub(unquote, word)
+
+
 def extract_words(input_string):
     """Extracts command arguments from the interpreter correctly.
     This is to allow the use of multiple words in quites as argument."""
-    words = []
-    in_quotes = False
-    current_word = ""
+    if '"' not in input_string:
+        return input_string.split()
+    return [unquote_word(word) if '"' in word else word
+            for word in WORD.findall(input_string)]
+
+
+def split_literal(text):
+    """splits text at its first { or [ outside of double quotes: returns
+    the text before it and the dict or list literal from it to the end,
+    None if there is none"""
+    end = HEAD.match(text).end()
+    if end == len(text):
+        return text, None
+    return text[:end], text[end:].strip()
+
+
+def parse_literal(text):
+    """returns the value of the literal text, in JSON or Python syntax.
+    Raises ValueError"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (SyntaxError, TypeError, MemoryError, RecursionError):
+        raise ValueError(f"invalid literal: {text}") from None
+
 
-    for char in input_string:
-        if char == '"':
-            in_quotes = not in_quotes
-        elif char.isspace() and not in_quotes:
-            if current_word:
-                words.append(current_word)
-                current_word = ""
-        elif char != '"':
-            current_word += char
+def call_args(text):
+    """turns the arguments of a call, the text between its parentheses,
+    into those of a command: the arguments, separated by commas outside of
+    double quotes, are separated by spaces. A dict or list literal, the
+    last argument, is kept whole"""
+    head, literal = split_literal(text)
+    args = [arg.strip() for arg in ARG.findall(head)]
+    if literal is not None:
+        args.append(literal)
+    return " ".join(arg for arg in args if arg)
 
-    if current_word:
-        words.append(current_word)
 
-    return words
+# a quoted string, with its escapes, a run of other characters or a ;
+SEGMENT = re.compile(r'"(?:\\.|[^"\\])*"?|[^;"]+|;')  # " quotes only, as words
+
+
+def split_commands(line):
+    """splits line into the commands separated by ; outside of quotes,
+    dropping the blank ones"""
+    commands, current = [], []
+    for segment in SEGMENT.findall(line):
+        if segment == ";":
+            commands.append("".join(current).strip())
+            current = []
+        else:
+            current.append(segment)
+    commands.append("".join(current).strip())
+    return [command for command in commands if command]
+
+
+class Watch:
+    """A stdout forwarding what is written to it, which notes if the
+    first text written is an error message: ** ... **"""
+
+    def __init__(self, out):
+        """Watch constructor"""
+        self.out = out
+        self.first = None
+
+    def write(self, text):
+        """writes text to the watched stdout"""
+        if self.first is None and text:
+            self.first = text
+        return self.out.write(text)
+
+    def flush(self):
+        """flushes the watched stdout"""
+        self.out.flush()
+
+    @property
+    def error(self):
+        """the error message written first, None if there was none"""
+        if self.first is not None and self.first.startswith("** "):
+            return self.first.strip()
+        return None
 
 
 class HBNBCommand(cmd.Cmd):
@@ -53,7 +158,35 @@ class HBNBCommand(cmd.Cmd):
     prompt = "(hbnb) "
     modelnames = ('Amenity', 'BaseModel', 'City', 'Place',
                   'Review', 'State', 'User')
-    cmdnames = ('all', 'destroy', 'show', 'count', 'update')
+    cmdnames = ('all', 'destroy', 'show', 'count', 'update', 'near',
+                'search', 'update_many')
+    QUERIES = ('where', 'order_by', 'limit')
+    # <classname>.<command>(<args>), a query being several calls
+    CALL = re.compile(r'\s*([a-zA-Z_]\w*)\.([a-zA-Z_]\w*)\((.*?)(\)\s*)?$')
+
+    def precmd(self, line):
+        """reads again the objects other processes saved, if any"""
+        storage.sync()
+        return line
+
+    def onecmd(self, line):
+        """runs line, which may hold several commands separated by ;
+        run in order in one storage batch: their changes are written once,
+        after the last. Stops at a command that quits. A save conflicting
+        with another process, in shared mode, is reported"""
+        try:
+            if ";" not in line:
+                return super().onecmd(line)
+            commands = split_commands(line)
+            if len(commands) < 2:
+                return super().onecmd(commands[0] if commands else "")
+            with storage.batch():
+                for command in commands:
+                    if super().onecmd(command):
+                        return True
+        except ConflictError as err:
+            print(f"** conflict: {err} **")
+        return False
 
     def default(self, line):
         """Overrides the default() method to allow/support different format
@@ -61,21 +194,22 @@ class HBNBCommand(cmd.Cmd):
         is made to proceed to the super class' default handling"""
 
         # target: User.update("uuid", "first_name", "John")
-        # Result: ["User", "update", "uuid", "first_name", "John"]
+        # Result: update User "uuid" "first_name" "John"
         # target: User.update("bef0b8", {"name": "iyke"})
-        # Result: ['User', 'update', '"bef0b8", {"name": "iyke"}']
-        mat = re.match(r'^\s*([a-zA-Z_]\w*)\.([a-zA-Z_]\w*)\((.*)\)\s*$',
-                       line)
+        # Result: update User "bef0b8" {"name": "iyke"}
+        # target: Place.where(max_guest >= 4).order_by(name).limit(5)
+        # Result: the query, parsed by parse_query()
+        mat = self.CALL.match(line)
         if mat:
-            class_name, command, args = mat.groups()
-            if command in self.cmdnames:
-                if re.findall(r"({.*?})", args):  # If args contains a dict
-                    # Replace the comma after the id & leave the others
-                    args = args.replace(",", "", 1)
-                    self.onecmd(f"{command} {class_name} {args}")
-                else:
-                    args = ''.join(args.split(','))
-                    self.onecmd(f"{command} {class_name} {args}")
+            class_name, command, args, end = mat.groups()
+            if command in self.QUERIES:
+                self.__query(line)
+            elif end is None:
+                return super().default(line)
+            elif command in self.cmdnames:
+                args = call_args(args)
+                getattr(self, "do_" + command)(
+                    f"{class_name} {args}" if args else class_name)
             else:
                 print(f"** Invalid command: {line} **")
         else:  # An approperiate handler wasn't found
@@ -85,17 +219,12 @@ class HBNBCommand(cmd.Cmd):
         """counts number of instances
         <classname>.count()
         """
-        objs = storage.all()
         if not arg:
             print("** class name missing **")
         elif arg not in self.modelnames:
             print("** class doesn't exist **")
         else:
-            i = 0
-            for key, value in objs.items():
-                if arg in key:
-                    i += 1
-            print(i)
+            print(storage.count(arg))
 
     def emptyline(self) -> bool:
         return False
@@ -141,11 +270,11 @@ class HBNBCommand(cmd.Cmd):
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            objs = storage.all()
-            if f"{args[0]}.{args[1]}" not in objs.keys():
+            obj = storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
             else:
-                print(objs[f"{args[0]}.{args[1]}"])
+                print(obj)
 
     def do_destroy(self, arg):
         """deletes an instance
@@ -165,28 +294,66 @@ class HBNBCommand(cmd.Cmd):
             if f"{args[0]}.{args[1]}" not in objs.keys():
                 print("** no instance found **")
             else:
-                del objs[f"{args[0]}.{args[1]}"]
-                storage.save_changes(objs)
+                storage.delete(objs[f"{args[0]}.{args[1]}"])
+                storage.save()
 
     def do_all(self, arg):
         """prints string repr of instances based or not
-on class name:
-        all [<classname>]
+on class name, one at a time:
+        all [<classname>] [limit=<n>] [offset=<n>] [after=<cursor>]
+            [format=list|lines|json]
                 or
-        <classname>.all()
+        <classname>.all([limit=<n>, ...])
+        format=lines prints one instance per line, format=json the JSON
+        of one instance per line. With a limit, the cursor to pass as
+        after= for the next page is printed last
         """
-        objs = storage.all()
-        lis = []
-        if not arg:
-            for key in objs.keys():
-                lis.append(str(objs[key]))
-        elif arg not in self.modelnames:
+        args = extract_words(arg)
+        name = None
+        if args and "=" not in args[0]:
+            name = args.pop(0)
+        if name is not None and (name not in self.modelnames or
+                                 any("=" not in word for word in args)):
             print("** class doesn't exist **")
-        else:
-            for key, value in objs.items():
-                if arg in key:
-                    lis.append(str(value))
-        print(lis)
+            return
+        options = {"limit": None, "offset": 0, "after": None,
+                   "format": "list"}
+        for word in args:
+            option, sep, value = word.partition("=")
+            if option in ("limit", "offset"):
+                value = int(value) if value.isdigit() else -1
+            if option not in options or value == -1 or option == "format" \
+                    and value not in ("list", "lines", "json"):
+                print(f"** invalid option: {word} **")
+                return
+            options[option] = value
+        try:
+            objs = storage.stream(name, options["after"])
+        except KeyError:
+            print("** no instance found **")
+            return
+        limit, offset = options["limit"], options["offset"]
+        objs = islice(objs, offset,
+                      None if limit is None else offset + limit + 1)
+        fmt, count, last, more = options["format"], 0, None, False
+        if fmt == "list":
+            print("[", end="")
+        for obj in objs:
+            if count == limit:  # one more: there is a next page
+                more = True
+                break
+            if fmt == "list":
+                print((", " if count else "") + repr(str(obj)), end="")
+            elif fmt == "lines":
+                print(obj)
+            else:
+                print(json.dumps(obj.to_dict()))
+            count += 1
+            last = f"{type(obj).__name__}.{obj.id}"
+        if fmt == "list":
+            print("]")
+        if more and last is not None:
+            print(f"** next: after={last} **")
 
     def do_update(self, arg):
         """updates an instance attribute
@@ -194,9 +361,16 @@ on class name:
                             or
         <classname>.update(<id>, <attribute>, <value>)
         """
-        if re.findall(r"({.*?})", arg):  # If args contains a dict
-            arg = arg.replace("'", "\"")  # Replace any single quotes
-        args = extract_words(arg)
+        words, literal = split_literal(arg)
+        args = extract_words(words)
+        if literal is not None:
+            try:
+                args.append(parse_literal(literal))
+            except ValueError:
+                if literal.startswith("{"):
+                    print("** invalid dictionary **")
+                    return
+                args += extract_words(literal)  # text, such as [draft]
         if len(args) < 1:
             print("** class name missing **")
         elif args[0] not in self.modelnames:
@@ -207,28 +381,286 @@ on class name:
             objs = storage.all()
             if f"{args[0]}.{args[1]}" not in objs.keys():
                 print("** no instance found **")
+            elif len(args) == 3 and type(args[2]) is dict:
+                # UPDATE id {"name": "John"}
+                obj = objs[f"{args[0]}.{args[1]}"]
+                for key, value in args[2].items():
+                    setattr(obj, key, value)
+                storage.save(obj)
             elif len(args) < 3:
                 print("** attribute name missing **")
             elif len(args) < 4:
                 print("** value missing **")
-            else:  # NOTE: id, created_at and updated_at aren't updated
-                regexp = r"({.*?})"  # dicts only
-                matches = re.findall(regexp, arg)
+            else:  # UPDATE id first_name michael
                 obj = objs[f"{args[0]}.{args[1]}"]
-                if matches:  # UPDATE id {name: John}
-                    dict_ = json.loads(matches[0])  # Only 1 dict expected
-                    for key, value in dict_.items():
-                        # Get the type of the dit item, default type is str
-                        type_ = type(dict_.get(key) or "")
-                        v = type_(value)
-                        setattr(objs[f"{args[0]}.{args[1]}"], key, v)
-                else:  # UPDATE id first_name michael
+                v = args[3]
+                if type(v) is str:  # not a dict or list literal
                     type_ = type(getattr(obj, args[2], ""))
-                    v = type_(args[3])
+                    v = type_(v)
                     if type_ is str:
-                        v = get_type(args[3])(args[3])
-                    setattr(objs[f"{args[0]}.{args[1]}"], args[2], v)
-                storage.save_changes(objs)
+                        v = get_type(v)(v)
+                setattr(obj, args[2], v)
+                storage.save(obj)
+
+    def do_update_many(self, arg):
+        """updates instances of a class at once, in one storage batch:
+        nothing is updated if one of the instances isn't found
+        update_many <classname> [{"id": <id>, <attribute>: <value>}, ...]
+                            or
+        <classname>.update_many([{"id": <id>, <attribute>: <value>}, ...])
+        """
+        class_name, _, updates = arg.strip().partition(" ")
+        if not class_name:
+            print("** class name missing **")
+            return
+        if class_name not in self.modelnames:
+            print("** class doesn't exist **")
+            return
+        if not updates.strip():
+            print("** updates missing **")
+            return
+        try:
+            updates = parse_literal(updates)
+        except ValueError:
+            updates = None
+        if type(updates) is not list or not all(
+                type(update) is dict and type(update.get("id")) is str
+                for update in updates):
+            print("** updates should be a list of {\"id\": ...} **")
+            return
+        objs = storage.all()
+        for update in updates:
+            if f"{class_name}.{update['id']}" not in objs:
+                print(f"** no instance found: {update['id']} **")
+                return
+        with storage.batch():
+            for update in updates:
+                obj = objs[f"{class_name}.{update['id']}"]
+                for key, value in update.items():
+                    if key not in ("id", "created_at", "updated_at"):
+                        setattr(obj, key, value)
+                storage.save(obj)
+
+    def do_near(self, arg):
+        """prints string repr of the instances within a distance of a
+point, closest first
+        near <classname> <latitude> <longitude> <km>
+                or
+        <classname>.near(<latitude>, <longitude>, <km>)
+        """
+        args = extract_words(arg)
+        if len(args) < 1:
+            print("** class name missing **")
+        elif args[0] not in self.modelnames:
+            print("** class doesn't exist **")
+        elif not getattr(globals()[args[0]], "__location__", None):
+            print("** class has no location **")
+        elif len(args) < 2:
+            print("** latitude missing **")
+        elif len(args) < 3:
+            print("** longitude missing **")
+        elif len(args) < 4:
+            print("** distance missing **")
+        else:
+            try:
+                lat, lon, km = map(float, args[1:4])
+            except ValueError:
+                print("** invalid number **")
+                return
+            print([str(obj) for obj in storage.near(args[0], lat, lon, km)])
+
+    def do_search(self, arg):
+        """prints string repr of the instances holding words of a query,
+best match first
+        search <classname> <words>
+                or
+        <classname>.search("<words>")
+        """
+        args = extract_words(arg)
+        if len(args) < 1:
+            print("** class name missing **")
+        elif args[0] not in self.modelnames:
+            print("** class doesn't exist **")
+        elif not getattr(globals()[args[0]], "__search__", None):
+            print("** class is not searchable **")
+        elif len(args) < 2:
+            print("** query missing **")
+        else:
+            query = " ".join(args[1:])
+            print([str(obj) for obj in storage.search(args[0], query)])
+
+    def do_where(self, arg):
+        """prints string repr of the instances matching all conditions,
+an attribute compared to a value by ==, !=, <, <=, > or >=
+        where <classname> <attribute> <op> <value>[, ...]
+                or
+        <classname>.where(<attribute> <op> <value>, ...)
+        sorted and cut by .order_by(<attribute>, -<descending>, ...) and
+        .limit(<number>), e.g
+        Place.where(max_guest >= 4).order_by(-price_by_night).limit(5)
+        """
+        args = arg.split(None, 1)
+        if len(args) < 1:
+            print("** class name missing **")
+        elif args[0] not in self.modelnames:
+            print("** class doesn't exist **")
+        else:
+            self.__query("{}.where({})".format(args[0], "".join(args[1:])))
+
+    def do_explain(self, arg):
+        """prints how a query is run: the index used, the conditions
+checked object by object, the sort and the limit
+        explain <classname>.where(...).order_by(...).limit(...)
+        """
+        if not arg:
+            print("** query missing **")
+        else:
+            self.__query(arg, explain=True)
+
+    def __query(self, text, explain=False):
+        """runs the query text, or prints its plan if explain"""
+        try:
+            name, where, order_by, limit = parse_query(text)
+        except ValueError as err:
+            print(f"** invalid query: {err} **")
+            return
+        if name not in self.modelnames:
+            print("** class doesn't exist **")
+            return
+        plan = storage.plan(name, where, order_by, limit)
+        if explain:
+            print("\n".join(plan.explain()))
+        else:
+            print([str(obj) for obj in plan.run()])
+
+    def do_begin(self, arg):
+        """starts a batch: changes are only saved by commit
+        begin
+        """
+        storage.begin()
+
+    def do_commit(self, arg):
+        """saves all the changes made since begin at once
+        commit
+        """
+        if not storage.batching:
+            print("** no batch started **")
+        else:
+            storage.commit()
+
+    def do_rollback(self, arg):
+        """drops the changes made since the last begin
+        rollback
+        """
+        if not storage.batching:
+            print("** no batch started **")
+        else:
+            storage.rollback()
+
+    def do_migrate(self, arg):
+        """copies a storage file into another format, one object at a time
+        migrate <source> <destination>
+        e.g migrate file.json file.jsonl
+        """
+        args = extract_words(arg)
+        if len(args) < 1:
+            print("** source file missing **")
+        elif len(args) < 2:
+            print("** destination file missing **")
+        elif not os.path.isfile(args[0]):
+            print("** source file doesn't exist **")
+        else:
+            print(migrate(args[0], args[1]))
+
+    def do_import(self, arg):
+        """adds the instances read from a CSV file, with a header line
+naming the attributes, or a JSON lines file, saved at once. Instances of
+the same id are replaced. Nothing is saved if a record is invalid
+        import <classname> <file.csv|file.jsonl>
+        """
+        args = extract_words(arg)
+        if not self.__bulk_args(args, exists=True):
+            return
+        try:
+            print(import_file(storage, globals()[args[0]], args[1]))
+        except ValueError as err:
+            print(f"** invalid record: {err} **")
+
+    def do_export(self, arg):
+        """writes the instances of a class to a CSV file, one column per
+attribute declared on the class, or a JSON lines file
+        export <classname> <file.csv|file.jsonl>
+        """
+        args = extract_words(arg)
+        if self.__bulk_args(args):
+            print(export_file(storage, globals()[args[0]], args[1]))
+
+    def __bulk_args(self, args, exists=False):
+        """tells if args are a class name and a .csv or .jsonl file, which
+        must exist if exists, printing what is wrong otherwise"""
+        if len(args) < 1:
+            print("** class name missing **")
+        elif args[0] not in self.modelnames:
+            print("** class doesn't exist **")
+        elif len(args) < 2:
+            print("** file missing **")
+        elif not args[1].endswith((".csv", ".jsonl")):
+            print("** file must be .csv or .jsonl **")
+        elif exists and not os.path.isfile(args[1]):
+            print("** file doesn't exist **")
+        else:
+            return True
+        return False
+
+    def run_batch(self, lines, flush_every=0, errors=None):
+        """runs the commands of lines, a file or any iterable of lines,
+        in a storage batch: the changes are written once at the end, or
+        every flush_every commands if given. The commands that fail are
+        reported on errors, stderr by default, with their line number, the
+        others go on. A line run as a batch of its own, such as a ;
+        sequence or update_many, only drops its own changes when it fails.
+        Returns the number of failed commands"""
+        errors = errors or sys.stderr
+        failed = done = 0
+        storage.begin()
+        try:
+            for number, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                watch = Watch(sys.stdout)
+                sys.stdout = watch
+                try:
+                    stop = self.onecmd(self.precmd(line))
+                except Exception as err:
+                    watch.first = f"** {type(err).__name__}: {err} **"
+                    stop = False
+                finally:
+                    sys.stdout = watch.out
+                if watch.error is not None:
+                    failed += 1
+                    print(f"line {number}: {line}: {watch.error}",
+                          file=errors)
+                if stop:
+                    break
+                done += 1
+                if flush_every and done % flush_every == 0:
+                    failed += self.commit_script(errors)
+                    storage.begin()
+        finally:
+            failed += self.commit_script(errors)
+        return failed
+
+    @staticmethod
+    def commit_script(errors):
+        """commits the batch of a script, reporting on errors a conflict
+        with another process. Returns the number of failures"""
+        try:
+            storage.commit()
+        except ConflictError as err:
+            print(f"** conflict: {err} **", file=errors)
+            return 1
+        return 0
 
     def do_cls(self, arg):
         """clears the screen: CLS"""
@@ -238,5 +670,26 @@ on class name:
             os.system("clear")
 
 
+def main(argv=None):
+    """runs the interpreter, or the commands of a script in batch mode"""
+    parser = argparse.ArgumentParser(description="The HBNB console")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="run the commands of FILE, of stdin if - or "
+                        "omitted, saving once at the end")
+    parser.add_argument("--flush-every", type=int, default=0, metavar="N",
+                        help="in batch mode, also save every N commands")
+    args = parser.parse_args(argv)
+    if args.batch is None:
+        HBNBCommand().cmdloop()
+        return 0
+    console = HBNBCommand()
+    if args.batch == "-":
+        failed = console.run_batch(sys.stdin, args.flush_every)
+    else:
+        with open(args.batch) as fil:
+            failed = console.run_batch(fil, args.flush_every)
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    sys.exit(main())
@@ -1,6 +1,42 @@
 #!/usr/bin/env python3
 """The models package"""
 from models.engine.file_storage import FileStorage
+from os import getenv
 
-storage = FileStorage()
+# HBNB_STORAGE_CODEC=json|orjson|ujson picks the JSON library, the fastest
+# installed by default
+codec = getenv("HBNB_STORAGE_CODEC", "auto")
+# HBNB_STORAGE_COMPACT=1 loads the objects as slotted classes, which take
+# less memory
+compact_mode = getenv("HBNB_STORAGE_COMPACT") == "1"
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    # SQLite database at HBNB_DB_PATH, hbnb.db by default
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(getenv("HBNB_DB_PATH", "hbnb.db"), codec=codec,
+                        compact=compact_mode)
+else:
+    # HBNB_STORAGE_JOURNAL=1 appends changes to a journal instead of
+    # rewriting the whole file on every save
+    # HBNB_STORAGE_LAZY=1 only creates the objects that are looked up
+    # HBNB_STORAGE_CHECKPOINT=<seconds> writes in the background at most
+    # once every <seconds>
+    # HBNB_STORAGE_FORMAT=jsonl keeps one object per line in file.jsonl,
+    # HBNB_STORAGE_FORMAT=snapshot the binary file.snap, whose objects are
+    # only read when looked up
+    # HBNB_STORAGE_SHARDS=1 keeps a file per class, file.<class>.json,
+    # HBNB_STORAGE_SHARDS=<n> n files per class, file.<class>.<i>.json
+    # HBNB_STORAGE_SHARED=1 locks the files for several processes to use
+    # HBNB_STORAGE_THREADSAFE=1 returns copies from all() and stream() for
+    # threads to iterate while others change the objects
+    checkpoint = getenv("HBNB_STORAGE_CHECKPOINT")
+    if checkpoint:
+        checkpoint = float(checkpoint)
+    storage = FileStorage(journal=getenv("HBNB_STORAGE_JOURNAL") == "1",
+                          lazy=getenv("HBNB_STORAGE_LAZY") == "1",
+                          checkpoint=checkpoint or None, codec=codec,
+                          file_format=getenv("HBNB_STORAGE_FORMAT", "json"),
+                          compact=compact_mode,
+                          shards=int(getenv("HBNB_STORAGE_SHARDS", "0")),
+                          shared=getenv("HBNB_STORAGE_SHARED") == "1",
+                          threadsafe=getenv("HBNB_STORAGE_THREADSAFE") == "1")
 storage.reload()
@@ -14,10 +14,12 @@ class BaseModel:
         global storage
         from models import storage
 
+        # Set past __setattr__: there is no change to tell the storage yet
+        setter = super().__setattr__
         if not kwargs:
-            self.id = str(uuid.uuid4())
-            self.created_at = datetime.now()
-            self.updated_at = self.created_at
+            setter("id", str(uuid.uuid4()))
+            setter("created_at", datetime.now())
+            setter("updated_at", self.created_at)
             storage.new(self)
             return
 
@@ -25,23 +27,38 @@ class BaseModel:
             if key == "__class__":
                 continue
             if key == "created_at" or key == "updated_at":
-                setattr(self, key, datetime.fromisoformat(value))
-                continue
-            setattr(self, key, value)
+                if type(value) is str:  # else decoded by the storage codec
+                    value = datetime.fromisoformat(value)
+            setter(key, value)
+
+    def __setattr__(self, name, value):
+        """sets the attribute and marks the object as changed in storage"""
+        super().__setattr__(name, value)
+        storage.touch(self)
+
+    def __delattr__(self, name):
+        """deletes the attribute and marks the object as changed"""
+        super().__delattr__(name)
+        storage.touch(self)
 
     def __str__(self):
         """str representation of the object"""
-        return f"""[{self.__class__.__name__}] ({self.id}) {self.__dict__}"""
+        attrs = self._attributes()
+        return f"""[{self.__class__.__name__}] ({self.id}) {attrs}"""
 
     def save(self):
         """updates the updated_at attr"""
         self.updated_at = datetime.now()
-        storage.save()
+        storage.save(self)
+
+    def _attributes(self):
+        """returns a copy of the attributes set on the instance"""
+        return self.__dict__.copy()
 
     def to_dict(self):
         """returns a dictionary containing
         all keys/values of __dict__"""
-        dic = self.__dict__.copy()
+        dic = self._attributes()
         dic['__class__'] = self.__class__.__name__
         dic['created_at'] = dic['created_at'].isoformat()
         dic['updated_at'] = dic['updated_at'].isoformat()
@@ -5,5 +5,6 @@ from models.base_model import BaseModel
 
 class City(BaseModel):
     """The City class"""
+    __indexes__ = ("state_id",)  # looked up by storage.find()
     name = ""
     state_id = ""  # will be State.id
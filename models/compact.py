@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""The compact module: slotted variants of the model classes
+The variant of a model class has the same name and is a subclass of it,
+but keeps id, the timestamps and the attributes declared on the class in
+__slots__ instead of the instance __dict__. The attributes set
+dynamically, by do_update for instance, still go to the __dict__, which
+is only ever read for the objects that have some.
+The <name>_id values are interned: a Review refers to a few Places and
+Users, their ids are then stored once. A created_at equal to updated_at
+is also stored once"""
+import sys
+
+_variants = {}  # model class -> its compact variant
+_missing = object()
+
+
+def declared(cls):
+    """returns the attribute names declared on cls and its bases, in
+    declaration order, id and the timestamps first"""
+    names = ["id", "created_at", "updated_at"]
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if name.startswith("_") or name in names or \
+                    callable(value) or hasattr(value, "__get__"):
+                continue
+            names.append(name)
+    return names
+
+
+def compact(cls):
+    """returns the compact variant of the model class cls"""
+    if getattr(cls, "__compact__", False):
+        return cls
+    variant = _variants.get(cls)
+    if variant is not None:
+        return variant
+    names = declared(cls)
+    interned = tuple(name for name in names if name.endswith("_id"))
+
+    def __init__(self, *args, **kwargs):
+        """builds the object like its model class, interning its ids"""
+        setter = object.__setattr__
+        setter(self, "__extra__", any(key not in slots and key != "__class__"
+                                      for key in kwargs))
+        cls.__init__(self, *args, **kwargs)
+        for name in interned:
+            value = kwargs.get(name)
+            if type(value) is str:
+                setter(self, name, sys.intern(value))
+        created = getattr(self, "created_at", None)
+        if created is not None and created == getattr(self, "updated_at",
+                                                      None):
+            setter(self, "updated_at", created)
+
+    def __setattr__(self, name, value):
+        """sets the attribute, noting if it is not declared"""
+        if name not in slots:
+            object.__setattr__(self, "__extra__", True)
+        cls.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        """the class default of a declared attribute not set yet"""
+        if name in slots:
+            value = getattr(cls, name, _missing)
+            if value is not _missing:
+                return value
+        raise AttributeError("{!r} object has no attribute {!r}"
+                             .format(cls.__name__, name))
+
+    def _attributes(self):
+        """returns the attributes set on the instance, slots included"""
+        attrs = {}
+        for name, slot in slots.items():
+            try:
+                attrs[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        if self.__extra__:  # reading __dict__ creates it
+            attrs.update(self.__dict__)
+        return attrs
+
+    variant = type(cls.__name__, (cls,), {
+        "__slots__": tuple(names) + ("__extra__",),
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__doc__": cls.__doc__,
+        "__compact__": True,
+        "__init__": __init__,
+        "__setattr__": __setattr__,
+        "__getattr__": __getattr__,
+        "_attributes": _attributes,
+    })
+    slots = {name: vars(variant)[name] for name in names}
+    _variants[cls] = variant
+    return variant
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""The aio module: the asyncio side of the storage engines. Writes run in
+an executor while the event loop goes on, the saves requested while one
+runs are coalesced into the next, and iterations give the loop back
+every chunk of objects"""
+import asyncio
+
+CHUNK = 1000  # objects yielded by aiter() between two returns to the loop
+
+
+class Coalescer:
+    """Runs write() in an executor for the coroutines awaiting save().
+    Those calling it while a write runs all wait for a single next write,
+    which starts once the running one ends, so it holds their changes"""
+
+    def __init__(self, write, executor=None):
+        """Coalescer constructor
+        write: writes the changes, called from the executor
+        executor: a concurrent.futures executor, the loop's default if
+        None"""
+        self.write = write
+        self.executor = executor
+        self.__running = None  # the task running write()
+        self.__pending = None  # the task waiting for it to end
+
+    async def save(self):
+        """waits for a write started after this call, sharing it with the
+        other callers. Raises what write() raised. Cancelling a caller
+        does not cancel the write"""
+        loop = asyncio.get_running_loop()
+        pending = self.__pending
+        if pending is None or pending.get_loop() is not loop:
+            pending = self.__pending = loop.create_task(self.__run())
+        return await asyncio.shield(pending)
+
+    async def __run(self):
+        """waits for the running write to end then runs write()"""
+        loop = asyncio.get_running_loop()
+        running = self.__running
+        if running is not None and running.get_loop() is loop:
+            await asyncio.wait([running])
+        self.__running, self.__pending = asyncio.current_task(), None
+        try:
+            return await loop.run_in_executor(self.executor, self.write)
+        finally:
+            self.__running = None
+
+
+async def paced(iterable, chunk=CHUNK):
+    """yields the items of iterable, giving the event loop back every
+    chunk items so other tasks run during a long iteration"""
+    for count, item in enumerate(iterable, 1):
+        yield item
+        if count % chunk == 0:
+            await asyncio.sleep(0)
@@ -0,0 +1,39 @@
+#!/usr/bin/python3
+"""The atomic module: crash safe file writes"""
+from contextlib import contextmanager
+import os
+import tempfile
+
+
+@contextmanager
+def atomic_open(path, mode="w"):
+    """opens a temporary file in the directory of path for writing.
+    When the block ends it is fsync'd then renamed over path, so path
+    holds either the old or the new content, never a part of it.
+    If the block raises, the temporary file is removed and path is left
+    untouched"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".",
+                               suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as fil:
+            yield fil
+            fil.flush()
+            os.fsync(fil.fileno())
+        try:
+            os.chmod(tmp, os.stat(path).st_mode)
+        except FileNotFoundError:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if os.name == "posix":  # make the rename itself durable
+        dirfd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dirfd)
+        finally:
+            os.close(dirfd)
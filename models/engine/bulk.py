@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+"""The bulk module: imports and exports the objects of a model class as
+CSV, with a header line, or as JSON lines, one record per line.
+An import reads its file a chunk of lines at a time and has the records
+parsed and validated by a pool of processes, the calling process only
+creates the model instances. They are all added in a single batch of the
+storage: one write for the whole file, nothing written on error"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from models.compact import declared
+from models.engine.atomic import atomic_open
+from models.engine.codec import get_codec
+import csv
+import json
+import multiprocessing
+import os
+import uuid
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl"}
+CHUNK = 20000  # lines parsed by a worker at a time
+TIMESTAMPS = ("created_at", "updated_at")
+
+
+def file_format(path):
+    """returns the format of path from its extension. Raises ValueError
+    if it is neither .csv nor .jsonl"""
+    fmt = FORMATS.get(os.path.splitext(path)[1])
+    if fmt is None:
+        raise ValueError("unknown format: {}".format(path))
+    return fmt
+
+
+def attribute_types(cls):
+    """returns the {attribute: type} of the attributes declared on cls"""
+    return {name: type(getattr(cls, name)) for name in declared(cls)[3:]}
+
+
+def convert(value, kind):
+    """returns value as a kind, one of the types of the declared
+    attributes, parsing it if it is a string. Raises ValueError"""
+    if type(value) is kind or kind not in (int, float, list):
+        return value
+    if kind is float and type(value) is int:
+        return float(value)
+    if type(value) is str:
+        if kind is list:
+            value = json.loads(value)
+            if type(value) is list:
+                return value
+        else:
+            return kind(value)
+    raise ValueError("{!r} is not a {}".format(value, kind.__name__))
+
+
+def validate(record, name, types, now):
+    """turns the raw dict record, read for the class called name, into the
+    kwargs of its model instance. Empty CSV cells are left out, missing
+    timestamps are now. Raises ValueError"""
+    cls = record.pop("__class__", name)
+    if cls != name:
+        raise ValueError("record of class {}".format(cls))
+    kwargs = {}
+    for key, value in record.items():
+        if value == "":  # an empty CSV cell: the class default
+            continue
+        if key in types:
+            try:
+                value = convert(value, types[key])
+            except ValueError:
+                raise ValueError("{} should be {}: {!r}".format(
+                    key, types[key].__name__, value)) from None
+        kwargs[key] = value
+    if "id" not in kwargs:
+        kwargs["id"] = str(uuid.uuid4())
+    elif type(kwargs["id"]) is not str:
+        raise ValueError("id should be str: {!r}".format(kwargs["id"]))
+    for key in TIMESTAMPS:
+        value = kwargs.get(key)
+        if value is None:
+            kwargs[key] = now
+        elif type(value) is str:
+            kwargs[key] = datetime.fromisoformat(value)
+        else:
+            raise ValueError("{} should be a date: {!r}".format(key, value))
+    return kwargs
+
+
+def parse_chunk(task):
+    """parses a chunk of lines in a worker: task is (format, class name,
+    attribute types, codec name, number of the first line, the CSV header
+    or None, the lines). Returns the list of kwargs and the (line number,
+    message) of the first invalid record, None if all are valid"""
+    fmt, name, types, codec, first, header, lines = task
+    loads = get_codec(codec).loads
+    now = datetime.now()
+    records = []
+    if fmt == "csv":
+        rows = (dict(zip(header, row)) for row in csv.reader(lines))
+    else:
+        rows = (loads(line) if line.strip() else None for line in lines)
+    number = first
+    try:
+        for number, record in enumerate(rows, first):
+            if record is None:
+                continue
+            if type(record) is not dict:
+                raise ValueError("not a JSON object")
+            records.append(validate(record, name, types, now))
+    except (ValueError, csv.Error) as err:  # JSONDecodeError included
+        return records, (number, str(err))
+    return records, None
+
+
+def chunks(fil, fmt, size=CHUNK):
+    """yields the (number of the first line, lines) chunks of the text
+    file fil, skipping the CSV header. Quoted CSV cells may hold newlines,
+    a chunk never ends inside one"""
+    number, lines = 2 if fmt == "csv" else 1, []
+    quotes = 0
+    for line in fil:
+        lines.append(line)
+        if fmt == "csv":
+            quotes += line.count('"')
+        if len(lines) >= size and quotes % 2 == 0:
+            yield number, lines
+            number, lines = number + len(lines), []
+    if lines:
+        yield number, lines
+
+
+def import_file(storage, cls, path, workers=None, codec="auto",
+                chunk=CHUNK):
+    """adds the objects of class cls read from the CSV or JSON lines file
+    path to storage, replacing those of the same ids, and returns their
+    number. The records are parsed by workers processes, as many as CPUs
+    if None, chunk lines at a time, JSON lines by the codec named codec.
+    Raises ValueError on the first invalid record, naming its line,
+    nothing is added then"""
+    fmt = file_format(path)
+    name, types = cls.__name__, attribute_types(cls)
+    count = 0
+    with open(path, "r", newline="") as fil:
+        header = next(csv.reader([fil.readline()]), []) if fmt == "csv" \
+            else None
+        tasks = ((fmt, name, types, codec, first, header, lines)
+                 for first, lines in chunks(fil, fmt, chunk))
+        with storage.batch():
+            for records, error in parse(tasks, workers):
+                if error is not None:
+                    raise ValueError("line {}: {}".format(*error))
+                for kwargs in records:
+                    storage.new(cls(**kwargs))
+                count += len(records)
+    return count
+
+
+def parse(tasks, workers=None):
+    """yields the results of parse_chunk(task) of each task in order. A
+    single task, or a single worker, is parsed in the calling process,
+    more by a pool of workers processes, two tasks per worker at most
+    being in flight.
+    The workers are forked where possible: started again, they would
+    import the models package, which reloads the storage"""
+    tasks = iter(tasks)
+    first = next(tasks, None)
+    if first is None:
+        return
+    second = next(tasks, None)
+    if second is None:
+        yield parse_chunk(first)
+        return
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:  # a single worker would only add the pickling
+        yield parse_chunk(first)
+        yield parse_chunk(second)
+        for task in tasks:
+            yield parse_chunk(task)
+        return
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = deque([pool.submit(parse_chunk, first),
+                         pool.submit(parse_chunk, second)])
+        try:
+            for task in tasks:
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(parse_chunk, task))
+            while pending:
+                yield pending.popleft().result()
+        finally:  # stopped early: drop the chunks not parsed yet
+            for future in pending:
+                future.cancel()
+
+
+def export_file(storage, cls, path):
+    """writes the objects of class cls in storage to the CSV or JSON
+    lines file path, one at a time, and returns their number. The CSV
+    columns are the attributes declared on cls, left empty when not set,
+    the JSON lines hold every attribute. path is replaced atomically"""
+    fmt = file_format(path)
+    columns = declared(cls)
+    count = 0
+    with atomic_open(path) as fil:
+        if fmt == "csv":
+            writer = csv.writer(fil, lineterminator="\n")
+            writer.writerow(columns)
+        for obj in storage.stream(cls):
+            record = obj.to_dict()
+            if fmt == "csv":
+                writer.writerow([cell(record.get(column, ""))
+                                 for column in columns])
+            else:
+                fil.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def cell(value):
+    """the CSV cell of an attribute value, lists and dicts as JSON"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
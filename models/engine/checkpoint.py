@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""The checkpoint module: coalesces frequent saves in a background thread"""
+import threading
+
+
+class Checkpointer(threading.Thread):
+    """A daemon thread calling flush() at most every interval seconds,
+    and only if a save was requested since the last flush. Any number of
+    saves requested in between cost a single flush.
+    An error raised by flush() is kept in error, the save stays pending"""
+
+    def __init__(self, flush, interval):
+        """Checkpointer constructor
+        flush: writes the store, called from the thread
+        interval: seconds between two checks for requested saves"""
+        super().__init__(name="hbnb-checkpoint", daemon=True)
+        self.flush = flush
+        self.interval = interval
+        self.error = None
+        self.__pending = threading.Event()
+        self.__stopped = threading.Event()
+
+    def request(self):
+        """asks for a save at the next checkpoint"""
+        self.__pending.set()
+
+    def run(self):
+        """checks for requested saves until stopped"""
+        while not self.__stopped.wait(self.interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """flushes now if a save was requested"""
+        if not self.__pending.is_set():
+            return
+        self.__pending.clear()
+        try:
+            self.flush()
+        except Exception as error:
+            self.__pending.set()
+            self.error = error
+        else:
+            self.error = None
+
+    def stop(self):
+        """stops the thread then flushes what is still pending"""
+        self.__stopped.set()
+        if self.is_alive():
+            self.join()
+        self.checkpoint()
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+"""The codec module: the JSON encoders and decoders of the storage engines
+orjson or ujson are used when installed, the json module otherwise"""
+from datetime import datetime
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+TIMESTAMPS = ("created_at", "updated_at")
+
+
+def encode_datetime(value):
+    """default hook of the encoders: datetimes are written as isoformat"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError("Object of type {} is not JSON serializable"
+                    .format(type(value).__name__))
+
+
+class JSONCodec:
+    """The json module codec
+    encode() writes a model instance straight from its attributes, with the
+    datetimes done by the encoder, giving the JSON of to_dict().
+    decode() turns the timestamps of a record back into datetimes"""
+    name = "json"
+    buffers = False  # loads() takes memoryviews
+
+    def dumps(self, value):
+        """returns the JSON string of value"""
+        return json.dumps(value, default=encode_datetime)
+
+    def loads(self, data):
+        """returns the value of a JSON str or bytes"""
+        return json.loads(data)
+
+    def record(self, obj):
+        """returns the to_dict() of a model instance, datetimes left as
+        they are for the encoder"""
+        record = obj._attributes()
+        record["__class__"] = type(obj).__name__
+        return record
+
+    def encode(self, obj):
+        """returns the JSON string of the to_dict() of a model instance"""
+        return self.dumps(self.record(obj))
+
+    def decode(self, record):
+        """turns the timestamps of a loaded record into datetimes"""
+        for key in TIMESTAMPS:
+            value = record.get(key)
+            if type(value) is str:
+                record[key] = datetime.fromisoformat(value)
+        return record
+
+
+class OrjsonCodec(JSONCodec):
+    """The orjson codec, datetimes are encoded natively"""
+    name = "orjson"
+    buffers = True
+
+    def dumps(self, value):
+        """returns the JSON string of value"""
+        return orjson.dumps(value, default=encode_datetime,
+                            option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, data):
+        """returns the value of a JSON str or bytes"""
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """The ujson codec"""
+    name = "ujson"
+
+    def dumps(self, value):
+        """returns the JSON string of value"""
+        return ujson.dumps(value, default=encode_datetime,
+                           ensure_ascii=False)
+
+    def loads(self, data):
+        """returns the value of a JSON str or bytes"""
+        return ujson.loads(data)
+
+
+codecs = {"json": JSONCodec, "orjson": OrjsonCodec, "ujson": UjsonCodec}
+available = {"json": True, "orjson": orjson is not None,
+             "ujson": ujson is not None}
+
+
+def get_codec(name="auto"):
+    """returns the codec called name, "auto" picks the fastest installed"""
+    if name == "auto":
+        name = "orjson" if orjson else "ujson" if ujson else "json"
+    if name not in codecs:
+        raise ValueError("unknown codec: {}".format(name))
+    if not available[name]:
+        raise ImportError("{} is not installed".format(name))
+    return codecs[name]()
@@ -0,0 +1,261 @@
+#!/usr/bin/python3
+"""The columns module: a columnar cache of the numeric attributes of the
+objects of a model class, filtered a whole column at a time.
+NumPy arrays are used when numpy is installed, array.array otherwise"""
+from array import array
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+OPERATORS = {"eq": operator.eq, "ne": operator.ne, "lt": operator.lt,
+             "le": operator.le, "gt": operator.gt, "ge": operator.ge}
+LOOKUPS = tuple(OPERATORS) + ("between",)
+EXACT = 2 ** 53  # larger ints are not exact as floats
+NUMBERS = (int, float, bool)
+# the cost of filtering a row by column, checking an object costing 1
+ROW_COST = 0.5 if numpy is None else 0.02
+
+
+def parse(lookup):
+    """splits a lookup such as "price_by_night__le" into its attribute and
+    operator, the operator being eq when there is none"""
+    attr, sep, op = lookup.rpartition("__")
+    if not sep or op not in LOOKUPS:
+        return lookup, "eq"
+    return attr, op
+
+
+def matches(value, op, operand):
+    """tells if value satisfies the operator op with operand, between
+    taking a (low, high) pair, both included"""
+    try:
+        if op == "between":
+            low, high = operand
+            return low <= value <= high
+        return OPERATORS[op](value, operand)
+    except TypeError:
+        return False
+
+
+def is_number(value):
+    """tells if value is stored as is in a column"""
+    return type(value) in NUMBERS and -EXACT <= value <= EXACT  # not NaN
+
+
+def is_operand(op, operand):
+    """tells if the operand of op can be compared to a column"""
+    if op == "between":
+        return type(operand) in (tuple, list) and len(operand) == 2 and \
+            all(map(is_number, operand))
+    return is_number(operand)
+
+
+class ColumnStore:
+    """The __columns__ attributes of the objects of one model class, one
+    float array per attribute. Row i holds the object of keys[i], a
+    deleted object leaves its row empty until the rows are compacted.
+    Objects with a value that is not a number are kept aside in odd and
+    must be checked one by one. Changes are queued by changed() and
+    applied by refresh(), so repeated changes cost one update"""
+
+    def __init__(self, cls):
+        """ColumnStore constructor
+        cls: the model class, giving __columns__ and the defaults"""
+        self.cls = cls
+        self.attrs = tuple(getattr(cls, "__columns__", ()))
+        self.keys = []  # row -> <classname>.id, None if deleted
+        self.rows = {}  # <classname>.id -> row
+        self.odd = set()  # keys with a value that is not a number
+        self.pending = {}  # <classname>.id -> object or None if deleted
+        self.deleted = 0  # number of empty rows
+        if numpy is None:
+            self.columns = {attr: array("d") for attr in self.attrs}
+            self.valid = bytearray()  # 1 for the rows filtered by column
+        else:
+            self.columns = {attr: numpy.zeros(0) for attr in self.attrs}
+            self.valid = numpy.zeros(0, dtype=bool)
+
+    def __len__(self):
+        """the number of rows, empty ones included"""
+        return len(self.keys)
+
+    def changed(self, key, obj):
+        """queues the new values of key: obj, its raw dict, or None if it
+        was deleted"""
+        self.pending[key] = obj
+
+    def read(self, objs, attr):
+        """returns the values of attr of the objects or raw dicts objs"""
+        default = getattr(self.cls, attr, None)
+        return [obj.get(attr, default) if type(obj) is dict
+                else getattr(obj, attr, default) for obj in objs]
+
+    def refresh(self):
+        """applies the queued changes, a column at a time"""
+        pending, self.pending = self.pending, {}
+        keys, objs = [], []
+        for key, obj in pending.items():
+            if obj is None:
+                self.__remove(key)
+            else:
+                keys.append(key)
+                objs.append(obj)
+        if keys:
+            self.__set(keys, objs)
+        if self.deleted > 1024 and self.deleted * 2 > len(self.keys):
+            self.__compact()
+
+    def filter(self, predicates):
+        """returns the keys of the rows matching all the (attribute, op,
+        operand) predicates, in row order, then the odd keys the caller
+        has to check itself"""
+        self.refresh()
+        size = len(self.keys)
+        keys = self.keys
+        if numpy is None:
+            rows = [row for row in range(size) if self.valid[row]]
+            for attr, op, operand in predicates:
+                column = self.columns[attr]
+                if op == "between":
+                    low, high = operand
+                    rows = [row for row in rows
+                            if low <= column[row] <= high]
+                else:
+                    func = OPERATORS[op]
+                    rows = [row for row in rows if func(column[row], operand)]
+            return [keys[row] for row in rows], list(self.odd)
+        mask = self.valid[:size].copy()
+        for attr, op, operand in predicates:
+            column = self.columns[attr][:size]
+            if op == "between":
+                low, high = operand
+                mask &= column >= low
+                mask &= column <= high
+            else:
+                mask &= OPERATORS[op](column, operand)
+        return [keys[row] for row in numpy.flatnonzero(mask).tolist()], \
+            list(self.odd)
+
+    def __set(self, keys, objs):
+        """stores the values of the objects objs of keys"""
+        valid = [True] * len(keys)
+        values = {attr: self.__numbers(self.read(objs, attr), valid)
+                  for attr in self.attrs}
+        odd = self.odd
+        for key, ok in zip(keys, valid):
+            if ok:
+                odd.discard(key)
+            else:
+                odd.add(key)
+        rows = self.rows
+        old = [i for i, key in enumerate(keys) if key in rows]
+        if not old:
+            self.__append(keys, valid, values)
+        elif len(old) == len(keys):
+            self.__update([rows[key] for key in keys], valid, values)
+        else:
+            new = [i for i, key in enumerate(keys) if key not in rows]
+            self.__append([keys[i] for i in new], [valid[i] for i in new],
+                          {attr: self.__take(column, new)
+                           for attr, column in values.items()})
+            self.__update([rows[keys[i]] for i in old],
+                          [valid[i] for i in old],
+                          {attr: self.__take(column, old)
+                           for attr, column in values.items()})
+
+    @staticmethod
+    def __numbers(column, valid):
+        """returns the list of values column as stored: a value that is
+        not a number is stored as 0 and its row flagged not valid"""
+        if not set(map(type, column)).issubset(NUMBERS):
+            for i, value in enumerate(column):
+                if type(value) not in NUMBERS:
+                    valid[i] = False
+                    column[i] = 0
+        if numpy is None:
+            bad = [i for i, value in enumerate(column)
+                   if not -EXACT <= value <= EXACT]  # NaN too
+        else:
+            column = numpy.array(column, dtype=float)
+            bad = numpy.flatnonzero(~(numpy.abs(column) <= EXACT)).tolist()
+        for i in bad:
+            valid[i] = False
+            column[i] = 0
+        return column
+
+    @staticmethod
+    def __take(column, indexes):
+        """returns the values of column at indexes"""
+        if numpy is None:
+            return [column[i] for i in indexes]
+        return column[indexes]
+
+    def __append(self, keys, valid, values):
+        """adds a row for each key, with its valid flag and its values by
+        attribute"""
+        start = len(self.keys)
+        self.rows.update(zip(keys, range(start, start + len(keys))))
+        self.keys.extend(keys)
+        if numpy is None:
+            self.valid.extend(valid)
+            for attr, column in values.items():
+                self.columns[attr].extend(column)
+            return
+        size = len(self.keys)
+        if size > len(self.valid):
+            capacity = max(size, 2 * len(self.valid), 1024)
+            self.valid = self.__grow(self.valid, start, capacity)
+            for attr in self.attrs:
+                self.columns[attr] = self.__grow(self.columns[attr], start,
+                                                 capacity)
+        self.valid[start:size] = valid
+        for attr, column in values.items():
+            self.columns[attr][start:size] = column
+
+    def __update(self, rows, valid, values):
+        """sets the valid flags and the values by attribute of rows"""
+        if numpy is None:
+            for i, row in enumerate(rows):
+                self.valid[row] = valid[i]
+                for attr, column in values.items():
+                    self.columns[attr][row] = column[i]
+            return
+        self.valid[rows] = valid
+        for attr, column in values.items():
+            self.columns[attr][rows] = column
+
+    @staticmethod
+    def __grow(column, size, capacity):
+        """returns column, whose first size items are used, resized to
+        capacity"""
+        grown = numpy.zeros(capacity, dtype=column.dtype)
+        grown[:size] = column[:size]
+        return grown
+
+    def __remove(self, key):
+        """empties the row of key"""
+        self.odd.discard(key)
+        row = self.rows.pop(key, None)
+        if row is not None:
+            self.keys[row] = None
+            self.valid[row] = False
+            self.deleted += 1
+
+    def __compact(self):
+        """drops the empty rows"""
+        live = [row for row, key in enumerate(self.keys) if key is not None]
+        self.keys = [self.keys[row] for row in live]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.deleted = 0
+        if numpy is None:
+            self.valid = bytearray(self.valid[row] for row in live)
+            for attr in self.attrs:
+                column = self.columns[attr]
+                self.columns[attr] = array("d", (column[row] for row in live))
+            return
+        self.valid = self.valid[live]
+        for attr in self.attrs:
+            self.columns[attr] = self.columns[attr][live]
@@ -0,0 +1,539 @@
+#!/usr/bin/python3
+"""DBStorage module: a SQLite storage engine"""
+import heapq
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.compact import compact as compact_class
+from models.engine.aio import CHUNK, paced
+from models.engine.codec import get_codec
+from models.engine.columns import matches, parse
+from models.engine.lazy import LazyObjects
+from models.engine.query import Plan, describe
+from models.engine.search import TextIndex
+from models.engine.spatial import distance, is_location
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
+           "Place": Place, "Review": Review, "State": State, "User": User}
+
+
+class DBStorage:
+    """The DBStorage class
+    Every model class has its own table holding the id, the timestamps,
+    one indexed column per attribute of the class' __indexes__ and the
+    whole to_dict() as JSON. Objects are kept in memory by <classname>.id
+    like FileStorage does, but a save only writes the changed objects, in
+    a single transaction
+    Inside a batch (begin/commit or the batch() context manager) saves
+    go to one open transaction, committed by the last commit
+    In compact mode the loaded objects are the slotted variants of their
+    classes from models.compact
+    search() indexes the words of the __search__ attributes in
+    <path>.search, kept up to date by every save once it exists
+    query() looks up the indexed columns when it can, plan() tells
+    asave() and aiter() serve asyncio code, saving on the loop's thread"""
+
+    def __init__(self, path="hbnb.db", codec="auto", compact=False):
+        """DBStorage constructor
+        path: the SQLite database file
+        codec: name of the JSON codec, "auto" for the fastest installed
+        compact: build the loaded objects as slotted variants"""
+        self.__codec = get_codec(codec)
+        self.__compact = compact
+        self.__db = sqlite3.connect(path)
+        self.__objects = {}  # will store all objects by <classname>.id
+        self.__dirty = {}  # keys changed since last save: obj, or None
+        self.__batch = 0  # depth of the nested batches
+        self.__written = set()  # keys written by the open batch
+        self.__savepoints = []  # per nested batch, the keys it wrote
+        self.__text = None  # the TextIndex, loaded or built by search()
+        self.__text_path = path + ".search"
+        self.__version = None  # the data_version of the loaded objects
+        for name, cls in classes.items():
+            columns = "".join(", {} TEXT".format(col) for col in
+                              getattr(cls, "__indexes__", ()))
+            self.__db.execute(
+                "CREATE TABLE IF NOT EXISTS {} (id TEXT PRIMARY KEY, "
+                "created_at TEXT, updated_at TEXT{}, data TEXT NOT NULL)"
+                .format(name, columns))
+            for col in getattr(cls, "__indexes__", ()):
+                self.__db.execute(
+                    "CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})"
+                    .format(name, col))
+        self.__db.commit()
+
+    def reload(self):
+        """loads every row of the database in __objects. The model
+        instances are only created when their objects are looked up"""
+        records = {}
+        for name in classes:
+            for data, in self.__db.execute("SELECT data FROM " + name):
+                record = self.__codec.loads(data)
+                records["{}.{}".format(name, record["id"])] = record
+        objects = LazyObjects(self.__objects, self.__build)
+        dict.update(objects, records)
+        self.__objects = objects
+        self.__version = self.__data_version()
+        if self.__text is not None or os.path.isfile(self.__text_path):
+            self.__text = None
+            self.__text_index()
+
+    def sync(self):
+        """reads all the objects again if another process committed to
+        the database since they were loaded, after writing the changes
+        made here. Returns the number of objects read"""
+        if self.__batch or self.__data_version() == self.__version:
+            return 0
+        self.save()
+        self.__objects = {}
+        self.reload()
+        return len(self.__objects)
+
+    def save(self, obj=None):
+        """writes the changed objects to the database
+        obj: the object that changed, if not already known. A stale
+        reference to a deleted object does not bring it back"""
+        if obj is not None:
+            self.touch(obj)
+        if not self.__dirty:
+            return
+        if self.__batch:
+            self.__flush()
+            return
+        with self.__db:  # one transaction, rolled back on error
+            self.__flush()
+        if self.__text is not None:
+            self.__text.save()
+
+    async def asave(self, obj=None):
+        """save() for asyncio code, run on the loop's thread: the
+        connection may only be used by the thread that opened it, and a
+        save only writes the changed rows"""
+        self.save(obj)
+
+    @property
+    def batching(self):
+        """tells if a batch was started and not yet committed"""
+        return self.__batch > 0
+
+    def begin(self):
+        """starts a batch: saves are kept in one transaction until the
+        matching commit. Batches may be nested, a nested batch starting
+        at a savepoint of the transaction"""
+        if not self.__batch and self.__dirty:
+            self.save()  # a rollback only drops the batch's own changes
+        if self.__batch:
+            self.__flush()  # the savepoint holds the outer changes
+            self.__db.execute("SAVEPOINT batch{}".format(self.__batch))
+            self.__savepoints.append(set())
+        self.__batch += 1
+
+    def commit(self):
+        """ends a batch, committing all its changes if outermost.
+        If committing fails the batch is rolled back"""
+        self.__batch = max(self.__batch - 1, 0)
+        if self.__batch:
+            self.__db.execute("RELEASE batch{}".format(self.__batch))
+            written = self.__savepoints.pop()
+            if self.__savepoints:
+                self.__savepoints[-1].update(written)
+            return
+        try:
+            with self.__db:
+                self.__flush()
+        except BaseException:
+            self.rollback()
+            raise
+        self.__written.clear()
+        if self.__text is not None:
+            self.__text.save()
+
+    def rollback(self):
+        """ends the innermost batch, dropping its changes: every object it
+        changed is put back, in place, as it was when the batch began. The
+        outer batches go on. Out of a nested batch every changed object is
+        put back as it was last committed"""
+        if self.__batch > 1:
+            self.__batch -= 1
+            self.__db.execute("ROLLBACK TO batch{}".format(self.__batch))
+            self.__db.execute("RELEASE batch{}".format(self.__batch))
+            keys = self.__savepoints.pop().union(self.__dirty)
+            self.__dirty.clear()
+            self.__reread(keys)
+            return
+        self.__batch = 0
+        self.__db.rollback()
+        self.__reread(self.__written.union(self.__dirty))
+        self.__written.clear()
+        self.__dirty.clear()
+
+    def __reread(self, keys):
+        """puts the objects of keys back, in place, as their rows are"""
+        for key in keys:
+            name, id_ = key.split(".", 1)
+            row = self.__db.execute(
+                "SELECT data FROM {} WHERE id = ?".format(name),
+                (id_,)).fetchone()
+            current = self.__objects.pop(key, None)
+            if row is None:
+                self.__changed(key, None)
+                continue
+            obj = self.__build(self.__codec.loads(row[0]))
+            if current is not None:
+                for name in current._attributes():
+                    delattr(current, name)  # not stored: nothing to touch
+                for name, value in obj._attributes().items():
+                    setattr(current, name, value)
+                obj = current
+            self.__objects[key] = obj
+            self.__changed(key, obj)
+
+    @contextmanager
+    def batch(self):
+        """context manager running its block as a batch: the changes are
+        committed once at the end, or dropped if the block raises"""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def new(self, obj):
+        """sets in __objects the obj with key <obj class name>.id"""
+        key = self.__key(obj)
+        self.__objects[key] = obj
+        self.__dirty[key] = obj
+        self.__changed(key, obj)
+
+    def touch(self, obj):
+        """marks obj as changed, if stored, so the next save writes it"""
+        key = "{}.{}".format(type(obj).__name__, getattr(obj, "id", None))
+        if self.__stored(key, obj):
+            self.__dirty[key] = obj
+            self.__changed(key, obj)
+
+    def delete(self, obj):
+        """removes obj from __objects, the change is kept until next save"""
+        key = self.__key(obj)
+        if self.__objects.pop(key, None) is not None:
+            self.__dirty[key] = None
+            self.__changed(key, None)
+
+    def all(self, cls=None):
+        """Returns the objects by <classname>.id
+        cls: a class or class name, only its objects are returned then"""
+        if cls is None:
+            return self.__objects
+        name = self.__table(cls)
+        if name is None:
+            return {}
+        rows = self.__db.execute("SELECT id FROM " + name)
+        return {key: self.__objects[key]
+                for key in self.__overlay(name, rows)}
+
+    def get(self, cls, id):
+        """Returns the object of class cls, or class name, and id, None if
+        it is not stored"""
+        name = self.__table(cls)
+        if name is None:
+            return None
+        return self.__objects.get("{}.{}".format(name, id))
+
+    def stream(self, cls=None, after=None):
+        """Returns an iterator over the objects, of class cls only if
+        given, by class then id, starting after the key after if given:
+        the cursor of the last object of a page, which may have been
+        deleted since. The ids are read from the database as they go and
+        the objects not built yet are built for the caller only"""
+        names = sorted(classes)
+        if cls is not None:
+            names = [name for name in names if name == self.__table(cls)]
+        first = ""
+        if after is not None:
+            name, first = after.split(".", 1)
+            names = [other for other in names if other >= name]
+            if name not in names:
+                first = ""
+        return self.__stream(names, first)
+
+    def aiter(self, cls=None, after=None, chunk=CHUNK):
+        """Returns an async iterator over the objects as stream() does,
+        giving the event loop back every chunk objects"""
+        return paced(self.stream(cls, after), chunk)
+
+    def count(self, cls=None):
+        """Returns the number of objects, of class cls only if given"""
+        if cls is None:
+            return len(self.__objects)
+        name = self.__table(cls)
+        if name is None:
+            return 0
+        prefix = name + "."
+        if any(key.startswith(prefix) for key in self.__dirty):
+            return len(self.all(name))
+        return self.__db.execute("SELECT COUNT(*) FROM " + name).fetchone()[0]
+
+    def find(self, cls, **attrs):
+        """Returns the list of objects of cls whose attributes equal attrs
+        e.g find(Review, place_id=place.id). Indexed attributes are
+        looked up in the database"""
+        name = self.__table(cls)
+        if name is None:
+            return []
+        indexed = [attr for attr in attrs
+                   if attr in getattr(classes[name], "__indexes__", ())]
+        query = "SELECT id FROM " + name
+        if indexed:
+            query += " WHERE " + " AND ".join(
+                "{} = ?".format(attr) for attr in indexed)
+        params = [self.__column(attrs[attr]) for attr in indexed]
+        objs = [self.__objects[key] for key in self.__overlay(
+            name, self.__db.execute(query, params))]
+        return [obj for obj in objs
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in attrs.items())]
+
+    def filter(self, cls, **lookups):
+        """Returns the list of objects of cls matching all the lookups,
+        as FileStorage.filter() takes them. The attributes compared for
+        equality are looked up by find()"""
+        predicates = [parse(lookup) + (value,)
+                      for lookup, value in lookups.items()]
+        equal = {attr: operand for attr, op, operand in predicates
+                 if op == "eq"}
+        return [obj for obj in self.find(cls, **equal)
+                if all(matches(getattr(obj, attr, None), op, operand)
+                       for attr, op, operand in predicates)]
+
+    def query(self, cls, where=(), order_by=(), limit=None):
+        """Returns the list of objects of cls matching the where
+        predicates, sorted by order_by, as FileStorage.query() does"""
+        return self.plan(cls, where, order_by, limit).run()
+
+    def plan(self, cls, where=(), order_by=(), limit=None):
+        """Returns the Plan of query(). The equalities on attributes of
+        __indexes__ are looked up in the database, whose own plan is shown
+        by explain(), the objects of cls are scanned otherwise. The
+        objects fetched are checked against every predicate, the indexed
+        columns holding the values as text"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        where = list(where)
+        if self.__table(name) is None:
+            return Plan(name, [(0, "unknown class", list, [])])
+        total = self.count(name)
+        paths = []
+        indexes = getattr(classes[name], "__indexes__", ())
+        indexed = [pred for pred in where
+                   if pred[1] == "eq" and pred[0] in indexes]
+        if indexed:
+            sql = " FROM {} WHERE {}".format(name, " AND ".join(
+                "{} = ?".format(attr) for attr, op, operand in indexed))
+            params = [self.__column(operand)
+                      for attr, op, operand in indexed]
+            found = self.__db.execute("SELECT COUNT(*)" + sql,
+                                      params).fetchone()[0]
+            steps = "; ".join(row[-1] for row in self.__db.execute(
+                "EXPLAIN QUERY PLAN SELECT id" + sql, params))
+            paths.append((found, "index lookup of {} ({})".format(
+                describe(indexed), steps),
+                lambda: [self.__objects[key] for key in self.__overlay(
+                    name, self.__db.execute("SELECT id" + sql, params))],
+                where))
+        paths.append((total, "scan of {} objects".format(total),
+                      lambda: list(self.all(name).values()), where))
+        return Plan(name, paths, order_by, limit)
+
+    def near(self, cls, lat, lon, km):
+        """Returns the list of objects of cls within km kilometers of the
+        point lat, lon, closest first, as FileStorage.near() does"""
+        return [obj for dist, obj in self.__distances(cls, lat, lon)
+                if dist <= km]
+
+    def nearest(self, cls, lat, lon, count=1):
+        """Returns the list of the count objects of cls closest to the
+        point lat, lon, closest first"""
+        return [obj for dist, obj in self.__distances(cls, lat, lon)][:count]
+
+    def search(self, cls, query, limit=None):
+        """Returns the list of objects of cls, of every class if None,
+        whose __search__ attributes hold words of query, best match first,
+        as FileStorage.search() does"""
+        name = cls if cls is None or isinstance(cls, str) else cls.__name__
+        keys = self.__text_index().search(name, query, limit)
+        return [self.__objects[key] for key in keys]
+
+    def save_changes(self, obj):
+        """when deletion/update is made, updates __objects and database"""
+        self.__objects = obj
+        self.__dirty.clear()
+        if self.__text is not None:
+            self.__text.retain(obj)
+            for key, value in obj.items():
+                self.__text.changed(key, value)
+        with self.__db:
+            for name in classes:
+                self.__db.execute("DELETE FROM " + name)
+            for value in obj.values():
+                self.__write(value)
+
+    def close(self):
+        """closes the database connection"""
+        self.__db.close()
+
+    def __flush(self):
+        """writes the changed objects in the current transaction"""
+        for key, value in self.__dirty.items():
+            name, id_ = key.split(".", 1)
+            if value is None:
+                self.__db.execute(
+                    "DELETE FROM {} WHERE id = ?".format(name), (id_,))
+            else:
+                self.__write(value)
+        if self.__batch:
+            self.__written.update(self.__dirty)
+        if self.__savepoints:
+            self.__savepoints[-1].update(self.__dirty)
+        self.__dirty.clear()
+
+    def __overlay(self, name, rows):
+        """the keys of the (id,) rows read from the table name, brought up
+        to date with the changes not saved yet: the destroyed objects are
+        left out and the changed ones of the table added, so reads never
+        need to save first"""
+        dirty, prefix = self.__dirty, name + "."
+        keys = {}
+        for id_, in rows:
+            key = prefix + id_
+            if dirty.get(key, True) is not None:
+                keys[key] = None
+        for key, obj in dirty.items():
+            if obj is not None and key.startswith(prefix):
+                keys[key] = None
+        return keys
+
+    def __stream(self, names, first):
+        """yields the objects of the tables names, by table then id, those
+        of the first table having an id greater than first. The objects
+        not saved yet are merged in by id"""
+        for name in names:
+            prefix = name + "."
+            unsaved = sorted(key[len(prefix):]
+                             for key, obj in self.__dirty.items()
+                             if obj is not None and key.startswith(prefix)
+                             and key[len(prefix):] > first)
+            rows = (id_ for id_, in self.__db.execute(
+                "SELECT id FROM {} WHERE id > ? ORDER BY id".format(name),
+                (first,)))
+            last = None
+            for id_ in heapq.merge(rows, unsaved):
+                if id_ == last:  # changed since saved
+                    continue
+                last = id_
+                key = prefix + id_
+                if self.__dirty.get(key, True) is None:
+                    continue  # destroyed, not saved yet
+                obj = dict.__getitem__(self.__objects, key)
+                if type(obj) is dict:
+                    obj = self.__build(obj)
+                yield obj
+            first = ""
+
+    def __stored(self, key, obj):
+        """tells if obj is the stored object of key. An object stream()
+        built for its caller replaces the raw record it was built from, so
+        its changes are kept"""
+        stored = dict.get(self.__objects, key)
+        if stored is obj:
+            return True
+        if type(stored) is dict and type(obj) is not dict:
+            dict.__setitem__(self.__objects, key, obj)
+            return True
+        return False
+
+    def __changed(self, key, obj):
+        """queues the change of key, to obj or None, for the text index"""
+        if self.__text is not None:
+            self.__text.changed(key, obj)
+
+    def __text_index(self):
+        """the TextIndex, loaded from <path>.search then brought up to
+        date with the objects, the first time"""
+        if self.__text is None:
+            text = TextIndex(self.__text_path, classes, self.__codec)
+            text.load()
+            for key, obj in dict.items(self.__objects):
+                text.changed(key, obj)
+            text.retain(self.__objects)
+            self.__text = text
+        return self.__text
+
+    def __distances(self, cls, lat, lon):
+        """the sorted (distance, object) of the objects of cls given a
+        location, the defaults of the class not being one"""
+        name = self.__table(cls)
+        if name is None:
+            return []
+        attrs = getattr(classes[name], "__location__", None)
+        if not attrs:
+            raise ValueError("{} has no __location__".format(name))
+        found = []
+        for obj in self.all(name).values():
+            given = obj._attributes()
+            point = [given.get(attr) for attr in attrs]
+            if is_location(*point):
+                found.append((distance(lat, lon, *point), obj))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def __write(self, obj):
+        """inserts or replaces the row of obj"""
+        record = self.__codec.record(obj)
+        cols = ("id", "created_at", "updated_at") + \
+            getattr(type(obj), "__indexes__", ())
+        values = [self.__column(record.get(col, getattr(obj, col, None)))
+                  for col in cols]
+        self.__db.execute(
+            "INSERT OR REPLACE INTO {} ({}, data) VALUES ({}?)".format(
+                type(obj).__name__, ", ".join(cols), "?, " * len(cols)),
+            values + [self.__codec.dumps(record)])
+
+    def __column(self, value):
+        """the value stored in an indexed column"""
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return self.__codec.dumps(value)
+
+    def __data_version(self):
+        """the version of the database, changed by the commits of the
+        other connections"""
+        return self.__db.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def __table(cls):
+        """the table name of a class or class name, None if unknown"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        return name if name in classes else None
+
+    def __build(self, record):
+        """creates the model instance of a row's data"""
+        cls = classes[record['__class__']]
+        if self.__compact:
+            cls = compact_class(cls)
+        return cls(**record)
+
+    @staticmethod
+    def __key(obj):
+        """the <obj class name>.id key of obj"""
+        return "{}.{}".format(obj.__class__.__name__, obj.id)
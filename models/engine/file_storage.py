@@ -1,59 +1,1038 @@
 #!/usr/bin/env python3
 """FileStorage module"""
-import json
+import atexit
+import copy
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.compact import compact as compact_class
+from models.engine.aio import CHUNK, Coalescer, paced
+from models.engine.atomic import atomic_open
+from models.engine.checkpoint import Checkpointer
+from models.engine.codec import get_codec
+from models.engine.columns import ROW_COST, ColumnStore, is_operand, \
+    matches, parse
+from models.engine.indexes import HashIndex
+from models.engine.journal import Journal
+from models.engine.lazy import LazyObjects
+from models.engine.locking import ConflictError, StoreLock
+from models.engine.query import Plan, describe
+from models.engine.search import TextIndex
+from models.engine.snapshot import Snapshot, write_snapshot
+from models.engine.spatial import GridIndex
+from models.engine.streaming import iter_json_lines
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from pathlib import Path
+from types import MappingProxyType
+import os
+
+classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
+           "Place": Place, "Review": Review, "State": State, "User": User}
+extensions = {"json": ".json", "jsonl": ".jsonl", "snapshot": ".snap"}
 
 
 class FileStorage:
-    """The FileStorage class"""
+    """The FileStorage class: the objects kept in memory by their
+    <classname>.id key and saved to file.json, or in the format, journal
+    and shards given to the constructor. Its options are described in
+    README.md, the methods tell how they use them"""
     __file_path = "file.json"  # path to the json file
     __objects = {}  # will store all objects by <classname>.id as key
+    __dirty = {}  # keys changed since last save: the obj, None if destroyed
+    __by_class = {}  # class name -> {<classname>.id: None}, ordered keys
+    __by_attr = {}  # class name -> {attribute: HashIndex}
+    __columns = {}  # class name -> ColumnStore, built by filter()
+    __grids = {}  # class name -> GridIndex, built by near()
+    __text = None  # the TextIndex, loaded by reload() or built by search()
+    __indexed = None  # the __objects dict the indexes were built from
+    __batch = 0  # depth of the nested batches
+    __savepoints = []  # per nested batch, the {key: record or None} changed
+    __lock = threading.RLock()  # held while writing to disk
+    __state = threading.RLock()  # held while using the objects and indexes
+    __view = None  # (__objects, its copy) returned by all() in threadsafe
+    __encoded = {}  # <classname>.id -> (obj, its JSON)
+    __pending = None  # (__objects, Snapshot) mapped by reload(), not read
+
+    def __init__(self, journal=False, compact_after=10000, lazy=False,
+                 checkpoint=None, codec="auto", file_format="json",
+                 compact=False, shards=0, shared=False,
+                 threadsafe=False):
+        """FileStorage constructor
+        journal: append changes to the journal instead of rewriting the file
+        compact_after: number of journal records that triggers compact()
+        lazy: create the reloaded objects only when they are looked up
+        checkpoint: seconds between background writes, None to write on
+        every save
+        codec: name of the JSON codec, "auto" for the fastest installed
+        file_format: "json" for file.json, "jsonl" for file.jsonl,
+        "snapshot" for file.snap
+        compact: build the reloaded objects as slotted variants
+        shards: 0 for a single file, 1 for a file per class, more for as
+        many files per class, the objects spread by a hash of their keys
+        shared: lock the files, other processes using them too
+        threadsafe: return copies from all() and stream(), for the objects
+        to be iterated while other threads change them"""
+        if file_format not in extensions:
+            raise ValueError("unknown file format: {}".format(file_format))
+        if type(shards) is not int or shards < 0:
+            raise ValueError("invalid number of shards: {}".format(shards))
+        self.__format = file_format
+        self.__path = os.path.splitext(self.__file_path)[0] + \
+            extensions[file_format]
+        self.__codec = get_codec(codec)
+        self.__journal = Journal(self.__file_path + ".journal", self.__codec)
+        self.__journaling = journal
+        self.__compact_after = compact_after
+        self.__lazy = lazy
+        self.__compact = compact
+        self.__shards = shards
+        self.__rewrite = False  # shards of another layout are to be replaced
+        self.__buckets = {}  # <classname>.id -> its bucket, once hashed
+        self.__shared = StoreLock(self.__file_path) if shared else None
+        self.__generation = 0  # of the files when last read or written
+        self.__conflicts = set()  # keys changed here and by another process
+        self.__threadsafe = threadsafe
+        self.__saver = Coalescer(self.flush)
+        self.__checkpointer = None
+        if checkpoint is not None:
+            self.__checkpointer = Checkpointer(self.flush, checkpoint)
+            self.__checkpointer.start()
+            atexit.register(self.close)
 
     def reload(self):
         """deserializes the JSON file to __objects (only if the JSON file
-        (__file_path) exists ;"""
-        temp = {}
-        if not Path(self.__file_path).is_file():
+        (__file_path) exists ; then replays the journal on top of it"""
+        if self.__shared is not None:
+            with self.__lock, self.__shared.hold(exclusive=False) \
+                    as generation, self.__state:
+                self.__reload()
+                self.__generation = generation
+        else:
+            with self.__state:
+                self.__reload()
+
+    def sync(self):
+        """in shared mode, reads again the objects other processes wrote
+        since this one last read or wrote the files, keeping the objects
+        changed here. Returns the number of objects read"""
+        if self.__shared is None:
+            return 0
+        with self.__lock, self.__shared.hold(exclusive=False) \
+                as generation, self.__state:
+            if generation == self.__generation:
+                return 0
+            return len(self.__merge(generation))
+
+    def __reload(self):
+        """reads the files into __objects"""
+        if self.__lazy and not isinstance(self.__objects, LazyObjects):
+            FileStorage.__objects = LazyObjects(self.__objects, self.__build)
+        if self.__format == "snapshot" and not self.__shards and \
+                Path(self.__path).is_file():
+            if self.__pending is not None:  # mapped by the last reload
+                self.__pending[1].close()
+            FileStorage.__pending = (self.__objects,
+                                     Snapshot(self.__path, self.__codec))
+            return
+        self.__load()
+
+    def get(self, cls, id):
+        """Returns the object of class cls, or class name, and id, None if
+        it is not stored. Only this object is read from a snapshot
+        mapped by reload()"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(name, id)
+        with self.__state:
+            obj = self.__objects.get(key)
+            pending = self.__pending
+            if obj is not None or pending is None or \
+                    pending[0] is not self.__objects:
+                return obj
+            changes = dict(self.__journal.replay())
+            record = changes[key] if key in changes else pending[1].get(key)
+            if record is None:
+                return None
+            obj = self.__build(self.__codec.decode(record))
+            dict.__setitem__(self.__objects, key, obj)
+            FileStorage.__view = None
+            return obj
+
+    def __load(self, keep=False):
+        """reads the saved objects into __objects, keeping those already
+        there if keep"""
+        self.__classes()
+        for key, obj in self.__records():
+            if keep and dict.__contains__(self.__objects, key):
+                continue
+            if not self.__lazy:
+                obj = self.__build(self.__codec.decode(obj))
+            dict.__setitem__(self.__objects, key, obj)
+            self.__index(key, obj)
+        FileStorage.__view = None
+        self.__text_index()
+
+    def __materialize(self):
+        """reads the whole snapshot mapped by reload(), if not done yet,
+        the objects read by get() being kept"""
+        pending = self.__pending
+        if pending is None:
+            return
+        FileStorage.__pending = None
+        pending[1].close()
+        if pending[0] is self.__objects:
+            self.__load(keep=True)
+
+    def save(self, obj=None):
+        """serializes __objects to the JSON file (path: __file_path)
+        obj: the object that changed. In journal mode only the changed
+        objects are appended to the journal. With a checkpoint interval
+        the write is left to the background thread"""
+        if obj is not None:
+            self.__mark(obj)
+        if self.__batch:
+            return
+        if self.__checkpointer is None:
+            self.flush()
+            return
+        error, self.__checkpointer.error = self.__checkpointer.error, None
+        self.__checkpointer.request()
+        if error is not None:  # the last background write failed
+            raise error
+
+    async def asave(self, obj=None):
+        """save() for asyncio code: the changes are encoded and written by
+        an executor thread while the event loop goes on. The saves asked
+        for while a write runs are all done by the next one"""
+        if obj is not None:
+            self.__mark(obj)
+        if self.__batch:
+            return
+        if self.__checkpointer is not None:
+            self.save()  # only asks the background thread
             return
-        with open(self.__file_path, "r") as fil:
-            temp = json.load(fil)
-        for key, obj in temp.items():
-            self.__objects[key] = globals()[obj['__class__']](**obj)
+        await self.__saver.save()
+
+    def __mark(self, obj):
+        """marks obj as changed for the next write, if stored: a stale
+        reference to a deleted object does not bring it back"""
+        key = self.__key(obj)
+        with self.__state:
+            if self.__stored(key, obj):
+                self.__dirty[key] = obj
+                self.__classes()
+                self.__index(key, obj)  # its indexed attributes may differ
+
+    def flush(self):
+        """writes the changes now: appends them to the journal in journal
+        mode, rewrites the JSON file otherwise"""
+        with self.__lock, self.__hold():
+            if not self.__journaling:
+                self.__write(changed_only=True)
+                self.__save_text()
+                return
+            with self.__state:
+                dirty = self.__take_dirty()
+            try:
+                changes = []
+                for key, value in dirty:  # encoded while readers go on
+                    self.__encoded.pop(key, None)  # compact() encodes it
+                    if value is not None:
+                        value = self.__codec.record(value)
+                    changes.append((key, value))
+                self.__journal.append(changes)
+            except BaseException:
+                self.__give_back(dirty)
+                raise
+            if self.__journal.records >= self.__compact_after:
+                self.compact()
+            self.__save_text()
+
+    def __save_text(self):
+        """writes the changes of the text index. They are taken under the
+        lock of the state but written once it is released, search() only
+        waiting for their tokenizing"""
+        with self.__state:
+            text = self.__text
+            changes = None if text is None else text.take()
+        if changes is not None:
+            text.write(changes)
+
+    def compact(self):
+        """writes all of __objects to the JSON file and empties the journal.
+        Objects unchanged since the last write reuse their JSON"""
+        with self.__lock, self.__hold():
+            self.__write()
 
-    def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        fil = Path(self.__file_path)
-        if fil.is_dir() or (not fil.parent.exists()):
-            # print("File Path: {}".format(self.__file_path))
+    @contextmanager
+    def __hold(self):
+        """in shared mode, holds the lock for a write, reading first the
+        objects other processes wrote. Raises ConflictError once written
+        if some of them were changed here too"""
+        if self.__shared is None or self.__shared.held:
+            yield
             return
+        with self.__shared.hold() as generation:
+            with self.__state:
+                if generation != self.__generation:
+                    self.__merge(generation)
+                conflicts = self.__conflicts.intersection(self.__dirty)
+                self.__conflicts.clear()
+                if conflicts:  # theirs are kept
+                    self.__restore(conflicts, dict(self.__records()))
+                    for key in conflicts:
+                        del self.__dirty[key]
+            yield
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def __merge(self, generation):
+        """reads again the objects other processes wrote since the last
+        generation read, up to generation, but those changed here, which
+        are conflicts. Returns the keys read"""
+        keys = self.__shared.changed_since(self.__generation)
+        saved = dict(self.__records())
+        if keys is None:  # too old: any object may have changed
+            keys = set(saved).union(dict.keys(self.__objects))
+        self.__conflicts.update(keys.intersection(self.__dirty))
+        keys = keys.difference(self.__dirty)
+        self.__restore(keys, saved)
+        self.__generation = generation
+        return keys
+
+    def __write(self, changed_only=False):
+        """writes the objects, only the shards holding changed objects if
+        changed_only, and empties the journal. The objects are only
+        encoded and written once the lock of their state is released"""
+        with self.__lock:
+            with self.__state:
+                if changed_only and not self.__dirty and \
+                        self.__pending is not None:
+                    return  # the mapped snapshot is the saved store
+                self.__materialize()
+                # changes made from now on stay dirty for the next write
+                dirty = dict(self.__take_dirty())
+                if not self.__shards:
+                    groups, stale, encoded = \
+                        {self.__path: dict.copy(self.__objects)}, (), {}
+                else:
+                    groups, stale, encoded = self.__shard_groups(
+                        dirty, changed_only)
+            try:
+                for path, objs in groups.items():
+                    self.__dump(path, objs, dirty, encoded)
+                for path in stale:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            except BaseException:
+                self.__give_back(dirty.items())
+                raise
+            FileStorage.__encoded = encoded
+            self.__journal.truncate()
+
+    def __shard_groups(self, dirty, changed_only):
+        """the {path: {key: obj}} of the shards holding the dirty keys,
+        every shard unless changed_only, the paths of the files to remove,
+        the shards left empty and those of a layout read and replaced, and
+        the dict of (obj, JSON) the write is to fill"""
+        replaced = set()
+        if self.__rewrite:  # written in another layout: replace it all
+            changed_only, self.__rewrite = False, False
+            replaced.add(self.__path)  # the single file, if it was read
+        by_class = self.__classes()
+        wanted = {self.__shard(key) for key in dirty} if changed_only \
+            else None
+        names = by_class if wanted is None \
+            else {name for name, bucket in wanted}
+        groups = {shard: {} for shard in wanted or ()}
+        objects, buckets = self.__objects, self.__buckets
+        for name in names:
+            keys = by_class.get(name, {})
+            if self.__shards < 2:  # the class is the shard
+                groups[(name, None)] = {key: dict.__getitem__(objects, key)
+                                        for key in keys}
+                continue
+            for key in keys:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = self.__shard(key)[1]
+                if wanted is None or (name, bucket) in wanted:
+                    groups.setdefault((name, bucket), {})[key] = \
+                        dict.__getitem__(objects, key)
+        for key, obj in dirty.items():
+            if obj is None:
+                buckets.pop(key, None)
+        if wanted is None:
+            encoded = {}
+            stale = replaced.union(self.__shard_files()).difference(
+                map(self.__shard_path, groups))
+        else:
+            encoded = self.__encoded
+            for key, obj in dirty.items():
+                if obj is None:
+                    encoded.pop(key, None)
+            stale = set()
+        paths = {}
+        for shard, keys in groups.items():
+            if keys:
+                paths[self.__shard_path(shard)] = keys
+            else:
+                stale.add(self.__shard_path(shard))
+        return paths, stale, encoded
+
+    def __dump(self, path, objs, dirty, encoded):
+        """writes the {key: obj} objs to the file path, adding the
+        (obj, JSON) of each to encoded, which it returns. The JSON of the
+        objects not in dirty is reused from the last write"""
+        codec, cache = self.__codec, self.__encoded
+        entries = []
+        for key, obj in objs.items():
+            entry = cache.get(key)
+            if entry is None or entry[0] is not obj or key in dirty:
+                if type(obj) is dict:
+                    entry = (obj, codec.dumps(obj))
+                else:
+                    entry = (obj, codec.encode(obj))
+            encoded[key] = entry
+            entries.append((key, entry[1]))
+        if self.__format == "snapshot":
+            with atomic_open(path, "wb") as fil:
+                write_snapshot(fil, entries)
+            return encoded
+        with atomic_open(path) as fil:
+            if self.__format == "jsonl":
+                for key, data in entries:
+                    fil.write(data + "\n")
+            else:
+                fil.write("{")
+                fil.write(", ".join("{}: {}".format(codec.dumps(key), data)
+                                    for key, data in entries))
+                fil.write("}")
+        return encoded
+
+    def __shard(self, key):
+        """the (class name, bucket) shard of the file holding key"""
+        name = key.partition(".")[0]
+        if self.__shards < 2:
+            return name, None
+        return name, zlib.crc32(key.encode()) % self.__shards
+
+    def __shard_path(self, shard):
+        """the path of the file of shard"""
+        stem, ext = os.path.splitext(self.__path)
+        name, bucket = shard
+        if bucket is None:
+            return "{}.{}{}".format(stem, name, ext)
+        return "{}.{}.{}{}".format(stem, name, bucket, ext)
+
+    def __shard_files(self):
+        """the {path: shard} of the shard files found next to __path, the
+        shard being None for the files of another layout"""
+        directory, base = os.path.split(os.path.abspath(self.__path))
+        stem, ext = os.path.splitext(base)
+        pattern = re.compile(r"{}\.(\w+?)(?:\.(\d+))?{}$".format(
+            re.escape(stem), re.escape(ext)))
+        files = {}
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return files
+        for file_name in names:
+            mat = pattern.match(file_name)
+            if mat is None:
+                continue
+            name, bucket = mat.group(1), mat.group(2)
+            bucket = None if bucket is None else int(bucket)
+            shard = (name, bucket)
+            if name not in classes or (bucket is None) != \
+                    (self.__shards < 2) or (bucket or 0) >= self.__shards:
+                shard = None
+            files[os.path.join(directory, file_name)] = shard
+        return files
+
+    def close(self):
+        """stops the checkpoint thread after a last write"""
+        if self.__checkpointer is None:
+            return
+        self.__checkpointer.stop()
+        atexit.unregister(self.close)
+        if self.__checkpointer.error is not None:
+            raise self.__checkpointer.error
+
+    @property
+    def batching(self):
+        """tells if a batch was started and not yet committed"""
+        return self.__batch > 0
+
+    def begin(self):
+        """starts a batch: saves are deferred until the matching commit.
+        Batches may be nested, only the outermost commit writes. A nested
+        batch keeps a copy of the objects changed before it, its savepoint,
+        for its rollback to put them back"""
+        if not self.__batch and self.__dirty:
+            self.flush()  # a rollback only drops the batch's own changes
+        with self.__state:
+            if self.__batch:
+                self.__savepoints.append({
+                    key: None if obj is None
+                    else copy.deepcopy(self.__codec.record(obj))
+                    for key, obj in self.__dirty.items()})
+            FileStorage.__batch += 1
+
+    def commit(self):
+        """ends a batch, writing all its changes at once if outermost.
+        If writing fails the batch is rolled back"""
+        with self.__state:
+            FileStorage.__batch = batch = max(self.__batch - 1, 0)
+            if batch:
+                self.__savepoints.pop()
+        if batch:
+            return
+        try:
+            self.save()
+        except BaseException:
+            self.rollback()
+            raise
+
+    def rollback(self):
+        """ends the innermost batch, dropping its changes: every object it
+        changed is put back, in place, as it was when the batch began. The
+        outer batches go on. Out of a nested batch every changed object is
+        put back as it was last saved"""
+        with self.__lock, self.__state:
+            if self.__batch > 1:
+                FileStorage.__batch -= 1
+                self.__rollback_to(self.__savepoints.pop())
+                return
+            FileStorage.__batch = 0
+            if not self.__dirty:
+                return
+            self.__restore(self.__dirty, dict(self.__records()))
+            self.__dirty.clear()
+
+    def __rollback_to(self, savepoint):
+        """puts the changed objects back as they were at savepoint: those
+        it holds as it copied them, still changed for the outer batch, the
+        others as they were last saved"""
+        keys = list(self.__dirty)
+        saved = {}
+        if any(key not in savepoint for key in keys):
+            saved = dict(self.__records())
+        for key in keys:
+            if key in savepoint:
+                saved[key] = savepoint[key]
+        self.__restore(keys, {key: record for key, record in saved.items()
+                              if record is not None})
+        for key in keys:
+            if key in savepoint:
+                self.__dirty[key] = dict.get(self.__objects, key)
+            else:
+                del self.__dirty[key]
 
+    def __restore(self, keys, saved):
+        """puts the objects of keys back, in place, as they are in saved,
+        the {key: record} read from the files, removing those not there"""
+        self.__classes()
+        for key in keys:
+            self.__encoded.pop(key, None)
+            current = self.__objects.pop(key, None)
+            if current is not None:
+                self.__unindex(key, current)
+            if key not in saved:
+                continue
+            obj = self.__build(saved[key])
+            if current is not None:
+                for name in current._attributes():
+                    delattr(current, name)  # not stored: nothing to touch
+                for name, value in obj._attributes().items():
+                    setattr(current, name, value)
+                obj = current
+            self.__objects[key] = obj
+            self.__index(key, obj)
+        FileStorage.__view = None
+
+    @contextmanager
+    def batch(self):
+        """context manager running its block as a batch: the changes are
+        written once at the end, or dropped if the block raises"""
+        self.begin()
         try:
-            with open(self.__file_path, mode="w") as fil:
-                temp = {}
-                for key, obj in self.__objects.items():
-                    temp[key] = obj.to_dict()
-                json.dump(temp, fil)
-        except (FileNotFoundError, PermissionError) as error:
-            # print("Any Here")
-            pass
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
-        key = "{}.{}".format(obj.__class__.__name__, obj.id)
-        self.__objects[key] = obj
+        key = self.__key(obj)
+        with self.__state:
+            self.__classes()
+            self.__index(key, obj)
+            self.__objects[key] = obj
+            self.__dirty[key] = obj
+            FileStorage.__view = None
+
+    def touch(self, obj):
+        """marks obj as changed, if stored, so the next save writes it.
+        Setting an attribute does it, changing a list attribute in place
+        must be followed by touch() or obj.save()"""
+        name = type(obj).__name__
+        key = "{}.{}".format(name, getattr(obj, "id", None))
+        with self.__state:
+            if self.__stored(key, obj):
+                self.__dirty[key] = obj
+                self.__changed(name, key, obj)
+                for attr, index in self.__by_attr.get(name, {}).items():
+                    index.add(key, getattr(obj, attr, None))
+
+    def delete(self, obj):
+        """removes obj from __objects, the change is kept until next save"""
+        key = self.__key(obj)
+        with self.__state:
+            self.__classes()
+            obj = self.__objects.pop(key, None)
+            if obj is not None:
+                self.__unindex(key, obj)
+                self.__dirty[key] = None
+                FileStorage.__view = None
+
+    def all(self, cls=None):
+        """Returns the private objects holding all the data
+        cls: a class or class name, only its objects are returned then.
+        In threadsafe mode all the objects are a read-only copy"""
+        name = cls if cls is None or isinstance(cls, str) else cls.__name__
+        with self.__state:
+            if name is not None:
+                objs = self.__objects
+                return {key: objs[key]
+                        for key in self.__classes().get(name, {})}
+            self.__materialize()
+            if not self.__threadsafe:
+                return self.__objects
+            view = self.__view
+            if view is None or view[0] is not self.__objects or \
+                    len(view[1]) != len(self.__objects):
+                view = (self.__objects,
+                        MappingProxyType(self.__objects.copy()))
+                FileStorage.__view = view
+            return view[1]
+
+    def stream(self, cls=None, after=None):
+        """Returns an iterator over the objects, of class cls only if
+        given, in the storage order, starting after the key after if
+        given: the cursor of the last object of a page. Raises KeyError if
+        after is not stored. In lazy mode the objects not built yet are
+        built for the caller only, so streaming the store does not build
+        it. In threadsafe mode the keys are copied first"""
+        return self.__stream(self.__keys(cls, after, self.__threadsafe),
+                             after)
+
+    def aiter(self, cls=None, after=None, chunk=CHUNK):
+        """Returns an async iterator over the objects as stream() does,
+        giving the event loop back every chunk objects. The keys are
+        copied first, other tasks may change the objects meanwhile"""
+        return paced(self.__stream(self.__keys(cls, after, True), after),
+                     chunk)
+
+    def count(self, cls=None):
+        """Returns the number of objects, of class cls only if given"""
+        with self.__state:
+            if cls is None:
+                self.__materialize()
+                return len(self.__objects)
+            name = cls if isinstance(cls, str) else cls.__name__
+            return len(self.__classes().get(name, {}))
+
+    def find(self, cls, **attrs):
+        """Returns the list of objects of cls whose attributes equal attrs
+        e.g find(Review, place_id=place.id). The smallest match of the
+        indexed attributes is filtered, the objects of cls otherwise"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        with self.__state:
+            found = self.__classes().get(name, {})
+            indexes = self.__indexes(name)
+            for attr, value in attrs.items():
+                if attr in indexes:
+                    match = indexes[attr].lookup(value)
+                    if len(match) < len(found):
+                        found = match
+            objs = [self.__objects[key] for key in found]
+        return [obj for obj in objs
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in attrs.items())]
+
+    def filter(self, cls, **lookups):
+        """Returns the list of objects of cls matching all the lookups,
+        attribute=value or attribute__op=value where op is one of eq, ne,
+        lt, le, gt, ge or between, given a (low, high) pair
+        e.g filter(Place, max_guest__ge=4, price_by_night__between=(50,
+        100)). Attributes of the class' __columns__ compared to numbers
+        are filtered on the columns, the others object by object"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        predicates = [parse(lookup) + (value,)
+                      for lookup, value in lookups.items()]
+        attrs = getattr(globals().get(name), "__columns__", ())
+        vector = [(attr, op, operand) for attr, op, operand in predicates
+                  if attr in attrs and is_operand(op, operand)]
+        with self.__state:
+            keys = self.__classes().get(name, {})
+            if vector:
+                keys = self.__filter_columns(name, vector)
+                predicates = [pred for pred in predicates
+                              if pred not in vector]
+            objs = [self.__objects[key] for key in keys]
+        if not predicates:
+            return objs
+        return [obj for obj in objs
+                if all(matches(getattr(obj, attr, None), op, operand)
+                       for attr, op, operand in predicates)]
 
-    def all(self):
-        """Returns the private objects holding all the data"""
-        return self.__objects
+    def query(self, cls, where=(), order_by=(), limit=None):
+        """Returns the list of objects of cls matching all the where
+        (attribute, op, operand) predicates, op as filter() takes it,
+        sorted by the (attribute, descending) pairs of order_by, the first
+        limit objects only if given
+        e.g query(Place, [("city_id", "eq", city.id)], [("name", False)])"""
+        with self.__state:
+            return self.plan(cls, where, order_by, limit).run()
+
+    def plan(self, cls, where=(), order_by=(), limit=None):
+        """Returns the Plan of query(), whose explain() tells how it runs.
+        The objects are fetched by the cheapest of a lookup of an equality
+        on an attribute of __indexes__, a filter of the numbers compared
+        to __columns__ attributes and a scan of the objects of cls.
+        The plan fetches its objects under the lock of the state, so it
+        may run once they changed"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        where = list(where)
+        paths = []
+        with self.__state:
+            count = len(self.__classes().get(name, {}))
+            indexes = self.__indexes(name)
+            for i, (attr, op, operand) in enumerate(where):
+                if op == "eq" and attr in indexes:
+                    paths.append((len(indexes[attr].lookup(operand)),
+                                  "index lookup of " +
+                                  describe(where[i:i + 1]),
+                                  lambda attr=attr, operand=operand:
+                                  self.__fetch(name, attr, operand),
+                                  where[:i] + where[i + 1:]))
+            built = "" if name in self.__columns else ", columns to build"
+        attrs = getattr(classes.get(name), "__columns__", ())
+        vector = [(attr, op, operand) for attr, op, operand in where
+                  if attr in attrs and is_operand(op, operand)]
+        if vector:
+            paths.append((count * ROW_COST, "column filter of " +
+                          describe(vector) + built,
+                          lambda: self.__fetch(name, vector=vector),
+                          [pred for pred in where if pred not in vector]))
+        paths.append((count, "scan of {} objects".format(count),
+                      lambda: self.__fetch(name), where))
+        return Plan(name, paths, order_by, limit)
+
+    def __fetch(self, name, attr=None, operand=None, vector=None):
+        """the list of the objects of the class called name whose indexed
+        attr equals operand if attr, matching the vector predicates by the
+        columns if vector, all of them otherwise"""
+        with self.__state:
+            keys = self.__classes().get(name, {})
+            if attr is not None:
+                index = self.__indexes(name).get(attr)
+                keys = () if index is None else index.lookup(operand)
+            elif vector is not None:
+                keys = self.__filter_columns(name, vector)
+            return [self.__objects[key] for key in keys]
+
+    def near(self, cls, lat, lon, km):
+        """Returns the list of objects of cls within km kilometers of the
+        point lat, lon, closest first. cls must declare its latitude and
+        longitude attributes in __location__"""
+        with self.__state:
+            grid = self.__grid(cls)
+            if grid is None:
+                return []
+            return [self.__objects[key]
+                    for dist, key in grid.near(lat, lon, km)]
+
+    def nearest(self, cls, lat, lon, count=1):
+        """Returns the list of the count objects of cls closest to the
+        point lat, lon, closest first"""
+        with self.__state:
+            grid = self.__grid(cls)
+            if grid is None:
+                return []
+            return [self.__objects[key]
+                    for dist, key in grid.nearest(lat, lon, count)]
+
+    def search(self, cls, query, limit=None):
+        """Returns the list of objects of cls, of every class if None,
+        whose __search__ attributes hold words of query, best match first
+        e.g search(Review, "quiet clean"). At most limit objects if given"""
+        name = cls if cls is None or isinstance(cls, str) else cls.__name__
+        with self.__state:
+            self.__classes()  # drops the objects replaced behind its back
+            keys = self.__text_index(build=True).search(name, query, limit)
+            return [self.__objects[key] for key in keys]
 
     def save_changes(self, obj):
         """when deletion/update is made, updates __objects and file"""
-        self.__objects = obj
-        self.save()
+        with self.__state:
+            self.__objects = obj
+            FileStorage.__indexed = None
+        self.compact()
+
+    def __keys(self, cls, after, copy):
+        """the keys of the objects, of class cls only if given, as a list
+        if copy. Raises KeyError if after is not one of them"""
+        with self.__state:
+            self.__materialize()
+            keys = self.__objects
+            if cls is not None:
+                name = cls if isinstance(cls, str) else cls.__name__
+                keys = self.__classes().get(name, {})
+            if after is not None and after not in keys:
+                raise KeyError(after)
+            return list(keys) if copy else keys
+
+    def __stream(self, keys, after):
+        """yields the objects of keys, after the key after if not None"""
+        keys = iter(keys)
+        if after is not None:
+            for key in keys:
+                if key == after:
+                    break
+        for key in keys:
+            obj = dict.get(self.__objects, key)
+            if obj is None:  # deleted by another thread meanwhile
+                continue
+            if type(obj) is dict:
+                obj = self.__build(obj)
+            yield obj
+
+    def __stored(self, key, obj):
+        """tells if obj is the stored object of key. An object stream()
+        built for its caller in lazy mode replaces the raw record it was
+        built from, so its changes are kept"""
+        stored = dict.get(self.__objects, key)
+        if stored is obj:
+            return True
+        if type(stored) is dict and type(obj) is not dict:
+            dict.__setitem__(self.__objects, key, obj)
+            return True
+        return False
+
+    def __take_dirty(self):
+        """removes and returns the (key, obj or None) changes one by one,
+        so a change made meanwhile by another thread is never lost. In
+        shared mode their keys are logged for the other processes"""
+        changes = [(key, self.__dirty.pop(key)) for key in list(self.__dirty)]
+        if self.__shared is not None and self.__shared.held:
+            self.__generation = self.__shared.bump(
+                [key for key, obj in changes])
+        return changes
+
+    def __give_back(self, changes):
+        """puts the (key, obj or None) changes taken by a write that failed
+        back in __dirty, but those changed again meanwhile, for the next
+        write to make them. Their JSON is encoded again"""
+        with self.__state:
+            for key, obj in changes:
+                self.__encoded.pop(key, None)
+                self.__dirty.setdefault(key, obj)
+
+    def __records(self):
+        """yields the saved (<classname>.id, dict) pairs: the JSON file
+        with the journal replayed on top of it. The jsonl file is read one
+        line at a time, the shards by a thread each"""
+        changes = dict(self.__journal.replay())
+        if self.__shards:
+            records = self.__shard_records()
+        elif Path(self.__path).is_file():
+            records = self.__read(self.__path)
+        else:
+            records = ()
+        for key, obj in records:
+            if key not in changes:
+                yield key, obj
+        for key, obj in changes.items():
+            if obj is not None:
+                yield key, obj
+
+    def __read(self, path):
+        """yields the (<classname>.id, dict) pairs of the file path"""
+        if self.__format == "snapshot":
+            snapshot = Snapshot(path, self.__codec)
+            try:
+                yield from snapshot.items()
+            finally:
+                snapshot.close()
+            return
+        with open(path, "rb") as fil:
+            if self.__format == "jsonl":
+                yield from iter_json_lines(fil, self.__codec.loads)
+            else:
+                temp = self.__codec.loads(fil.read())
+                yield from temp.items()
+                del temp
+
+    def __shard_records(self):
+        """yields the (<classname>.id, dict) pairs of the shards, read in
+        parallel threads. Without shards the single file is read, and the
+        store is rewritten in shards by the next write, as it is when
+        shards of another layout are found"""
+        files = self.__shard_files()
+        if not files:
+            if Path(self.__path).is_file():
+                self.__rewrite = True
+                yield from self.__read(self.__path)
+            return
+        if None in files.values():
+            self.__rewrite = True
+        paths = sorted(files)
+        with ThreadPoolExecutor(min(len(paths), os.cpu_count() or 1)) \
+                as pool:
+            for records in pool.map(lambda path: list(self.__read(path)),
+                                    paths):
+                yield from records
+
+    def __classes(self):
+        """the class name index of __objects. The indexes are rebuilt when
+        __objects was replaced or changed behind the storage's back"""
+        self.__materialize()
+        by_class = self.__by_class
+        if self.__indexed is not self.__objects or \
+                sum(map(len, by_class.values())) != len(self.__objects):
+            by_class.clear()
+            self.__by_attr.clear()
+            self.__columns.clear()
+            self.__grids.clear()
+            for key, obj in dict.items(self.__objects):
+                self.__index(key, obj)
+            if self.__text is not None:
+                self.__text.retain(self.__objects)
+            FileStorage.__indexed = self.__objects
+        return by_class
+
+    def __index(self, key, obj):
+        """files obj, or its raw dict, in the class index and its class'
+        attribute indexes"""
+        if type(obj) is dict:
+            cls = globals()[obj['__class__']]
+        else:
+            cls = type(obj)
+        name = cls.__name__
+        self.__by_class.setdefault(name, {})[key] = None
+        self.__changed(name, key, obj)
+        for attr, index in self.__by_attr.get(name, {}).items():
+            if type(obj) is dict:
+                index.add(key, obj.get(attr, getattr(cls, attr, None)))
+            else:
+                index.add(key, getattr(obj, attr, None))
+
+    def __indexes(self, name):
+        """the {attribute: HashIndex} of the __indexes__ of the class called
+        name, filled with its objects the first time, as reload() leaves
+        them to find() and plan()"""
+        keys = self.__classes().get(name, {})
+        indexes = self.__by_attr.get(name)
+        if indexes is None:
+            cls = classes.get(name)
+            indexes = {attr: HashIndex(attr)
+                       for attr in getattr(cls, "__indexes__", ())}
+            for attr, index in indexes.items():
+                default = getattr(cls, attr, None)
+                for key in keys:
+                    obj = dict.__getitem__(self.__objects, key)
+                    if type(obj) is dict:
+                        index.add(key, obj.get(attr, default))
+                    else:
+                        index.add(key, getattr(obj, attr, None))
+            self.__by_attr[name] = indexes
+        return indexes
+
+    def __unindex(self, key, obj):
+        """removes obj from the class index and attribute indexes"""
+        name = type(obj).__name__
+        self.__by_class[name].pop(key, None)
+        self.__changed(name, key, None)
+        for index in self.__by_attr.get(name, {}).values():
+            index.remove(key)
+
+    def __changed(self, name, key, obj):
+        """queues the change of key, to obj or None if deleted, for the
+        columns and the grid of the class called name, if built"""
+        for caches in (self.__columns, self.__grids):
+            if name in caches:
+                caches[name].changed(key, obj)
+        if self.__text is not None:
+            self.__text.changed(key, obj)
+
+    def __cache(self, caches, name, factory):
+        """the columns or grid of the class called name, created by
+        factory(cls) and filled with its objects the first time"""
+        cache = caches.get(name)
+        if cache is None:
+            cache = factory(globals()[name])
+            for key in self.__classes().get(name, {}):
+                cache.changed(key, dict.__getitem__(self.__objects, key))
+            caches[name] = cache
+        return cache
+
+    def __text_index(self, build=False):
+        """the TextIndex of the storage file, loaded from <file>.search if
+        saved, built from the objects if build, None otherwise"""
+        path = self.__path + ".search"
+        text = self.__text
+        if text is not None and text.journal.path == path:
+            return text
+        if not build and not os.path.isfile(path):
+            return None
+        text = TextIndex(path, classes, self.__codec)
+        text.load()
+        for key, obj in dict.items(self.__objects):
+            text.changed(key, obj)
+        text.retain(self.__objects)
+        FileStorage.__text = text
+        return text
+
+    def __filter_columns(self, name, vector):
+        """the keys of the objects of the class called name matching the
+        vector predicates, compared by the columns of the class"""
+        store = self.__cache(self.__columns, name, ColumnStore)
+        found, odd = store.filter(vector)
+        return found + [key for key in odd
+                        if all(matches(getattr(self.__objects[key], attr,
+                                               None), op, operand)
+                               for attr, op, operand in vector)]
+
+    def __grid(self, cls):
+        """the grid of cls, None if it is not a model class"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        model = globals().get(name)
+        if not isinstance(model, type) or not issubclass(model, BaseModel):
+            return None
+        if not getattr(model, "__location__", None):
+            raise ValueError("{} has no __location__".format(name))
+        return self.__cache(self.__grids, name, GridIndex)
+
+    def __build(self, record):
+        """creates the model instance of a record read from the file"""
+        cls = globals()[record['__class__']]
+        if self.__compact:
+            cls = compact_class(cls)
+        return cls(**record)
+
+    @staticmethod
+    def __key(obj):
+        """the <obj class name>.id key of obj"""
+        return "{}.{}".format(obj.__class__.__name__, obj.id)
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""The indexes module: secondary indexes kept by the storage engines"""
+
+
+class HashIndex:
+    """A hash index on one attribute of a model class.
+    Maps every value of the attribute to the set of <classname>.id keys of
+    the objects holding it. Keys with an unhashable value are kept aside
+    and checked one by one on lookup"""
+
+    def __init__(self, attr):
+        """HashIndex constructor"""
+        self.attr = attr
+        self.buckets = {}  # value -> {<classname>.id, ...}
+        self.values = {}  # <classname>.id -> the value it is filed under
+        self.unhashable = {}  # <classname>.id -> its unhashable value
+
+    def add(self, key, value):
+        """files key under value, moving it if it was filed elsewhere"""
+        if key in self.values or key in self.unhashable:
+            self.remove(key)
+        try:
+            self.buckets.setdefault(value, set()).add(key)
+        except TypeError:
+            self.unhashable[key] = value
+            return
+        self.values[key] = value
+
+    def remove(self, key):
+        """removes key from the index"""
+        if key in self.unhashable:
+            del self.unhashable[key]
+            return
+        value = self.values.pop(key)
+        bucket = self.buckets[value]
+        bucket.discard(key)
+        if not bucket:
+            del self.buckets[value]
+
+    def lookup(self, value):
+        """returns the set of keys filed under value"""
+        try:
+            found = self.buckets.get(value, set())
+        except TypeError:
+            found = set()
+        if self.unhashable:
+            found = found | {key for key, other in self.unhashable.items()
+                             if other == value}
+        return found
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""The Journal module: the append-only write-ahead log of FileStorage"""
+from models.engine.atomic import atomic_open
+from models.engine.codec import JSONCodec
+import os
+
+
+class Journal:
+    """An append-only log of create/update/destroy records.
+    Every line holds one record, either
+        {"op": "set", "key": <classname>.<id>, "obj": <to_dict()>}
+    or
+        {"op": "del", "key": <classname>.<id>}
+    or, for changes saved together,
+        {"op": "batch", "records": [<record>, ...]}
+    Replaying the records on top of the last snapshot gives back the store"""
+
+    def __init__(self, path, codec=None, sync=True):
+        """Journal constructor
+        codec: encodes and decodes the records, json module by default
+        sync: fsync every append, not needed for data that can be rebuilt"""
+        self.path = path
+        self.codec = codec or JSONCodec()
+        self.sync = sync
+        self.records = 0  # number of records not yet folded in a snapshot
+
+    def append(self, changes):
+        """appends one record per (key, dict or None) pair of changes,
+        the dicts being to_dict() or codec.record() of the objects.
+        None marks the key as destroyed. Several changes are written as a
+        single batch line: a crash keeps either all or none of them"""
+        records = self.__records(changes)
+        if not records:
+            return
+        if len(records) > 1:
+            line = self.codec.dumps({"op": "batch", "records": records})
+        else:
+            line = self.codec.dumps(records[0])
+        with open(self.path, mode="a") as fil:
+            fil.write(line + "\n")
+            if self.sync:
+                fil.flush()
+                os.fsync(fil.fileno())
+        self.records += len(records)
+
+    def rewrite(self, changes):
+        """replaces the journal, atomically, by one record per (key, dict
+        or None) pair of changes"""
+        records = self.__records(changes)
+        with atomic_open(self.path) as fil:
+            for record in records:
+                fil.write(self.codec.dumps(record) + "\n")
+        self.records = len(records)
+
+    def replay(self):
+        """yields (key, dict or None) for every record in the journal.
+        A torn last line (crash in the middle of an append) is ignored and
+        cut off, so the next append starts on a line of its own"""
+        self.records = 0
+        if not os.path.isfile(self.path):
+            return
+        good = 0  # offset of the end of the last whole line
+        with open(self.path, mode="rb") as fil:
+            for line in fil:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = self.codec.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                if record["op"] == "batch":
+                    records = record["records"]
+                else:
+                    records = [record]
+                for record in records:
+                    self.records += 1
+                    if record["op"] == "del":
+                        yield record["key"], None
+                    else:
+                        yield record["key"], record["obj"]
+            torn = fil.seek(0, os.SEEK_END) > good
+        if torn:
+            os.truncate(self.path, good)
+
+    def truncate(self):
+        """empties the journal once its records are in a snapshot"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.records = 0
+
+    @staticmethod
+    def __records(changes):
+        """the set or del records of the (key, dict or None) changes"""
+        records = []
+        for key, data in changes:
+            if data is None:
+                records.append({"op": "del", "key": key})
+            else:
+                records.append({"op": "set", "key": key, "obj": data})
+        return records
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""The lazy module: the objects dict of FileStorage in lazy mode"""
+
+
+class LazyObjects(dict):
+    """A dict of <classname>.id -> object whose values may still be the
+    raw dicts read from the JSON file. A raw dict is turned into its
+    model instance by build(record) the first time it is looked up, so
+    only the objects actually used are ever instantiated.
+    dict.items(lazy) and dict.__getitem__(lazy, key) give the stored
+    values without building them"""
+
+    def __init__(self, objects, build):
+        """LazyObjects constructor
+        objects: the {<classname>.id: object or raw dict} to start from
+        build: turns a raw dict into its model instance"""
+        super().__init__(objects)
+        self.build = build
+
+    def __getitem__(self, key):
+        """returns the object of key, building it if not done yet"""
+        value = super().__getitem__(key)
+        if type(value) is dict:
+            value = self.build(value)
+            super().__setitem__(key, value)
+        return value
+
+    def __eq__(self, other):
+        """compares the built objects"""
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        """compares the built objects"""
+        return not self == other
+
+    def __repr__(self):
+        """representation of the built objects"""
+        return repr(dict(self.items()))
+
+    def get(self, key, default=None):
+        """returns the object of key if present else default"""
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *default):
+        """removes key and returns its object"""
+        if key in self:
+            value = self[key]
+            super().__delitem__(key)
+            return value
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        """returns the object of key, setting it to default if missing"""
+        if key not in self:
+            super().__setitem__(key, default)
+        return self[key]
+
+    def popitem(self):
+        """removes and returns the last (key, object) pair"""
+        key, value = super().popitem()
+        if type(value) is dict:
+            value = self.build(value)
+        return key, value
+
+    def values(self):
+        """returns the list of all the objects"""
+        return [self[key] for key in self]
+
+    def items(self):
+        """returns the list of all the (key, object) pairs"""
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        """returns a plain dict of all the objects"""
+        return dict(self.items())
+
+    def is_built(self, key):
+        """tells if the object of key was built already"""
+        return type(super().__getitem__(key)) is not dict
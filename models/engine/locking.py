@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""The locking module: a store shared by several processes
+Writers hold an exclusive fcntl lock on <file>.lock, which holds the
+generation of the store: the number of writes made to it. Each write
+appends the keys it changed to <file>.changes, so another process knows
+which objects to read again, and which of its own changes conflict"""
+from contextlib import contextmanager
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system
+    fcntl = None
+
+
+class ConflictError(Exception):
+    """Objects changed by this process were saved meanwhile by another.
+    keys: the <classname>.id keys of the objects"""
+
+    def __init__(self, keys):
+        """ConflictError constructor"""
+        self.keys = sorted(keys)
+        super().__init__("changed by another process: {}".format(
+            ", ".join(self.keys)))
+
+
+class StoreLock:
+    """The lock, generation and change log of a shared store. Only the
+    changes of the last keep generations are logged"""
+
+    def __init__(self, path, keep=1000):
+        """StoreLock constructor, raises OSError without fcntl
+        path: the store file, <path>.lock and <path>.changes are used"""
+        if fcntl is None:
+            raise OSError("file locking needs fcntl")
+        self.path = path + ".lock"
+        self.log = path + ".changes"
+        self.keep = keep
+        self.__fd = None
+        self.__depth = 0
+
+    @property
+    def held(self):
+        """tells if the lock is held by this process"""
+        return self.__depth > 0
+
+    @contextmanager
+    def hold(self, exclusive=True):
+        """holds the lock, exclusive or shared, for the block, which is
+        given the current generation. Nested holds share the outer lock"""
+        if self.__depth:
+            self.__depth += 1
+            try:
+                yield self.generation()
+            finally:
+                self.__depth -= 1
+            return
+        self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self.__fd, fcntl.LOCK_EX if exclusive
+                        else fcntl.LOCK_SH)
+            self.__depth = 1
+            yield self.generation()
+        finally:
+            self.__depth = 0
+            os.close(self.__fd)  # releases the lock
+            self.__fd = None
+
+    def generation(self):
+        """the generation written in the lock file, 0 if none yet"""
+        if self.__fd is not None:
+            data = os.pread(self.__fd, 32, 0)
+        else:
+            try:
+                with open(self.path, "rb") as fil:
+                    data = fil.read(32)
+            except FileNotFoundError:
+                data = b""
+        return int(data) if data.strip() else 0
+
+    def bump(self, keys):
+        """logs the keys about to be written, under the exclusive lock,
+        and returns the new generation. Done before writing, a failed
+        write only makes the other processes read their keys again"""
+        generation = self.generation() + 1
+        entries = []
+        if os.path.isfile(self.log):
+            with open(self.log) as fil:
+                entries = fil.readlines()
+        entries.append(json.dumps({"generation": generation,
+                                   "keys": sorted(keys)}) + "\n")
+        if len(entries) > self.keep:
+            with open(self.log + ".tmp", "w") as fil:
+                fil.writelines(entries[-self.keep:])
+            os.replace(self.log + ".tmp", self.log)
+        else:
+            with open(self.log, "a") as fil:
+                fil.write(entries[-1])
+        data = str(generation).encode()
+        os.ftruncate(self.__fd, 0)
+        os.pwrite(self.__fd, data, 0)
+        return generation
+
+    def changed_since(self, generation):
+        """the set of keys written after generation, None if the log does
+        not go back that far"""
+        if generation >= self.generation():
+            return set()
+        keys, first = set(), None
+        if os.path.isfile(self.log):
+            with open(self.log) as fil:
+                for line in fil:
+                    entry = json.loads(line)
+                    if first is None:
+                        first = entry["generation"]
+                    if entry["generation"] > generation:
+                        keys.update(entry["keys"])
+        if first is None or first > generation + 1:
+            return None
+        return keys
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""The query module: the query language of the console's
+<classname>.where(...) commands and the plans that run the queries
+
+    Place.where(city_id == "0a1b", price_by_night <= 100)
+         .order_by(-price_by_night, name).limit(5)
+
+A storage engine lists the ways it can fetch the objects of a query, the
+Plan runs the cheapest one and explain() tells which one it chose"""
+from ast import literal_eval
+from datetime import datetime
+from heapq import nlargest, nsmallest
+from itertools import islice
+from models.engine.columns import matches
+import re
+
+SYMBOLS = {"==": "eq", "=": "eq", "!=": "ne", "<": "lt", "<=": "le",
+           ">": "gt", ">=": "ge"}
+NAMES = {op: symbol for symbol, op in SYMBOLS.items() if symbol != "="}
+LITERALS = {"true": True, "false": False, "null": None, "None": None}
+TOKEN = re.compile(r"""\s*(?:
+    (?P<number>[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+    |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<op>==|!=|<=|>=|<|>|=)
+    |(?P<punct>[.,()-])
+    )""", re.VERBOSE)
+RANKS = {int: 0, float: 0, bool: 0, str: 1, datetime: 2}
+
+
+def tokenize(text):
+    """returns the (kind, text) tokens of a query"""
+    tokens, pos, end = [], 0, len(text.rstrip())
+    while pos < end:
+        mat = TOKEN.match(text, pos)
+        if mat is None:
+            raise ValueError("unexpected {!r}".format(text[pos:].strip()))
+        tokens.append((mat.lastgroup, mat.group(mat.lastgroup)))
+        pos = mat.end()
+    return tokens
+
+
+def parse_query(text):
+    """parses <classname>.where(...).order_by(...).limit(...), every part
+    being optional, and returns its (class name, where, order_by, limit):
+    where the (attribute, op, operand) predicates, op as filter() takes it,
+    order_by the (attribute, descending) pairs. Raises ValueError"""
+    tokens = tokenize(text)
+    pos = 0
+
+    def take(*kinds):
+        """returns the text of the next token, which must be of kinds"""
+        nonlocal pos
+        kind, value = tokens[pos] if pos < len(tokens) else ("end", "")
+        if kind not in kinds and value not in kinds:
+            raise ValueError("expected {} instead of {!r}".format(
+                " or ".join(kinds), value or "the end"))
+        pos += 1
+        return value
+
+    def peek():
+        """the text of the next token, "" at the end"""
+        return tokens[pos][1] if pos < len(tokens) else ""
+
+    def operand():
+        """the value of a literal"""
+        kind, value = tokens[pos] if pos < len(tokens) else ("end", "")
+        take("number", "string", "name")
+        if kind == "name":
+            return LITERALS.get(value, value)  # a bare word is a string
+        return literal_eval(value)
+
+    def arguments(item):
+        """the items parsed by item() between parentheses"""
+        take("(")
+        items = []
+        while peek() != ")":
+            if items:
+                take(",")
+            items.append(item())
+        take(")")
+        return items
+
+    def predicate():
+        """attribute op operand"""
+        attr = take("name")
+        op = SYMBOLS[take("op")]
+        return attr, op, operand()
+
+    def key():
+        """[-]attribute"""
+        descending = peek() == "-"
+        if descending:
+            take("-")
+        return take("name"), descending
+
+    def count():
+        """a number of objects"""
+        value = operand()
+        if type(value) is not int or value < 0:
+            raise ValueError("limit must be a positive integer")
+        return value
+
+    name = take("name")
+    where, order_by, limit = [], [], None
+    while pos < len(tokens):
+        take(".")
+        part = take("where", "order_by", "limit")
+        if part == "where":
+            where.extend(arguments(predicate))
+        elif part == "order_by":
+            order_by = arguments(key)
+        else:
+            limits = arguments(count)
+            if len(limits) != 1:
+                raise ValueError("limit takes one number")
+            limit = limits[0]
+    return name, where, order_by, limit
+
+
+def describe(predicates):
+    """the text of the (attribute, op, operand) predicates"""
+    return " and ".join("{} {} {!r}".format(attr, NAMES.get(op, op), operand)
+                        for attr, op, operand in predicates)
+
+
+def sort_key(value):
+    """the key sorting values of any types together: numbers, strings,
+    dates, the other values by their repr, then None"""
+    rank = RANKS.get(type(value))
+    if rank is not None:
+        return rank, value
+    if value is None:
+        return 4, 0
+    return 3, repr(value)
+
+
+def order(objs, order_by=(), limit=None):
+    """returns the objects sorted by the (attribute, descending) pairs of
+    order_by, only the first limit if given. A single key with a limit
+    only keeps the limit best objects while sorting, no key stops
+    reading objs after limit"""
+    if not order_by:
+        return list(objs if limit is None else islice(objs, limit))
+    if len(order_by) == 1 and limit is not None:
+        attr, descending = order_by[0]
+        pick = nlargest if descending else nsmallest
+        return pick(limit, objs,
+                    key=lambda obj: sort_key(getattr(obj, attr, None)))
+    objs = list(objs)
+    for attr, descending in reversed(order_by):  # sorts are stable
+        objs.sort(key=lambda obj: sort_key(getattr(obj, attr, None)),
+                  reverse=descending)
+    return objs if limit is None else objs[:limit]
+
+
+class Plan:
+    """How a query runs: the chosen access path fetches the candidate
+    objects, the predicates it leaves are checked object by object, then
+    the objects are sorted and cut to the limit.
+    The storage engine gives its access paths as (cost, description,
+    fetch, residual) tuples: cost estimates the number of objects looked
+    at, fetch() returns or yields the candidates and residual lists the
+    predicates fetch() does not check. The cheapest path is chosen, the
+    first one given on a tie"""
+
+    def __init__(self, name, paths, order_by=(), limit=None):
+        """Plan constructor
+        name: the class name queried
+        paths: the access paths
+        order_by: the (attribute, descending) pairs to sort by
+        limit: the maximum number of objects, None for all"""
+        self.name = name
+        self.paths = sorted(paths, key=lambda path: path[0])
+        self.cost, self.access, self.fetch, self.residual = self.paths[0]
+        self.order_by = list(order_by)
+        self.limit = limit
+
+    def run(self):
+        """returns the objects matching the query"""
+        objs = self.fetch()
+        if self.residual:
+            objs = (obj for obj in objs
+                    if all(matches(getattr(obj, attr, None), op, operand)
+                           for attr, op, operand in self.residual))
+        return order(objs, self.order_by, self.limit)
+
+    def explain(self):
+        """returns the lines describing the plan"""
+        lines = ["{}: {} (cost {:g})".format(self.name, self.access,
+                                             self.cost)]
+        if self.residual:
+            lines.append("  check: " + describe(self.residual))
+        if self.order_by:
+            lines.append("  sort: " + ", ".join(
+                attr + (" desc" if descending else "")
+                for attr, descending in self.order_by) +
+                (" (top {})".format(self.limit)
+                 if len(self.order_by) == 1 and self.limit is not None
+                 else ""))
+        if self.limit is not None:
+            lines.append("  limit: {}".format(self.limit))
+        for cost, access, fetch, residual in self.paths[1:]:
+            lines.append("  rejected: {} (cost {:g})".format(access, cost))
+        return lines
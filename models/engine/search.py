@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+"""The search module: a full-text index of the text attributes of the
+model classes, ranked by BM25"""
+from collections import Counter
+from heapq import nlargest
+from math import log
+from models.engine.journal import Journal
+import re
+import zlib
+
+WORD = re.compile(r"\w+")
+K1, B = 1.2, 0.75  # BM25 term frequency saturation and length weight
+
+
+def tokenize(text):
+    """returns the lower case words of text"""
+    return WORD.findall(text.lower())
+
+
+class TextIndex:
+    """An inverted index mapping every word to the <classname>.id keys of
+    the objects whose __search__ attributes hold it, with its count.
+    The words of every object are saved in a Journal next to the storage
+    file, with a checksum of its text: reloading only tokenizes the objects
+    whose text changed since. Changes are queued by changed() and applied
+    by refresh(), save() then appends only them to the journal"""
+
+    def __init__(self, path, classes, codec=None):
+        """TextIndex constructor
+        path: the journal of the index
+        classes: the {name: class} of the model classes"""
+        self.fields = {name: cls.__search__ for name, cls in classes.items()
+                       if getattr(cls, "__search__", None)}
+        self.defaults = {name: [getattr(classes[name], attr, None)
+                                for attr in attrs]
+                         for name, attrs in self.fields.items()}
+        self.journal = Journal(path, codec, sync=False)  # can be rebuilt
+        self.docs = {}  # <classname>.id -> (checksum, {word: count}, size)
+        self.postings = {}  # class name -> {word: {<classname>.id: count}}
+        self.sizes = {}  # class name -> [number of objects, of words]
+        self.pending = {}  # <classname>.id -> object or None if deleted
+        self.unsaved = {}  # <classname>.id -> True, changed since save()
+
+    def load(self):
+        """reads the words saved in the journal"""
+        for key, data in self.journal.replay():
+            self.__remove(key)
+            if data is not None:
+                self.__add(key, data["sum"], data["words"])
+
+    def changed(self, key, obj):
+        """queues the new text of key: obj, its raw dict, or None if it
+        was deleted. Keys of classes without __search__ are ignored"""
+        if key[:key.find(".")] in self.fields:
+            self.pending[key] = obj
+
+    def retain(self, keys):
+        """queues the deletion of the indexed keys not in keys"""
+        for key in self.docs:
+            if key not in keys:
+                self.pending[key] = None
+
+    def text(self, key, obj):
+        """returns the text of the __search__ attributes of obj or its raw
+        dict, one per line"""
+        name = key[:key.find(".")]
+        attrs, defaults = self.fields[name], self.defaults[name]
+        if type(obj) is dict:
+            values = [obj.get(attr, default)
+                      for attr, default in zip(attrs, defaults)]
+        else:
+            values = [getattr(obj, attr, None) for attr in attrs]
+        return "\n".join(value for value in values if type(value) is str)
+
+    def refresh(self):
+        """applies the queued changes, tokenizing the changed texts only"""
+        pending, self.pending = self.pending, {}
+        for key, obj in pending.items():
+            if obj is None:
+                if key in self.docs:
+                    self.__remove(key)
+                    self.unsaved[key] = True
+                continue
+            text = self.text(key, obj)
+            checksum = zlib.crc32(text.encode())
+            doc = self.docs.get(key)
+            if doc is not None and doc[0] == checksum:
+                continue
+            self.__remove(key)
+            self.__add(key, checksum, Counter(tokenize(text)))
+            self.unsaved[key] = True
+
+    def save(self):
+        """appends the changes since the last save to the journal, or
+        rewrites it when most of it is out of date"""
+        self.write(self.take())
+
+    def take(self):
+        """applies the queued changes and returns those to save, for
+        write(), None if none. The index may change again meanwhile"""
+        self.refresh()
+        if not self.unsaved:
+            return None
+        docs = self.docs
+        rewrite = len(self.unsaved) * 2 > len(docs) or \
+            self.journal.records > 2 * len(docs) + 1000
+        if rewrite:
+            records = [(key, {"sum": doc[0], "words": doc[1]})
+                       for key, doc in docs.items()]
+        else:
+            records = [(key, {"sum": docs[key][0], "words": docs[key][1]}
+                        if key in docs else None) for key in self.unsaved]
+        self.unsaved.clear()
+        return rewrite, records
+
+    def write(self, changes):
+        """writes the changes returned by take() to the journal, rewriting
+        it if most of it was out of date"""
+        if changes is None:
+            return
+        rewrite, records = changes
+        if rewrite:
+            self.journal.rewrite(records)
+        else:
+            self.journal.append(records)
+
+    def search(self, name, query, limit=None):
+        """returns the keys of the objects of the class called name, every
+        class if None, holding words of query, best match first"""
+        self.refresh()
+        names = list(self.sizes) if name is None else [name]
+        stats = [self.sizes.get(name, (0, 0)) for name in names]
+        count, size = sum(n for n, _ in stats), sum(w for _, w in stats)
+        scale = K1 * B * count / size if size else 0
+        docs, scores = self.docs, {}
+        for word in set(tokenize(query)):
+            found = [self.postings.get(name, {}).get(word) for name in names]
+            found = [keys for keys in found if keys]
+            total = sum(map(len, found))  # the statistics of every class
+            idf = log(1 + (count - total + 0.5) / (total + 0.5))
+            for keys in found:
+                for key, hits in keys.items():
+                    norm = K1 * (1 - B) + scale * docs[key][2]
+                    scores[key] = scores.get(key, 0) + \
+                        idf * hits * (K1 + 1) / (hits + norm)
+        if limit is None:
+            return sorted(scores, key=scores.get, reverse=True)
+        return nlargest(limit, scores, key=scores.get)
+
+    def __add(self, key, checksum, words):
+        """files the {word: count} of key"""
+        size = sum(words.values())
+        self.docs[key] = (checksum, dict(words), size)
+        name = key[:key.find(".")]
+        postings = self.postings.setdefault(name, {})
+        for word, hits in words.items():
+            postings.setdefault(word, {})[key] = hits
+        sizes = self.sizes.setdefault(name, [0, 0])
+        sizes[0] += 1
+        sizes[1] += size
+
+    def __remove(self, key):
+        """removes the words of key"""
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        name = key[:key.find(".")]
+        postings = self.postings[name]
+        for word in doc[1]:
+            found = postings[word]
+            del found[key]
+            if not found:
+                del postings[word]
+        sizes = self.sizes[name]
+        sizes[0] -= 1
+        sizes[1] -= doc[2]
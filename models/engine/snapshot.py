@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""The snapshot module: the binary storage file format, memory-mapped so
+a single object is read without parsing the whole file
+    header   b"HBNBSNAP", version, number of records, offset of the index
+    records  a uint32 length then the JSON of the record, by key order
+    keys     the utf-8 keys, one after another
+    index    (key offset, key length, record offset, record length) of
+             every record, sorted by key
+A lookup is a binary search of the index, touching only the pages of the
+entries it compares and those of the record found"""
+import mmap
+import struct
+
+MAGIC = b"HBNBSNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")  # magic, version, count, index offset
+ENTRY = struct.Struct("<QIQI")  # key offset, length, record offset, length
+LENGTH = struct.Struct("<I")
+
+
+def write_snapshot(fil, entries):
+    """writes the (<classname>.id, JSON str) entries to the binary file
+    fil, which must be seekable, and returns their number"""
+    entries = sorted((key.encode(), data.encode()) for key, data in entries)
+    fil.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+    offset = HEADER.size
+    places = []
+    for key, data in entries:
+        fil.write(LENGTH.pack(len(data)))
+        fil.write(data)
+        places.append((offset + LENGTH.size, len(data)))
+        offset += LENGTH.size + len(data)
+    index = []
+    for (key, data), (place, size) in zip(entries, places):
+        fil.write(key)
+        index.append(ENTRY.pack(offset, len(key), place, size))
+        offset += len(key)
+    fil.write(b"".join(index))
+    fil.seek(0)
+    fil.write(HEADER.pack(MAGIC, VERSION, len(entries), offset))
+    fil.seek(0, 2)
+    return len(entries)
+
+
+class Snapshot:
+    """A snapshot file mapped in memory. Records are decoded one at a
+    time when looked up, straight from the mapping if the codec reads
+    buffers, from a copy of their bytes only otherwise"""
+
+    def __init__(self, path, codec):
+        """Snapshot constructor, raises ValueError if path is not a
+        snapshot
+        codec: decodes the records, from models.engine.codec"""
+        self.path = path
+        self.codec = codec
+        with open(path, "rb") as fil:
+            self.__map = mmap.mmap(fil.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__view = memoryview(self.__map)
+        try:
+            magic, version, self.__count, self.__index = \
+                HEADER.unpack_from(self.__map)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("not a snapshot: {}".format(path))
+
+    def __len__(self):
+        """the number of records"""
+        return self.__count
+
+    def __contains__(self, key):
+        """tells if key has a record"""
+        return self.__find(key.encode()) is not None
+
+    def get(self, key, default=None):
+        """returns the decoded record of key, default if there is none"""
+        entry = self.__find(key.encode())
+        if entry is None:
+            return default
+        return self.__record(entry)
+
+    def keys(self):
+        """yields the keys in order, only the index and keys are read"""
+        for i in range(self.__count):
+            key_at, key_len, at, size = self.__entry(i)
+            yield self.__map[key_at:key_at + key_len].decode()
+
+    def items(self):
+        """yields the (key, decoded record) pairs in key order"""
+        for i in range(self.__count):
+            entry = self.__entry(i)
+            key_at, key_len, at, size = entry
+            yield (self.__map[key_at:key_at + key_len].decode(),
+                   self.__record(entry))
+
+    def close(self):
+        """unmaps the file"""
+        self.__view.release()
+        self.__map.close()
+
+    def __entry(self, i):
+        """the index entry number i"""
+        return ENTRY.unpack_from(self.__map, self.__index + i * ENTRY.size)
+
+    def __find(self, key):
+        """the index entry of the utf-8 key, None if it has no record"""
+        low, high = 0, self.__count
+        data = self.__map
+        while low < high:
+            mid = (low + high) // 2
+            entry = self.__entry(mid)
+            found = data[entry[0]:entry[0] + entry[1]]
+            if found < key:
+                low = mid + 1
+            elif found > key:
+                high = mid
+            else:
+                return entry
+        return None
+
+    def __record(self, entry):
+        """the decoded record of an index entry"""
+        at, size = entry[2], entry[3]
+        if self.codec.buffers:
+            return self.codec.loads(self.__view[at:at + size])
+        return self.codec.loads(self.__map[at:at + size])
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""The spatial module: a grid index of the locations of the objects of a
+model class, for radius and nearest neighbour queries"""
+from math import asin, cos, degrees, pi, radians, sin, sqrt
+
+EARTH_RADIUS = 6371.0088  # mean radius, km
+DEGREE = EARTH_RADIUS * pi / 180  # km in a degree of latitude
+REALS = (int, float)
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """returns the great circle distance in km between two points"""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    hav = sin((lat2 - lat1) / 2) ** 2 + \
+        cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(hav)))
+
+
+def is_location(lat, lon):
+    """tells if lat, lon are the degrees of a point"""
+    return type(lat) in REALS and type(lon) in REALS and \
+        -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+class GridIndex:
+    """The __location__ (latitude, longitude) attributes of the objects of
+    one model class, filed in cells of cell x cell degrees. A radius query
+    only looks at the points of the cells around its center, so its cost
+    depends on the points nearby, not on the size of the store.
+    Objects with no valid location of their own are never found. Changes
+    are queued by changed() and applied by refresh(), like ColumnStore
+    does"""
+
+    def __init__(self, cls, cell=0.1):
+        """GridIndex constructor
+        cls: the model class, giving __location__ and the defaults
+        cell: the size of a cell in degrees"""
+        self.cls = cls
+        self.attrs = tuple(getattr(cls, "__location__", ()))
+        self.cell = cell
+        self.cells = {}  # (row, col) -> {<classname>.id: (lat, lon)}
+        self.points = {}  # <classname>.id -> its (row, col) cell
+        self.pending = {}  # <classname>.id -> object or None if deleted
+
+    def __len__(self):
+        """the number of points"""
+        return len(self.points)
+
+    def changed(self, key, obj):
+        """queues the new location of key: obj, its raw dict, or None if it
+        was deleted"""
+        self.pending[key] = obj
+
+    def read(self, obj):
+        """returns the (lat, lon) obj or its raw dict was given, None for
+        those left to the defaults of the class: a place never located is
+        not at (0, 0)"""
+        lat, lon = self.attrs
+        if type(obj) is not dict:
+            obj = obj._attributes()
+        return obj.get(lat), obj.get(lon)
+
+    def refresh(self):
+        """applies the queued changes"""
+        pending, self.pending = self.pending, {}
+        cells, points, size = self.cells, self.points, self.cell
+        for key, obj in pending.items():
+            if key in points:
+                self.__remove(key)
+            if obj is None:
+                continue
+            lat, lon = self.read(obj)
+            if type(lat) not in REALS or type(lon) not in REALS or \
+                    not -90 <= lat <= 90 or not -180 <= lon <= 180:
+                continue
+            cell = int((lat + 90) // size), int((lon + 180) // size)
+            bucket = cells.get(cell)
+            if bucket is None:
+                cells[cell] = bucket = {}
+            bucket[key] = (lat, lon)
+            points[key] = cell
+
+    def near(self, lat, lon, km):
+        """returns the (distance, key) of the points within km of lat, lon,
+        closest first"""
+        self.refresh()
+        found = []
+        for cell in self.__around(lat, lon, km):
+            for key, point in self.cells.get(cell, {}).items():
+                dist = distance(lat, lon, *point)
+                if dist <= km:
+                    found.append((dist, key))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, count=1):
+        """returns the (distance, key) of the count points closest to
+        lat, lon, closest first. The radius searched doubles until enough
+        points are found"""
+        self.refresh()
+        km = self.cell * DEGREE
+        while True:
+            found = self.near(lat, lon, km)
+            if len(found) >= count or km > EARTH_RADIUS * pi:
+                return found[:count]
+            km *= 2
+
+    def __around(self, lat, lon, km):
+        """the cells that may hold points within km of lat, lon"""
+        cell = self.cell
+        angle = km / EARTH_RADIUS  # radians
+        dlat = degrees(angle)
+        low, high = lat - dlat, lat + dlat
+        if low <= -90 or high >= 90 or sin(angle) >= cos(radians(lat)):
+            low, high, dlon = max(low, -90.0), min(high, 90.0), 180.0
+        else:  # the widest longitudes of the circle
+            dlon = degrees(asin(sin(angle) / cos(radians(lat))))
+        rows = range(int((low + 90) // cell), int((high + 90) // cell) + 1)
+        columns = int(360 / cell + 0.5)
+        first = int((lon - dlon + 180) // cell)
+        last = int((lon + dlon + 180) // cell)
+        if last - first + 1 >= columns:
+            cols = range(columns + 1)  # +1: the cell of lon = 180
+        else:  # may wrap around the antimeridian
+            cols = {col % columns for col in range(first, last + 1)}
+            if columns - 1 in cols or 0 in cols:
+                cols.add(columns)
+        if len(rows) * len(cols) > len(self.cells):
+            return [(row, col) for row, col in self.cells
+                    if row in rows and col in cols]
+        return [(row, col) for row in rows for col in cols]
+
+    def __remove(self, key):
+        """removes the point of key"""
+        cell = self.points.pop(key, None)
+        if cell is not None:
+            points = self.cells[cell]
+            del points[key]
+            if not points:
+                del self.cells[cell]
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+"""The streaming module: reads the storage files one record at a time
+Two formats are supported:
+    json  - the single {<classname>.id: {...}, ...} dict of file.json
+    jsonl - one {...} record per line, the key being <__class__>.<id>"""
+from models.engine.atomic import atomic_open
+import json
+import os
+
+FORMATS = {".json": "json", ".jsonl": "jsonl"}
+
+
+def iter_json_object(fil, size=1 << 16):
+    """yields the (key, value) pairs of the JSON object in the text file
+    fil without loading it whole: only one value at a time is in memory"""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def skip():
+        """skips whitespace, reading more text as needed"""
+        nonlocal buf, pos, eof
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            buf, pos = fil.read(size), 0
+            eof = not buf
+
+    def parse():
+        """decodes the value at pos, reading more text as needed. A value
+        is complete if text follows it, 123 could be the start of 1234"""
+        nonlocal buf, pos, eof
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except ValueError:
+                if eof:
+                    raise
+            more = fil.read(size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+
+    if skip() != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    if skip() == "}":
+        return
+    while True:
+        if skip() != '"':
+            raise ValueError("expected a key")
+        key = parse()
+        if skip() != ":":
+            raise ValueError("expected ':' after {!r}".format(key))
+        pos += 1
+        skip()
+        yield key, parse()
+        char = skip()
+        pos += 1
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError("expected ',' or '}' after {!r}".format(key))
+
+
+def iter_json_lines(fil, loads=json.loads):
+    """yields the (<__class__>.<id>, record) of each line of fil"""
+    for line in fil:
+        if line.strip():
+            record = loads(line)
+            yield "{}.{}".format(record["__class__"], record["id"]), record
+
+
+def file_format(path):
+    """returns the format of path from its extension, json by default"""
+    return FORMATS.get(os.path.splitext(path)[1], "json")
+
+
+def migrate(src, dst):
+    """copies the records of src into dst, one at a time, converting
+    between the formats given by their extensions. Returns the number of
+    records copied. dst is replaced atomically"""
+    count = 0
+    with open(src, "r") as fin, atomic_open(dst) as fout:
+        if file_format(src) == "jsonl":
+            records = iter_json_lines(fin)
+        else:
+            records = iter_json_object(fin)
+        if file_format(dst) == "jsonl":
+            for key, record in records:
+                fout.write(json.dumps(record) + "\n")
+                count += 1
+        else:
+            fout.write("{")
+            for key, record in records:
+                if count:
+                    fout.write(", ")
+                fout.write("{}: {}".format(json.dumps(key),
+                                           json.dumps(record)))
+                count += 1
+            fout.write("}")
+    return count
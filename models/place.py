@@ -5,6 +5,11 @@ from models.base_model import BaseModel
 
 class Place(BaseModel):
     """The Place class"""
+    __indexes__ = ("city_id", "user_id")  # looked up by storage.find()
+    __columns__ = ("number_rooms", "number_bathrooms", "max_guest",
+                   "price_by_night", "latitude", "longitude")  # filter()
+    __location__ = ("latitude", "longitude")  # looked up by storage.near()
+    __search__ = ("name", "description")  # words found by storage.search()
     city_id = ""  # will be City.id
     user_id = ""  # will be User.id
     name = ""
@@ -5,6 +5,8 @@ from models.base_model import BaseModel
 
 class Review(BaseModel):
     """The Review class"""
+    __indexes__ = ("place_id", "user_id")  # looked up by storage.find()
+    __search__ = ("text",)  # words found by storage.search()
     place_id = ""  # will be Place.id
     user_id = ""  # will be User.id
     text = ""
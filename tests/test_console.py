@@ -3,11 +3,14 @@
 import unittest
 from unittest.mock import patch
 from io import StringIO
-from console import HBNBCommand
+from console import HBNBCommand, call_args, extract_words, main
 from models import storage
 from models.engine.file_storage import FileStorage
+from models.engine.locking import ConflictError
+import json
 import re
 import os
+import tempfile
 
 
 class Helpers(unittest.TestCase):
@@ -26,10 +29,12 @@ class Helpers(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         """This runs once after all of the tests are done"""
-        try:
-            os.unlink("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.search"):
+            try:
+                os.unlink(name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__text = None  # built by the search tests
         try:
             os.rename("tmp.json", "file.json")
         except IOError:
@@ -320,6 +325,27 @@ class TestHBNBCommand(Helpers):
         for model, uuid in zip(self.models, uuids):
             self.t_cmd_output_test(f'all {model}', uuid)
 
+    def test_all_paging(self):
+        """Tests for the pages and formats of the all command"""
+        self.t_cmd_output_test("all User limit=x", "** invalid option: ")
+        self.t_cmd_output_test("all User format=xml", "** invalid option: ")
+        self.t_cmd_output_test("all size=1", "** invalid option: ")
+        self.t_cmd_output_test("all User after=User.0",
+                               "** no instance found **")
+        uuids = [self.t_create_model("State") for i in range(3)]
+        keys = [key for key in storage.all("State")]
+        output = self.t_cmd_output("State.all(limit=2)").splitlines()
+        self.assertEqual(output[1], f"** next: after={keys[1]} **")
+        output = self.t_cmd_output(f"all State after={keys[1]} "
+                                   "format=lines")
+        self.assertEqual(len(output.splitlines()), len(keys) - 2)
+        self.assertIn(keys[-1].split(".")[1], output)
+        output = self.t_cmd_output("all State limit=1 offset=1 format=json")
+        self.assertEqual(json.loads(output.splitlines()[0])["id"],
+                         keys[1].split(".")[1])
+        for uuid in uuids:
+            self.t_destroy_model(f"State {uuid}")
+
     def test_count_command(self):
         """Tests for the count command"""
 
@@ -352,6 +378,288 @@ class TestHBNBCommand(Helpers):
         for model in self.models:
             self.t_cmd_output_test(f'count {model}', "0")
 
+    def test_batch_commands(self):
+        """Tests for the begin, commit and rollback commands"""
+        self.t_cmd_output_test("commit", "** no batch started **")
+        self.t_cmd_output_test("rollback", "** no batch started **")
+        self.t_cmd_assert_false("begin")
+        self.assertTrue(storage.batching)
+        uuid = self.t_create_model("City")
+        self.t_cmd_assert_false("commit")
+        self.assertFalse(storage.batching)
+        self.t_cmd_output_test(f"show City {uuid}", uuid)
+
+        self.t_cmd_assert_false("begin")
+        self.t_cmd_assert_false(f'update City {uuid} name "Kampala"')
+        other = self.t_create_model("City")
+        self.t_cmd_assert_false("rollback")
+        self.assertFalse(storage.batching)
+        self.assertNotIn("Kampala", self.t_cmd_output(f"show City {uuid}"))
+        self.t_cmd_output_test(f"show City {other}", "** no instance found **")
+        self.t_destroy_model(f"City {uuid}")
+
+    def test_near_command(self):
+        """Tests for the near command"""
+        self.t_cmd_output_test("near", "** class name missing **")
+        self.t_cmd_output_test("near Nowhere", "** class doesn't exist **")
+        self.t_cmd_output_test("near User", "** class has no location **")
+        self.t_cmd_output_test("near Place", "** latitude missing **")
+        self.t_cmd_output_test("near Place 1", "** longitude missing **")
+        self.t_cmd_output_test("near Place 1 2", "** distance missing **")
+        self.t_cmd_output_test("near Place 1 x 3", "** invalid number **")
+        uuid = self.t_create_model("Place")
+        self.t_cmd_assert_false(f"update Place {uuid} latitude 40.7")
+        self.t_cmd_assert_false(f"update Place {uuid} longitude -74.0")
+        self.t_cmd_output_test("Place.near(40.71, -74.01, 5)", uuid)
+        self.t_cmd_assert_equal("Place.near(0, 0, 5)", "[]")
+        self.t_destroy_model(f"Place {uuid}")
+
+    def test_search_command(self):
+        """Tests for the search command"""
+        self.t_cmd_output_test("search", "** class name missing **")
+        self.t_cmd_output_test("search Nowhere", "** class doesn't exist **")
+        self.t_cmd_output_test("search User", "** class is not searchable **")
+        self.t_cmd_output_test("search Place", "** query missing **")
+        uuid = self.t_create_model("Review")
+        self.t_cmd_assert_false(f'update Review {uuid} text "Quiet loft"')
+        self.t_cmd_output_test('Review.search("quiet")', uuid)
+        self.t_cmd_output_test("search Review loft", uuid)
+        self.t_cmd_assert_equal("search Review castle", "[]")
+        self.t_destroy_model(f"Review {uuid}")
+
+    def test_where_command(self):
+        """Tests for the where and explain commands"""
+        self.t_cmd_output_test("where", "** class name missing **")
+        self.t_cmd_output_test("where Nowhere", "** class doesn't exist **")
+        self.t_cmd_output_test("Nowhere.where()", "** class doesn't exist **")
+        self.t_cmd_output_test("explain", "** query missing **")
+        self.t_cmd_output_test("where Place max_guest >",
+                               "** invalid query: ")
+        uuid = self.t_create_model("Place")
+        self.t_cmd_assert_false(f"update Place {uuid} max_guest 7")
+        self.t_cmd_output_test("where Place max_guest >= 7", uuid)
+        self.t_cmd_output_test(
+            "Place.where(max_guest == 7).order_by(-name).limit(1)", uuid)
+        self.t_cmd_assert_equal("Place.where(max_guest > 7)", "[]")
+        self.t_cmd_output_test("explain Place.where(max_guest > 7)",
+                               "Place: ")
+        self.t_destroy_model(f"Place {uuid}")
+
+    def test_import_export_commands(self):
+        """Tests for the import and export commands"""
+        for cmd in ("import", "export"):
+            self.t_cmd_output_test(cmd, "** class name missing **")
+            self.t_cmd_output_test(f"{cmd} Nowhere",
+                                   "** class doesn't exist **")
+            self.t_cmd_output_test(f"{cmd} City", "** file missing **")
+            self.t_cmd_output_test(f"{cmd} City cities.txt",
+                                   "** file must be .csv or .jsonl **")
+        self.t_cmd_output_test("import City nowhere.csv",
+                               "** file doesn't exist **")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cities.csv")
+            with open(path, "w") as fil:
+                fil.write("id,name\nc-import,Lagos\n")
+            self.t_cmd_assert_equal(f"import City {path}", "1")
+            self.t_cmd_output_test("show City c-import", "Lagos")
+            out = os.path.join(tmp, "cities.jsonl")
+            self.t_cmd_assert_equal(f"export City {out}",
+                                    str(storage.count("City")))
+            with open(out) as fil:
+                self.assertIn('"c-import"', fil.read())
+            with open(path, "w") as fil:
+                fil.write("id,created_at\nc-bad,yesterday\n")
+            self.t_cmd_output_test(f"import City {path}",
+                                   "** invalid record: line 2: ")
+        self.t_destroy_model("City c-import")
+
+    def test_run_batch(self):
+        """Tests running a script in batch mode"""
+        errors = StringIO()
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            with patch("sys.stdout", new=StringIO()) as out:
+                failed = HBNBCommand().run_batch(
+                    ["create Amenity", "", "# a comment", "show Amenity",
+                     "Amenity.count()", "quit", "create Amenity"],
+                    errors=errors)
+        self.assertEqual(failed, 1)
+        self.assertEqual(flush.call_count, 1)
+        uuid, error, count = out.getvalue().splitlines()
+        self.assertEqual(errors.getvalue(),
+                         "line 4: show Amenity: ** instance id missing **\n")
+        self.assertEqual(count, str(storage.count("Amenity")))
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().run_batch(["create Amenity"] * 5, 2)
+        self.assertEqual(flush.call_count, 3)
+        for obj in list(storage.all("Amenity").values()):
+            self.t_destroy_model(f"Amenity {obj.id}")
+
+    def test_run_batch_failure(self):
+        """Tests that a failing line of a script only drops its own
+        changes, the script going on in the same batch"""
+        user = self.t_create_model("User")
+        place = self.t_create_model("Place")
+        errors = StringIO()
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            with patch("sys.stdout", new=StringIO()):
+                failed = HBNBCommand().run_batch(
+                    [f"update User {user} first_name Kept",
+                     f"update User {user} last_name Lost; "
+                     f"update Place {place} number_rooms abc",
+                     f"update User {user} email after"], errors=errors)
+        self.assertEqual(failed, 1)
+        self.assertTrue(errors.getvalue().startswith("line 2: "))
+        self.assertEqual(flush.call_count, 1)
+        with open("file.json") as fil:
+            saved = json.load(fil)[f"User.{user}"]
+        self.assertEqual(saved["first_name"], "Kept")
+        self.assertEqual(saved["email"], "after")
+        self.assertNotIn("last_name", saved)
+        self.t_destroy_model(f"User {user}")
+        self.t_destroy_model(f"Place {place}")
+
+    def test_conflict(self):
+        """Tests that a save conflicting with another process is reported
+        without ending the console"""
+        conflict = ConflictError(["User.taken"])
+        errors = StringIO()
+        with patch.object(storage, "flush", side_effect=conflict), \
+                patch("sys.stdout", new=StringIO()):
+            failed = HBNBCommand().run_batch(["create User"], errors=errors)
+        self.assertEqual(failed, 1)
+        self.assertEqual(errors.getvalue(),
+                         "** conflict: changed by another process: "
+                         "User.taken **\n")
+        with patch.object(storage, "flush", side_effect=conflict), \
+                patch("sys.stdout", new=StringIO()) as out:
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            self.assertFalse(HBNBCommand().onecmd(
+                "create User; create User"))
+        self.assertEqual(out.getvalue().splitlines()[-1],
+                         "** conflict: changed by another process: "
+                         "User.taken **")
+        storage.sync()
+        for obj in list(storage.all("User").values()):
+            storage.delete(obj)
+        storage.save()
+
+    def test_parsing(self):
+        """Tests splitting command lines and call arguments"""
+        self.assertEqual(extract_words('a  "b c" d"e f"g "x\\"y\\\\"'),
+                         ["a", "b c", "de fg", 'x"y\\'])
+        self.assertEqual(extract_words("a b"), ["a", "b"])
+        self.assertEqual(call_args('"a, b", 3 , {"k": [1, 2]}'),
+                         '"a, b" 3 {"k": [1, 2]}')
+        self.assertEqual(call_args(""), "")
+        uuid = self.t_create_model("Place")
+        for cmd in (f'Place.update("{uuid}", "name", "a, b")',
+                    f"Place.update(\"{uuid}\", {{'name': 'a, b', "
+                    "'rules': {'pets': False}}})",
+                    f'update Place {uuid} {{"name":"a, b","rules":'
+                    '{"pets":false}, "amenity_ids": ["x", "y"]}',
+                    f'update Place {uuid} max_guest "3"'):
+            with self.subTest(cmd=cmd):
+                self.t_cmd_assert_false(cmd)
+        obj = storage.all("Place")[f"Place.{uuid}"]
+        self.assertEqual((obj.name, obj.rules, obj.amenity_ids,
+                          obj.max_guest), ("a, b", {"pets": False},
+                                           ["x", "y"], 3))
+        self.t_cmd_assert_false(f'update Place {uuid} amenity_ids ["z"]')
+        self.assertEqual(obj.amenity_ids, ["z"])
+        self.t_cmd_assert_false(f'update Place {uuid} name [draft]')
+        self.assertEqual(obj.name, "[draft]")
+        self.t_cmd_output_test(f'Place.update("{uuid}", {{"bad": }})',
+                               "** invalid dictionary **")
+        self.assertFalse(hasattr(obj, '{bad:'))
+        self.t_destroy_model(f"Place {uuid}")
+
+    def test_command_sequence(self):
+        """Tests ; separated commands run in one storage batch"""
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            with patch("sys.stdout", new=StringIO()) as out:
+                HBNBCommand().onecmd(
+                    'create State; create State ;; State.count()')
+        self.assertEqual(flush.call_count, 1)
+        first, second, count = out.getvalue().splitlines()
+        self.assertEqual(count, str(storage.count("State")))
+        with patch("sys.stdout", new=StringIO()) as out:
+            HBNBCommand().onecmd(f'update State {first} name "a; b"; '
+                                 f'State.show("{first}")')
+        self.assertIn("'name': 'a; b'", out.getvalue())
+        with patch("sys.stdout", new=StringIO()) as out:
+            HBNBCommand().onecmd(f"update State {first} name O'Brien; "
+                                 f"show State {first}")
+        self.assertIn("'name': \"O'Brien\"", out.getvalue())
+        with patch("sys.stdout", new=StringIO()) as out:
+            self.assertTrue(HBNBCommand().onecmd("quit; count State"))
+        self.assertEqual(out.getvalue(), "")
+        self.t_destroy_model(f"State {first}")
+        self.t_destroy_model(f"State {second}")
+
+    def test_update_many(self):
+        """Tests updating several instances in one command"""
+        ids = [self.t_create_model("City") for _ in range(2)]
+        with patch.object(storage, "flush", wraps=storage.flush) as flush:
+            self.assertEqual(self.t_cmd_output(
+                f'City.update_many([{{"id": "{ids[0]}", "name": "A, b", '
+                f'"rank": 3}}, {{"id": "{ids[1]}", "name": "C"}}])'), "")
+        self.assertEqual(flush.call_count, 1)
+        objs = storage.all("City")
+        self.assertEqual((objs[f"City.{ids[0]}"].name,
+                          objs[f"City.{ids[0]}"].rank), ("A, b", 3))
+        self.assertEqual(objs[f"City.{ids[1]}"].name, "C")
+        self.assertEqual(self.t_cmd_output(
+            f"update_many City [{{'id': '{ids[0]}', 'name': 'Z'}}, "
+            "{'id': 'nope', 'name': 'Z'}]"),
+            "** no instance found: nope **")
+        self.assertEqual(objs[f"City.{ids[0]}"].name, "A, b")
+        for cmd, error in (
+                ("update_many", "** class name missing **"),
+                ("update_many Nope []", "** class doesn't exist **"),
+                ("update_many City", "** updates missing **"),
+                ('update_many City [{"name": "x"}]',
+                 '** updates should be a list of {"id": ...} **'),
+                ("City.update_many({)",
+                 '** updates should be a list of {"id": ...} **')):
+            with self.subTest(cmd=cmd):
+                self.assertEqual(self.t_cmd_output(cmd), error)
+        for id in ids:
+            self.t_destroy_model(f"City {id}")
+
+    def test_batch_option(self):
+        """Tests the --batch option"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "script")
+            with open(path, "w") as fil:
+                fil.write("count Nope\n")
+            with patch("sys.stdout", new=StringIO()), \
+                    patch("sys.stderr", new=StringIO()) as errors:
+                self.assertEqual(main(["--batch", path]), 1)
+            self.assertIn("line 1: count Nope", errors.getvalue())
+            with open(path, "w") as fil:
+                fil.write("count User\n")
+            with patch("sys.stdout", new=StringIO()) as out:
+                self.assertEqual(main(["--batch", path,
+                                       "--flush-every", "10"]), 0)
+            self.assertEqual(out.getvalue().strip(),
+                             str(storage.count("User")))
+
+    def test_migrate_command(self):
+        """Tests for the migrate command"""
+        self.t_cmd_output_test("migrate", "** source file missing **")
+        self.t_cmd_output_test("migrate file.json",
+                               "** destination file missing **")
+        self.t_cmd_output_test("migrate nowhere.json file.jsonl",
+                               "** source file doesn't exist **")
+        uuid = self.t_create_model("State")
+        count = str(len(storage.all()))
+        self.t_cmd_assert_equal("migrate file.json tmp.jsonl", count)
+        with open("tmp.jsonl") as fil:
+            self.assertIn(uuid, fil.read())
+        os.unlink("tmp.jsonl")
+        self.t_destroy_model(f"State {uuid}")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -114,3 +114,15 @@ class TestBaseModel(unittest.TestCase):
         self.assertNotEqual(old_updated_at, new_updated_at)
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.save.called)
+
+    @mock.patch('models.storage')
+    def test_setattr_touches(self, mock_storage):
+        """Test that changing an attribute tells the storage"""
+        inst = BaseModel()
+        self.assertFalse(mock_storage.touch.called)
+        inst.name = "Holberton"
+        mock_storage.touch.assert_called_once_with(inst)
+        del inst.name
+        self.assertEqual(mock_storage.touch.call_count, 2)
+        inst2 = BaseModel(**inst.to_dict())
+        self.assertEqual(mock_storage.touch.call_count, 2)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""The models compact test module"""
+from models import storage
+from models.compact import compact, declared
+from models.place import Place
+from models.review import Review
+import unittest
+
+
+class TestCompact(unittest.TestCase):
+    """test for the compact variants of the model classes"""
+
+    def setUp(self):
+        """builds a plain and a compact Review of the same record"""
+        self.record = {"id": "56", "created_at": "2017-09-28T21:05:54.119427",
+                       "updated_at": "2017-09-28T21:05:54.119427",
+                       "place_id": "1234", "text": "Nice",
+                       "__class__": "Review"}
+        self.plain = Review(**self.record)
+        self.obj = compact(Review)(**self.record)
+
+    def test_variant(self):
+        """test that the variant is a slotted subclass of the same name"""
+        cls = compact(Review)
+        self.assertIs(compact(Review), cls)
+        self.assertIs(compact(cls), cls)
+        self.assertTrue(issubclass(cls, Review))
+        self.assertEqual(cls.__name__, "Review")
+        self.assertIn("place_id", cls.__slots__)
+        self.assertIsInstance(self.obj, Review)
+
+    def test_declared(self):
+        """test the attribute names taken from the class"""
+        self.assertEqual(declared(Review), ["id", "created_at", "updated_at",
+                                            "place_id", "user_id", "text"])
+        self.assertIn("amenity_ids", declared(Place))
+        self.assertNotIn("__indexes__", declared(Place))
+
+    def test_to_dict_str(self):
+        """test that to_dict and str match the plain object's"""
+        self.assertEqual(self.obj.to_dict(), self.record)
+        self.assertEqual(str(self.obj), str(self.plain))
+
+    def test_defaults(self):
+        """test that unset declared attributes give the class default"""
+        self.assertEqual(self.obj.user_id, "")
+        self.assertNotIn("user_id", self.obj.to_dict())
+        with self.assertRaises(AttributeError):
+            self.obj.first_name
+
+    def test_dynamic(self):
+        """test attributes that are not declared"""
+        self.obj.rating = 5
+        self.assertEqual(self.obj.rating, 5)
+        self.assertEqual(self.obj.to_dict()["rating"], 5)
+        obj = compact(Review)(**self.obj.to_dict())
+        self.assertEqual(obj.to_dict(), self.obj.to_dict())
+        del obj.rating
+        self.assertNotIn("rating", obj.to_dict())
+
+    def test_shared_values(self):
+        """test that ids and equal timestamps are stored once"""
+        other = compact(Review)(**dict(self.record, id="x",
+                                       place_id="12" + "34"[:2]))
+        self.assertIs(other.place_id, self.obj.place_id)
+        self.assertIs(self.obj.updated_at, self.obj.created_at)
+
+    def test_new(self):
+        """test that a new compact object is stored and tracked"""
+        obj = compact(Review)()
+        key = "Review." + obj.id
+        self.assertIs(storage.all()[key], obj)
+        storage.delete(obj)
+
+
+if __name__ == "__main__":
+    unittest.main()
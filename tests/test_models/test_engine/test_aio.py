@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""The models engine aio test module"""
+from models.engine.aio import Coalescer, paced
+import asyncio
+import threading
+import time
+import unittest
+
+
+class TestCoalescer(unittest.TestCase):
+    """test for Coalescer class"""
+
+    def setUp(self):
+        """counts the writes"""
+        self.writes = 0
+        self.fail = False
+
+    def write(self):
+        """counts a write taking a while, raising if asked to"""
+        time.sleep(0.05)
+        if self.fail:
+            raise OSError("disk full")
+        self.writes += 1
+        return threading.get_ident()
+
+    def test_coalesce(self):
+        """test that saves asked for during a write share the next one"""
+        coalescer = Coalescer(self.write)
+
+        async def main():
+            """saves once then ten times while it writes"""
+            first = asyncio.ensure_future(coalescer.save())
+            await asyncio.sleep(0.01)
+            await asyncio.gather(first, *(coalescer.save()
+                                          for i in range(10)))
+            return await coalescer.save()
+
+        thread = asyncio.run(main())
+        self.assertEqual(self.writes, 3)
+        self.assertNotEqual(thread, threading.get_ident())
+
+    def test_error(self):
+        """test that every caller of a failed write gets its error"""
+        coalescer = Coalescer(self.write)
+        self.fail = True
+
+        async def main():
+            """saves twice at once"""
+            return await asyncio.gather(coalescer.save(), coalescer.save(),
+                                        return_exceptions=True)
+
+        errors = asyncio.run(main())
+        self.assertEqual([type(error) for error in errors], [OSError] * 2)
+        self.fail = False
+        asyncio.run(coalescer.save())
+        self.assertEqual(self.writes, 1)
+
+    def test_cancel(self):
+        """test that cancelling a caller does not cancel the write"""
+        coalescer = Coalescer(self.write)
+
+        async def main():
+            """cancels one of two callers"""
+            first = asyncio.ensure_future(coalescer.save())
+            second = asyncio.ensure_future(coalescer.save())
+            await asyncio.sleep(0.01)
+            first.cancel()
+            await second
+
+        asyncio.run(main())
+        self.assertEqual(self.writes, 1)
+
+
+class TestPaced(unittest.TestCase):
+    """test for paced"""
+
+    def test_paced(self):
+        """test that other tasks run during the iteration"""
+        ticks = []
+
+        async def tick():
+            """counts its turns"""
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            """iterates while tick runs"""
+            ticker = asyncio.ensure_future(tick())
+            await asyncio.sleep(0)
+            seen = [(item, len(ticks)) async for item in paced(range(6), 2)]
+            ticker.cancel()
+            return seen
+
+        seen = asyncio.run(main())
+        self.assertEqual([item for item, count in seen], list(range(6)))
+        self.assertEqual([count for item, count in seen], [1, 1, 2, 2, 3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""The models engine atomic test module"""
+from models.engine.atomic import atomic_open
+import os
+import tempfile
+import unittest
+
+
+class TestAtomicOpen(unittest.TestCase):
+    """test for atomic_open"""
+
+    def setUp(self):
+        """creates a file in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        with open(self.path, "w") as fil:
+            fil.write("old")
+
+    def tearDown(self):
+        """removes the temporary directory"""
+        self.tmp.cleanup()
+
+    def content(self):
+        """the content of the file"""
+        with open(self.path) as fil:
+            return fil.read()
+
+    def test_replace(self):
+        """test that the file is replaced when the block ends"""
+        with atomic_open(self.path) as fil:
+            fil.write("new")
+            self.assertEqual(self.content(), "old")
+        self.assertEqual(self.content(), "new")
+        self.assertEqual(os.listdir(self.tmp.name), ["file.json"])
+
+    def test_error(self):
+        """test that the file is untouched when the block raises"""
+        with self.assertRaises(ValueError):
+            with atomic_open(self.path) as fil:
+                fil.write("half")
+                raise ValueError
+        self.assertEqual(self.content(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["file.json"])
+
+    def test_new_file(self):
+        """test creating a file and keeping its mode"""
+        path = os.path.join(self.tmp.name, "other.json")
+        with atomic_open(path) as fil:
+            fil.write("{}")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+        os.chmod(path, 0o600)
+        with atomic_open(path, "wb") as fil:
+            fil.write(b"[]")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""The models engine bulk test module"""
+from datetime import datetime
+from models.engine.bulk import (convert, export_file, file_format,
+                                import_file, validate)
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+import json
+import os
+import tempfile
+import unittest
+
+CSV = '''id,name,number_rooms,latitude,amenity_ids,created_at
+p1,"Loft, ""big""",3,1.5,"[""a1""]",2017-09-28T21:05:54.119427
+p2,"Two
+lines",,2,,
+p3,Tiny,1,0,[],
+'''
+
+
+class TestValidate(unittest.TestCase):
+    """test for the record conversions"""
+
+    def test_convert(self):
+        """test that values are parsed to the declared types"""
+        self.assertEqual(convert("3", int), 3)
+        self.assertEqual(convert(3, float), 3.0)
+        self.assertEqual(convert("1.5", float), 1.5)
+        self.assertEqual(convert('["a"]', list), ["a"])
+        self.assertEqual(convert(7, str), 7)
+        for value, kind in (("x", int), ("1.5", int), ("{}", list),
+                            (True, int), ([], float)):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                convert(value, kind)
+
+    def test_validate(self):
+        """test the ids, the timestamps and the classes of records"""
+        now = datetime.now()
+        types = {"number_rooms": int}
+        kwargs = validate({"number_rooms": "2", "x": ""}, "Place", types,
+                          now)
+        self.assertEqual(kwargs["number_rooms"], 2)
+        self.assertNotIn("x", kwargs)
+        self.assertEqual(kwargs["created_at"], now)
+        self.assertEqual(len(kwargs["id"]), 36)
+        for record in ({"__class__": "User"}, {"id": 1},
+                       {"updated_at": "yesterday"}, {"number_rooms": "x"}):
+            with self.subTest(record=record), self.assertRaises(ValueError):
+                validate(record, "Place", types, now)
+
+    def test_file_format(self):
+        """test the formats given by the extensions"""
+        self.assertEqual(file_format("a/b.csv"), "csv")
+        self.assertEqual(file_format("b.jsonl"), "jsonl")
+        with self.assertRaises(ValueError):
+            file_format("b.json")
+
+
+class TestImportExport(unittest.TestCase):
+    """test for import_file and export_file"""
+
+    def setUp(self):
+        """points the storage at a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = self.file("file.json")
+        FileStorage._FileStorage__objects = {}
+        self.strg = FileStorage()
+
+    def tearDown(self):
+        """restores the storage"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        FileStorage._FileStorage__dirty.clear()
+        self.tmp.cleanup()
+
+    def file(self, name, text=None):
+        """the path of name in the temporary directory, written if text"""
+        path = os.path.join(self.tmp.name, name)
+        if text is not None:
+            with open(path, "w") as fil:
+                fil.write(text)
+        return path
+
+    def saved_ids(self):
+        """the keys of the storage file"""
+        with open(self.file("file.json")) as fil:
+            return sorted(json.load(fil))
+
+    def test_import_csv(self):
+        """test a CSV import, parsed by a pool, written once"""
+        path = self.file("places.csv", CSV)
+        self.assertEqual(import_file(self.strg, Place, path, workers=2,
+                                     chunk=1), 3)
+        objs = self.strg.all(Place)
+        loft, two = objs["Place.p1"], objs["Place.p2"]
+        self.assertEqual(loft.name, 'Loft, "big"')
+        self.assertEqual(loft.amenity_ids, ["a1"])
+        self.assertEqual((loft.number_rooms, loft.latitude), (3, 1.5))
+        self.assertEqual(loft.created_at.year, 2017)
+        self.assertEqual(two.name, "Two\nlines")
+        self.assertEqual((two.number_rooms, two.latitude), (0, 2.0))
+        self.assertNotIn("number_rooms", two.__dict__)
+        self.assertEqual(self.saved_ids(), ["Place.p1", "Place.p2",
+                                            "Place.p3"])
+
+    def test_invalid(self):
+        """test that nothing is added when a record is invalid"""
+        User()
+        self.strg.save()
+        path = self.file("places.jsonl", '{"id": "p1"}\n\n'
+                         '{"id": "p2", "max_guest": "many"}\n')
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                with self.assertRaisesRegex(ValueError, "^line 3: "):
+                    import_file(self.strg, Place, path, workers, chunk=1)
+                self.assertEqual(self.strg.count(Place), 0)
+        self.assertEqual(len(self.saved_ids()), 1)
+
+    def test_round_trip(self):
+        """test that exported objects are imported back as they were"""
+        import_file(self.strg, Place, self.file("places.csv", CSV))
+        self.strg.all()["Place.p3"].extra = "kept in JSON lines"
+        before = {key: obj.to_dict() for key, obj in self.strg.all().items()}
+        for name in ("out.jsonl", "out.csv"):
+            with self.subTest(name=name):
+                self.assertEqual(export_file(self.strg, Place,
+                                             self.file(name)), 3)
+                FileStorage._FileStorage__objects = {}
+                strg = FileStorage()
+                import_file(strg, Place, self.file(name))
+                after = {key: obj.to_dict()
+                         for key, obj in strg.all().items()}
+                if name == "out.csv":
+                    del before["Place.p3"]["extra"]
+                self.assertEqual(after, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
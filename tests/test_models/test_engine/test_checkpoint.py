@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""The models engine checkpoint test module"""
+from models.engine.checkpoint import Checkpointer
+import time
+import unittest
+
+
+class TestCheckpointer(unittest.TestCase):
+    """test for Checkpointer class"""
+
+    def setUp(self):
+        """counts the flushes"""
+        self.flushes = 0
+        self.fail = False
+
+    def flush(self):
+        """counts a flush, raising if asked to"""
+        if self.fail:
+            raise OSError("disk full")
+        self.flushes += 1
+
+    def test_coalesce(self):
+        """test that many requests cost one flush"""
+        checkpointer = Checkpointer(self.flush, 60)
+        for i in range(100):
+            checkpointer.request()
+        checkpointer.checkpoint()
+        checkpointer.checkpoint()
+        self.assertEqual(self.flushes, 1)
+
+    def test_thread(self):
+        """test that the thread flushes requested saves"""
+        checkpointer = Checkpointer(self.flush, 0.01)
+        checkpointer.start()
+        checkpointer.request()
+        for i in range(200):
+            if self.flushes:
+                break
+            time.sleep(0.01)
+        checkpointer.stop()
+        self.assertEqual(self.flushes, 1)
+        self.assertFalse(checkpointer.is_alive())
+
+    def test_stop_flushes(self):
+        """test that stopping flushes what is pending"""
+        checkpointer = Checkpointer(self.flush, 60)
+        checkpointer.start()
+        checkpointer.request()
+        checkpointer.stop()
+        self.assertEqual(self.flushes, 1)
+
+    def test_error(self):
+        """test that a failed flush is kept and retried"""
+        checkpointer = Checkpointer(self.flush, 60)
+        checkpointer.request()
+        self.fail = True
+        checkpointer.checkpoint()
+        self.assertIsInstance(checkpointer.error, OSError)
+        self.fail = False
+        checkpointer.checkpoint()
+        self.assertIsNone(checkpointer.error)
+        self.assertEqual(self.flushes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""The models engine codec test module"""
+from datetime import datetime
+from models.engine import codec
+from models.engine.codec import get_codec, JSONCodec
+from models.place import Place
+import json
+import unittest
+
+
+class TestCodecs(unittest.TestCase):
+    """test for the codecs, each installed one is tested"""
+
+    def codecs(self):
+        """yields every installed codec"""
+        for name, available in codec.available.items():
+            if available:
+                with self.subTest(codec=name):
+                    yield get_codec(name)
+
+    def test_dumps_loads(self):
+        """test that values go through unchanged"""
+        value = {"name": "Loft", "rooms": 3, "ids": ["a", "b"], "lat": 0.5}
+        for cdc in self.codecs():
+            self.assertEqual(cdc.loads(cdc.dumps(value)), value)
+            self.assertEqual(cdc.loads(cdc.dumps(value).encode()), value)
+
+    def test_datetime(self):
+        """test that datetimes are written as isoformat"""
+        now = datetime.now()
+        for cdc in self.codecs():
+            self.assertEqual(json.loads(cdc.dumps([now])), [now.isoformat()])
+            with self.assertRaises(TypeError):
+                cdc.dumps(object())
+
+    def test_encode(self):
+        """test that encode gives the JSON of to_dict"""
+        place = Place()
+        place.name = "Loft"
+        place.number_rooms = 3
+        for cdc in self.codecs():
+            self.assertEqual(json.loads(cdc.encode(place)), place.to_dict())
+
+    def test_decode(self):
+        """test that decode turns timestamps into datetimes"""
+        place = Place()
+        for cdc in self.codecs():
+            record = cdc.decode(cdc.loads(cdc.encode(place)))
+            self.assertEqual(record["created_at"], place.created_at)
+            self.assertEqual(record["updated_at"], place.updated_at)
+            self.assertEqual(Place(**record).to_dict(), place.to_dict())
+
+    def test_get_codec(self):
+        """test picking a codec by name"""
+        self.assertIs(type(get_codec("json")), JSONCodec)
+        self.assertTrue(codec.available[get_codec().name])
+        with self.assertRaises(ValueError):
+            get_codec("xml")
+        for name, available in codec.available.items():
+            if not available:
+                with self.assertRaises(ImportError):
+                    get_codec(name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""The models engine columns test module"""
+from models.engine import columns
+from models.engine.columns import ColumnStore, matches, parse
+from models.place import Place
+from unittest import mock
+import unittest
+
+
+class TestLookups(unittest.TestCase):
+    """test for the lookup helpers"""
+
+    def test_parse(self):
+        """test that lookups are split into attribute and operator"""
+        self.assertEqual(parse("max_guest__ge"), ("max_guest", "ge"))
+        self.assertEqual(parse("latitude__between"),
+                         ("latitude", "between"))
+        self.assertEqual(parse("max_guest"), ("max_guest", "eq"))
+        self.assertEqual(parse("a__b"), ("a__b", "eq"))
+
+    def test_matches(self):
+        """test the python evaluation of the operators"""
+        self.assertTrue(matches(3, "ge", 3))
+        self.assertFalse(matches(3, "lt", 3))
+        self.assertTrue(matches(3, "between", (1, 3)))
+        self.assertFalse(matches("3", "lt", 4))
+        self.assertTrue(matches("3", "ne", 4))
+
+
+class TestColumnStore(unittest.TestCase):
+    """test for ColumnStore class, with numpy if installed"""
+
+    def setUp(self):
+        """fills a store with three places"""
+        self.store = ColumnStore(Place)
+        self.store.changed("Place.1", {"__class__": "Place",
+                                       "price_by_night": 50, "max_guest": 2})
+        self.store.changed("Place.2", {"__class__": "Place",
+                                       "price_by_night": 150, "max_guest": 4,
+                                       "latitude": 40.5})
+        self.store.changed("Place.3", {"__class__": "Place",
+                                       "price_by_night": 90, "max_guest": 6})
+
+    def filter(self, *predicates):
+        """returns the keys matching the predicates, then the odd keys"""
+        return self.store.filter(predicates)
+
+    def test_filter(self):
+        """test each operator"""
+        self.assertEqual(self.filter(("price_by_night", "le", 90)),
+                         (["Place.1", "Place.3"], []))
+        self.assertEqual(self.filter(("price_by_night", "le", 100),
+                                     ("max_guest", "ge", 4)),
+                         (["Place.3"], []))
+        self.assertEqual(self.filter(("max_guest", "between", (2, 4))),
+                         (["Place.1", "Place.2"], []))
+        self.assertEqual(self.filter(("latitude", "ne", 0)),
+                         (["Place.2"], []))
+        self.assertEqual(self.filter(("number_rooms", "eq", 0))[0],
+                         ["Place.1", "Place.2", "Place.3"])
+
+    def test_changes(self):
+        """test that updates and deletions are applied"""
+        self.filter()
+        self.store.changed("Place.1", {"price_by_night": 500})
+        self.store.changed("Place.2", None)
+        self.store.changed("Place.4", {"price_by_night": 10})
+        self.assertEqual(self.filter(("price_by_night", "gt", 0)),
+                         (["Place.1", "Place.3", "Place.4"], []))
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.keys[1], None)
+
+    def test_odd(self):
+        """test that values which are not numbers are kept aside"""
+        self.store.changed("Place.1", {"price_by_night": "50"})
+        self.store.changed("Place.3", {"latitude": float("nan")})
+        self.assertEqual(self.filter(("price_by_night", "ge", 0))[0],
+                         ["Place.2"])
+        self.assertEqual(sorted(self.store.odd), ["Place.1", "Place.3"])
+        self.store.changed("Place.1", {"price_by_night": 50})
+        self.assertEqual(self.filter()[1], ["Place.3"])
+
+    def test_compact(self):
+        """test that empty rows are dropped once most rows are empty"""
+        for i in range(2000):
+            self.store.changed("Place.x{}".format(i), {"max_guest": 1})
+        self.filter()
+        for i in range(2000):
+            self.store.changed("Place.x{}".format(i), None)
+        self.assertEqual(self.filter(("max_guest", "ge", 0))[0],
+                         ["Place.1", "Place.2", "Place.3"])
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.rows["Place.3"], 2)
+
+
+@mock.patch.object(columns, "numpy", None)
+class TestColumnStoreArray(TestColumnStore):
+    """test for ColumnStore class without numpy"""
+
+    def setUp(self):
+        """fills a store without numpy"""
+        with mock.patch.object(columns, "numpy", None):
+            super().setUp()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""The models DBStorage test module"""
+from models.city import City
+from models.engine.db_storage import DBStorage
+from models.place import Place
+from models.review import Review
+from models.user import User
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+
+class TestDBStorage(unittest.TestCase):
+    """test for DBStorage class"""
+
+    def setUp(self):
+        """opens a storage on a temporary database"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "hbnb.db")
+        self.strg = DBStorage(self.path)
+
+    def tearDown(self):
+        """closes the storage and removes the database"""
+        self.strg.close()
+        self.tmp.cleanup()
+
+    def reopened(self):
+        """returns a storage reloaded from the database"""
+        strg = DBStorage(self.path)
+        strg.reload()
+        self.addCleanup(strg.close)
+        return strg
+
+    def rows(self, table):
+        """returns the rows of table"""
+        with sqlite3.connect(self.path) as db:
+            return db.execute("SELECT * FROM " + table).fetchall()
+
+    def test_tables(self):
+        """test that each class has a table with its indexed columns"""
+        with sqlite3.connect(self.path) as db:
+            cols = db.execute("PRAGMA table_info(Review)").fetchall()
+            indexes = db.execute("PRAGMA index_list(Review)").fetchall()
+        cols = [row[1] for row in cols]
+        indexes = [row[1] for row in indexes]
+        self.assertEqual(cols, ["id", "created_at", "updated_at",
+                                "place_id", "user_id", "data"])
+        self.assertIn("Review_place_id", indexes)
+
+    def test_new_save_reload(self):
+        """test that saved objects are reloaded"""
+        user = User()
+        user.email = "betty@hbnb.io"
+        self.strg.new(user)
+        self.assertEqual(self.rows("User"), [])
+        self.strg.save()
+        self.assertEqual(len(self.rows("User")), 1)
+        objs = self.reopened().all()
+        self.assertEqual(list(objs), ["User." + user.id])
+        self.assertIs(type(objs["User." + user.id]), User)
+        self.assertEqual(objs["User." + user.id].to_dict(), user.to_dict())
+
+    def test_save_obj(self):
+        """test that save(obj) only writes the changed object"""
+        user, place = User(), Place()
+        self.strg.new(user)
+        self.strg.new(place)
+        self.strg.save()
+        place.name = "Loft"
+        self.strg.save(place)
+        self.assertEqual(len(self.rows("User")), 1)
+        self.assertEqual(len(self.rows("Place")), 1)
+        self.assertEqual(self.reopened().all()["Place." + place.id].name,
+                         "Loft")
+
+    def test_delete(self):
+        """test that destroyed objects are removed from the database"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        self.strg.delete(user)
+        self.assertEqual(self.strg.all(), {})
+        self.strg.save()
+        self.assertEqual(self.rows("User"), [])
+
+    def test_save_deleted(self):
+        """test that saving a deleted object does not bring it back"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        self.strg.delete(user)
+        self.strg.save(user)
+        self.assertEqual(self.strg.count("User"), 0)
+        self.assertEqual(self.rows("User"), [])
+        self.assertEqual(self.reopened().all(), {})
+
+    def test_all_count(self):
+        """test all and count by class"""
+        users = [User() for i in range(3)]
+        city = City()
+        for obj in users + [city]:
+            self.strg.new(obj)
+        self.assertEqual(self.strg.count(), 4)
+        self.assertEqual(self.strg.count(User), 3)
+        self.assertEqual(self.strg.count("City"), 1)
+        self.assertEqual(self.strg.count("Nope"), 0)
+        self.assertEqual(self.strg.all(City), {"City." + city.id: city})
+        self.assertEqual(self.strg.all("Nope"), {})
+
+    def test_get(self):
+        """test looking up an object by class and id"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        self.assertIs(self.strg.get(User, user.id), user)
+        self.assertEqual(self.reopened().get("User", user.id).id, user.id)
+        self.assertIsNone(self.strg.get(User, "nope"))
+        self.assertIsNone(self.strg.get("Nowhere", user.id))
+
+    def test_sync(self):
+        """test that the objects are read again after another connection
+        committed"""
+        self.strg.reload()
+        self.assertEqual(self.strg.sync(), 0)
+        other = self.reopened()
+        user = User()
+        other.new(user)
+        other.save()
+        self.assertEqual(self.strg.sync(), 1)
+        self.assertEqual(self.strg.get(User, user.id).id, user.id)
+        self.assertEqual(self.strg.sync(), 0)
+
+    def test_async(self):
+        """test asave() and aiter()"""
+        users = [User() for i in range(3)]
+        for user in users:
+            self.strg.new(user)
+
+        async def main():
+            """saves then iterates the users"""
+            await self.strg.asave()
+            return [obj async for obj in self.strg.aiter(User, chunk=2)]
+
+        self.assertEqual(asyncio.run(main()),
+                         sorted(users, key=lambda user: user.id))
+        self.assertEqual(self.reopened().count(User), 3)
+
+    def test_stream_save(self):
+        """test that a streamed object changed and saved is kept"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        strg = self.reopened()
+        for obj in strg.stream(User):
+            obj.first_name = "Changed"
+            strg.save(obj)
+        self.assertIs(strg.get(User, user.id), obj)
+        self.assertEqual(self.reopened().get(User, user.id).first_name,
+                         "Changed")
+
+    def test_reads_unsaved(self):
+        """test that reads see the changes not saved yet without saving
+        them, so a rollback still drops them"""
+        users = sorted((User() for i in range(3)), key=lambda obj: obj.id)
+        for user in users[:2]:
+            self.strg.new(user)
+        self.strg.save()
+        self.strg.new(users[2])
+        self.strg.delete(users[0])
+        users[1].first_name = "Unsaved"
+        self.strg.touch(users[1])  # models.storage is told otherwise
+        self.assertEqual(list(self.strg.all(User).values()), users[1:])
+        self.assertEqual(self.strg.count(User), 2)
+        self.assertEqual(list(self.strg.stream(User)), users[1:])
+        self.assertEqual(self.strg.find(User, first_name="Unsaved"),
+                         [users[1]])
+        self.assertEqual(self.strg.query(User, [("first_name", "eq",
+                                                 "Unsaved")]), [users[1]])
+        self.assertEqual(self.reopened().count(User), 2)
+        self.strg.rollback()
+        self.assertNotIn("first_name", users[1].__dict__)
+        self.assertEqual(self.strg.count(User), 2)
+        self.assertEqual(sorted(self.strg.all(User)),
+                         ["User." + user.id for user in users[:2]])
+
+    def test_find(self):
+        """test that find uses the foreign key columns"""
+        place = Place()
+        reviews = [Review() for i in range(3)]
+        for review in reviews[:2]:
+            review.place_id = place.id
+        for obj in reviews + [place]:
+            self.strg.new(obj)
+        self.assertCountEqual(self.strg.find(Review, place_id=place.id),
+                              reviews[:2])
+        self.assertEqual(self.strg.find(Review, place_id=place.id,
+                                        text="x"), [])
+        self.strg.save()
+        strg = self.reopened()
+        self.assertCountEqual(
+            [review.id for review in strg.find(Review, place_id=place.id)],
+            [review.id for review in reviews[:2]])
+        self.assertEqual(len(strg.find(Place, name="")), 1)
+
+    def test_filter(self):
+        """test the lookups of filter"""
+        places = [Place() for i in range(3)]
+        for i, place in enumerate(places):
+            place.price_by_night = 50 * i
+            self.strg.new(place)
+        places[2].city_id = "c1"
+        self.assertCountEqual(self.strg.filter(Place, price_by_night__le=50),
+                              places[:2])
+        self.assertEqual(self.strg.filter(Place, city_id="c1",
+                                          price_by_night__gt=0), places[2:])
+
+    def test_stream(self):
+        """test streaming the objects by class and id from a cursor"""
+        users = sorted((User() for i in range(3)), key=lambda obj: obj.id)
+        place = Place()
+        for obj in users + [place]:
+            self.strg.new(obj)
+        self.assertEqual(list(self.strg.stream()), [place] + users)
+        self.assertEqual(list(self.strg.stream(User, "User." + users[0].id)),
+                         users[1:])
+        self.assertEqual(list(self.strg.stream(None, "Place.~")), users)
+        self.assertEqual(list(self.strg.stream("Nowhere")), [])
+        self.strg.save()
+        strg = self.reopened()
+        self.assertEqual([obj.id for obj in strg.stream(User)],
+                         [user.id for user in users])
+        self.assertFalse(any(map(strg.all().is_built, strg.all())))
+
+    def test_query(self):
+        """test the queries and their plans"""
+        places = [Place() for i in range(3)]
+        for i, place in enumerate(places):
+            place.price_by_night = 50 * i
+            self.strg.new(place)
+        places[0].city_id = places[2].city_id = "c1"
+        self.assertEqual(self.strg.query(Place, [("city_id", "eq", "c1")],
+                                         [("price_by_night", True)]),
+                         [places[2], places[0]])
+        self.assertEqual(self.strg.query("Place", [("price_by_night", "ge",
+                                                    50)],
+                                         [("price_by_night", False)], 1),
+                         places[1:2])
+        plan = self.strg.plan(Place, [("city_id", "eq", "c1")])
+        self.assertTrue(plan.access.startswith("index lookup"))
+        self.assertIn("Place_city_id", plan.access)
+        plan = self.strg.plan(Place, [("price_by_night", "ge", 50)])
+        self.assertEqual(plan.access, "scan of 3 objects")
+        self.assertEqual(self.strg.query("Nowhere"), [])
+
+    def test_near(self):
+        """test the location queries"""
+        places = [Place() for i in range(3)]
+        for i, place in enumerate(places):
+            place.latitude, place.longitude = 0.0, float(i)
+            self.strg.new(place)
+        places[2].latitude = "north"
+        self.strg.new(Place())  # never located
+        self.assertEqual(self.strg.near(Place, 0, 0.6, 100), places[:2][::-1])
+        self.assertEqual(self.strg.nearest(Place, 0, 0), places[:1])
+        with self.assertRaises(ValueError):
+            self.strg.near(User, 0, 0, 1)
+
+    def test_search(self):
+        """test the full-text search, saved next to the database"""
+        review = Review()
+        review.text = "Quiet and clean"
+        self.strg.new(review)
+        self.assertEqual(self.strg.search(Review, "quiet"), [review])
+        self.strg.save()
+        self.assertTrue(os.path.exists(self.path + ".search"))
+        review.text = "Noisy"
+        self.strg.save(review)
+        self.assertEqual(self.strg.search(None, "quiet"), [])
+        self.assertEqual(
+            [obj.id for obj in self.reopened().search(Review, "noisy")],
+            [review.id])
+
+    def test_save_changes(self):
+        """test that save_changes replaces the whole database"""
+        first, second = User(), User()
+        self.strg.new(first)
+        self.strg.save()
+        self.strg.save_changes({"User." + second.id: second})
+        self.assertEqual(list(self.reopened().all()), ["User." + second.id])
+
+    def test_batch(self):
+        """test that a batch is committed once at the end"""
+        with self.strg.batch():
+            users = [User() for i in range(3)]
+            for user in users:
+                self.strg.new(user)
+                self.strg.save(user)
+            self.assertEqual(self.strg.count(User), 3)
+            self.assertEqual(self.rows("User"), [])
+        self.assertEqual(len(self.rows("User")), 3)
+
+    def test_rollback(self):
+        """test that a failing batch leaves store and database unchanged"""
+        kept, gone = User(), User()
+        kept.first_name = "Betty"
+        self.strg.new(kept)
+        self.strg.new(gone)
+        self.strg.save()
+        with self.assertRaises(ValueError):
+            with self.strg.batch():
+                kept.first_name = "Holberton"
+                self.strg.save(kept)
+                self.strg.delete(gone)
+                self.strg.new(City())
+                self.strg.save()
+                raise ValueError
+        self.assertFalse(self.strg.batching)
+        self.assertEqual(kept.first_name, "Betty")
+        self.assertEqual(self.strg.count(User), 2)
+        self.assertEqual(self.strg.count(City), 0)
+        self.assertEqual(len(self.strg.all()), 2)
+        self.assertEqual(len(self.rows("User")), 2)
+
+    def test_nested_rollback(self):
+        """test that a failing inner batch only drops its own changes"""
+        kept = User()
+        kept.first_name = "Betty"
+        self.strg.new(kept)
+        self.strg.save()
+        with self.strg.batch():
+            kept.first_name = "Outer"
+            self.strg.save(kept)
+            added = User()
+            self.strg.new(added)
+            with self.assertRaises(ValueError):
+                with self.strg.batch():
+                    kept.first_name = "Inner"
+                    self.strg.save(kept)
+                    self.strg.delete(added)
+                    self.strg.new(City())
+                    self.strg.save()
+                    raise ValueError
+            self.assertTrue(self.strg.batching)
+            self.assertEqual(kept.first_name, "Outer")
+            self.assertEqual(self.strg.count(User), 2)
+            self.assertEqual(self.strg.count(City), 0)
+            last = City()
+            self.strg.new(last)
+        self.assertFalse(self.strg.batching)
+        strg = self.reopened()
+        self.assertEqual(strg.get(User, kept.id).first_name, "Outer")
+        self.assertEqual(strg.count(User), 2)
+        self.assertEqual(list(strg.all(City)), ["City." + last.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
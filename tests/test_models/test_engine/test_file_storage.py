@@ -6,11 +6,20 @@ from models.place import Place
 from models.state import State
 from models.review import Review
 from models.amenity import Amenity
+from models.engine.atomic import atomic_open
 from models.engine.file_storage import FileStorage
+from models.engine.locking import ConflictError
+from models.engine.lazy import LazyObjects
 from models.base_model import BaseModel
+import asyncio
 import os
 import json
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from unittest.mock import patch
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -90,3 +99,1210 @@ class TestFileStorage(unittest.TestCase):
         new_strg = FileStorage()
         new_strg.reload()
         self.assertEqual(new_strg.all()[obj_name].some_attribute, "modified")
+
+
+class TmpStorageTestCase(unittest.TestCase):
+    """base for tests that run FileStorage on a temporary file"""
+
+    def setUp(self):
+        """points the storage at a temporary file with an empty store"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = self.path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty.clear()
+
+    def tearDown(self):
+        """restores the storage"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        FileStorage._FileStorage__dirty.clear()
+        self.tmp.cleanup()
+
+    def reloaded(self):
+        """returns the objects a fresh storage reads back from disk"""
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage()
+        strg.reload()
+        return strg.all()
+
+
+class TestFileStorageJournal(TmpStorageTestCase):
+    """test for FileStorage in journal mode"""
+
+    def test_save_appends(self):
+        """test that saving only appends the changed object"""
+        strg = FileStorage(journal=True)
+        user, place = User(), Place()
+        strg.new(user)
+        strg.new(place)
+        strg.save()
+        self.assertFalse(os.path.exists(self.path))
+        user.first_name = "Betty"
+        strg.save(user)
+        with open(self.path + ".journal") as fil:
+            lines = fil.readlines()
+        self.assertEqual(len(lines), 2)  # a batch line and an update
+        self.assertEqual(json.loads(lines[-1])["obj"]["first_name"], "Betty")
+        objs = self.reloaded()
+        self.assertEqual(objs["User." + user.id].first_name, "Betty")
+        self.assertIn("Place." + place.id, objs)
+
+    def test_delete(self):
+        """test that a destroyed object is not replayed"""
+        strg = FileStorage(journal=True)
+        user = User()
+        strg.new(user)
+        strg.save()
+        strg.delete(user)
+        strg.save()
+        self.assertNotIn("User." + user.id, strg.all())
+        self.assertNotIn("User." + user.id, self.reloaded())
+
+    def test_save_deleted(self):
+        """test that saving a deleted object does not bring it back"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__objects = {}
+                strg = FileStorage(journal=journal)
+                user = User()
+                strg.save()
+                strg.delete(user)
+                strg.save(user)
+                self.assertNotIn("User." + user.id, strg.all())
+                self.assertNotIn("User." + user.id, self.reloaded())
+
+    def test_compact(self):
+        """test that compact folds the journal into the snapshot"""
+        strg = FileStorage(journal=True)
+        user = User()
+        strg.new(user)
+        strg.save()
+        strg.compact()
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        with open(self.path) as fil:
+            self.assertIn("User." + user.id, json.load(fil))
+        self.assertIn("User." + user.id, self.reloaded())
+
+    def test_compact_after(self):
+        """test that a long journal is compacted automatically"""
+        strg = FileStorage(journal=True, compact_after=4)
+        users = [User() for i in range(3)]
+        strg.save()
+        self.assertFalse(os.path.exists(self.path))
+        strg.save(users[0])
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        self.assertEqual(len(self.reloaded()), 3)
+
+    def test_full_save_after_journal(self):
+        """test that a full save takes over a pending journal"""
+        FileStorage(journal=True).save(User())
+        strg = FileStorage()
+        strg.save(User())
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        self.assertEqual(len(self.reloaded()), 2)
+
+
+class TestFileStorageClassIndex(TmpStorageTestCase):
+    """test for the per class lookups of FileStorage"""
+
+    def test_all_cls(self):
+        """test that all(cls) only returns objects of cls"""
+        strg = FileStorage()
+        users = [User() for i in range(3)]
+        place = Place()
+        expected = {"User." + user.id: user for user in users}
+        self.assertEqual(strg.all(User), expected)
+        self.assertEqual(strg.all("User"), expected)
+        self.assertEqual(strg.all(Place), {"Place." + place.id: place})
+        self.assertEqual(strg.all(State), {})
+        self.assertEqual(len(strg.all()), 4)
+
+    def test_stream(self):
+        """test streaming the objects from a cursor"""
+        strg = FileStorage()
+        users = [User() for i in range(3)]
+        place = Place()
+        self.assertEqual(list(strg.stream()), users + [place])
+        self.assertEqual(list(strg.stream(User, "User." + users[0].id)),
+                         users[1:])
+        self.assertEqual(list(strg.stream("Place")), [place])
+        self.assertEqual(list(strg.stream(State)), [])
+        with self.assertRaises(KeyError):
+            strg.stream(User, "Place." + place.id)
+
+    def test_count(self):
+        """test that count follows new and delete"""
+        strg = FileStorage()
+        self.assertEqual(strg.count(), 0)
+        users = [User() for i in range(3)]
+        City()
+        self.assertEqual(strg.count(User), 3)
+        self.assertEqual(strg.count("City"), 1)
+        self.assertEqual(strg.count(Review), 0)
+        self.assertEqual(strg.count(), 4)
+        strg.delete(users[0])
+        self.assertEqual(strg.count(User), 2)
+        self.assertEqual(strg.count(), 3)
+
+    def test_reload(self):
+        """test that reloaded objects are indexed"""
+        strg = FileStorage()
+        user = User()
+        Place()
+        strg.save()
+        self.reloaded()
+        self.assertEqual(list(strg.all(User)), ["User." + user.id])
+        self.assertEqual(strg.count(Place), 1)
+
+    def test_replaced_objects(self):
+        """test that the index follows a replaced or edited __objects"""
+        strg = FileStorage()
+        User()
+        user = User()
+        FileStorage._FileStorage__objects = {"User." + user.id: user}
+        self.assertEqual(strg.count(User), 1)
+        del strg.all()["User." + user.id]
+        self.assertEqual(strg.count(User), 0)
+
+
+class TestFileStorageFind(TmpStorageTestCase):
+    """test for the attribute lookups of FileStorage"""
+
+    def test_find(self):
+        """test that find returns the objects with matching attributes"""
+        strg = FileStorage()
+        place, other = Place(), Place()
+        reviews = [Review() for i in range(3)]
+        for review in reviews[:2]:
+            review.place_id = place.id
+            strg.save(review)
+        reviews[2].place_id = other.id
+        reviews[2].user_id = "u1"
+        strg.save(reviews[2])
+        self.assertCountEqual(strg.find(Review, place_id=place.id),
+                              reviews[:2])
+        self.assertEqual(strg.find("Review", place_id=other.id),
+                         reviews[2:])
+        self.assertEqual(strg.find(Review, place_id=other.id,
+                                   user_id="u2"), [])
+        self.assertEqual(strg.find(Review, place_id="nowhere"), [])
+        self.assertEqual(strg.find(Place, name=""), [place, other])
+
+    def test_find_uses_index(self):
+        """test that find only looks at the indexed matches, the index
+        being built by the first lookup then kept up to date"""
+        strg = FileStorage()
+        reviews = [Review() for i in range(3)]
+        reviews[0].place_id = "p1"
+        strg.save(reviews[0])
+        self.assertNotIn("Review", FileStorage._FileStorage__by_attr)
+        self.assertEqual(strg.find(Review, place_id="p1"), reviews[:1])
+        index = FileStorage._FileStorage__by_attr["Review"]["place_id"]
+        self.assertEqual(index.lookup("p1"), {"Review." + reviews[0].id})
+        reviews[1].place_id = "p1"
+        self.assertEqual(index.lookup("p1"), {"Review." + reviews[0].id,
+                                              "Review." + reviews[1].id})
+
+    def test_find_after_delete_reload(self):
+        """test that find follows destroyed and reloaded objects"""
+        strg = FileStorage()
+        city = City()
+        city.state_id = "s1"
+        strg.save(city)
+        strg.delete(city)
+        self.assertEqual(strg.find(City, state_id="s1"), [])
+        strg.new(city)
+        strg.save()
+        objs = self.reloaded()
+        self.assertEqual(strg.find(City, state_id="s1"),
+                         [objs["City." + city.id]])
+
+
+class TestFileStorageLazy(TmpStorageTestCase):
+    """test for FileStorage in lazy mode"""
+
+    def setUp(self):
+        """saves a few objects for the lazy storage to reload"""
+        super().setUp()
+        self.user, self.place, self.review = User(), Place(), Review()
+        self.review.place_id = self.place.id
+        FileStorage().save()
+        FileStorage._FileStorage__objects = {}
+        self.strg = FileStorage(lazy=True)
+        self.strg.reload()
+        self.objs = self.strg.all()
+
+    def built(self):
+        """the keys whose objects were created"""
+        return [key for key in self.objs if self.objs.is_built(key)]
+
+    def test_reload(self):
+        """test that reload creates no object"""
+        self.assertIsInstance(self.objs, LazyObjects)
+        self.assertEqual(len(self.objs), 3)
+        self.assertEqual(self.strg.count(User), 1)
+        self.assertEqual(self.built(), [])
+
+    def test_stream(self):
+        """test that streaming does not keep the objects it builds"""
+        streamed = list(self.strg.stream())
+        self.assertEqual([obj.id for obj in streamed],
+                         [self.user.id, self.place.id, self.review.id])
+        self.assertEqual(self.built(), [])
+
+    def test_stream_save(self):
+        """test that a streamed object changed and saved is kept"""
+        for user in self.strg.stream(User):
+            user.first_name = "Changed"
+            self.strg.save(user)
+        self.assertIs(self.objs["User." + self.user.id], user)
+        self.assertEqual(self.reloaded()["User." + self.user.id].first_name,
+                         "Changed")
+
+    def test_lookup(self):
+        """test that looked up objects are created once"""
+        key = "User." + self.user.id
+        user = self.objs[key]
+        self.assertIs(type(user), User)
+        self.assertEqual(user.to_dict(), self.user.to_dict())
+        self.assertIs(self.objs[key], user)
+        self.assertEqual(self.built(), [key])
+
+    def test_all_cls_find(self):
+        """test that all(cls) and find only create what they return"""
+        self.assertEqual(list(self.strg.all(Place)),
+                         ["Place." + self.place.id])
+        found = self.strg.find(Review, place_id=self.place.id)
+        self.assertEqual(found[0].id, self.review.id)
+        self.assertCountEqual(self.built(), ["Place." + self.place.id,
+                                             "Review." + self.review.id])
+
+    def test_save(self):
+        """test that saving writes records that were never created"""
+        user = User()
+        self.strg.save(user)
+        self.assertEqual(self.built(), ["User." + user.id])
+        objs = self.reloaded()
+        self.assertEqual(len(objs), 4)
+        self.assertEqual(objs["Place." + self.place.id].to_dict(),
+                         self.place.to_dict())
+
+    def test_delete(self):
+        """test destroying an object that was not created yet"""
+        key = "Review." + self.review.id
+        self.strg.delete(self.objs[key])
+        self.strg.save()
+        self.assertEqual(self.strg.find(Review, place_id=self.place.id), [])
+        self.assertNotIn(key, self.reloaded())
+
+
+class TestFileStorageBatch(TmpStorageTestCase):
+    """test for FileStorage batches"""
+
+    def test_batch_defers(self):
+        """test that saves in a batch are written once at the end"""
+        strg = FileStorage()
+        with strg.batch():
+            self.assertTrue(strg.batching)
+            users = [User() for i in range(3)]
+            for user in users:
+                user.save()
+            self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(strg.batching)
+        self.assertEqual(len(self.reloaded()), 3)
+
+    def test_nested(self):
+        """test that only the outermost commit writes"""
+        strg = FileStorage(journal=True)
+        strg.begin()
+        strg.begin()
+        strg.save(User())
+        strg.commit()
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        strg.save(User())
+        strg.commit()
+        with open(self.path + ".journal") as fil:
+            self.assertEqual(len(fil.readlines()), 1)
+        self.assertEqual(len(self.reloaded()), 2)
+
+    def test_rollback(self):
+        """test that a failing batch leaves store and file unchanged"""
+        strg = FileStorage()
+        kept, gone = User(), User()
+        kept.first_name = "Betty"
+        strg.save()
+        with self.assertRaises(ValueError):
+            with strg.batch():
+                kept.first_name = "Holberton"
+                strg.save(kept)
+                strg.delete(gone)
+                strg.save()
+                added = Place()
+                raise ValueError
+        self.assertEqual(kept.first_name, "Betty")
+        self.assertIs(strg.all()["User." + kept.id], kept)
+        self.assertIn("User." + gone.id, strg.all())
+        self.assertNotIn("Place." + added.id, strg.all())
+        self.assertEqual(strg.count(User), 2)
+        self.assertEqual(strg.count(Place), 0)
+        objs = self.reloaded()
+        self.assertEqual(len(objs), 2)
+        self.assertEqual(objs["User." + kept.id].first_name, "Betty")
+
+    def test_failed_commit(self):
+        """test that a batch whose write fails is rolled back"""
+        strg = FileStorage()
+        kept = User()
+        kept.first_name = "Betty"
+        strg.save()
+        strg.begin()
+        kept.first_name = "Holberton"
+        added = Place()
+        with patch("models.engine.file_storage.atomic_open",
+                   side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                strg.commit()
+        self.assertFalse(strg.batching)
+        self.assertEqual(kept.first_name, "Betty")
+        self.assertNotIn("Place." + added.id, strg.all())
+        strg.save(User())
+        objs = self.reloaded()
+        self.assertEqual(len(objs), 2)
+        self.assertEqual(objs["User." + kept.id].first_name, "Betty")
+
+    def test_nested_rollback(self):
+        """test that a failing inner batch only drops its own changes"""
+        strg = FileStorage()
+        kept = User()
+        kept.first_name = "Betty"
+        strg.save()
+        with strg.batch():
+            kept.first_name = "Outer"
+            added = User()
+            with self.assertRaises(ValueError):
+                with strg.batch():
+                    kept.first_name = "Inner"
+                    strg.delete(added)
+                    dropped = Place()
+                    raise ValueError
+            self.assertTrue(strg.batching)
+            self.assertEqual(kept.first_name, "Outer")
+            self.assertIn("User." + added.id, strg.all())
+            self.assertNotIn("Place." + dropped.id, strg.all())
+            last = City()
+        self.assertFalse(strg.batching)
+        objs = self.reloaded()
+        self.assertEqual(sorted(objs), sorted(["User." + kept.id,
+                                               "User." + added.id,
+                                               "City." + last.id]))
+        self.assertEqual(objs["User." + kept.id].first_name, "Outer")
+
+    def test_begin_saves_pending(self):
+        """test that changes made before begin survive a rollback"""
+        strg = FileStorage(journal=True)
+        user = User()
+        strg.begin()
+        Place()
+        strg.rollback()
+        self.assertFalse(strg.batching)
+        self.assertEqual(list(strg.all()), ["User." + user.id])
+        self.assertEqual(list(self.reloaded()), ["User." + user.id])
+
+
+class TestFileStorageAtomic(TmpStorageTestCase):
+    """test for the crash safe writes of FileStorage"""
+
+    def test_failed_save(self):
+        """test that a failing save leaves the file as it was"""
+        strg = FileStorage()
+        user = User()
+        strg.save()
+        with open(self.path) as fil:
+            before = fil.read()
+        user.friend = object()  # not JSON serializable
+        with self.assertRaises(TypeError):
+            strg.save(user)
+        with open(self.path) as fil:
+            self.assertEqual(fil.read(), before)
+        self.assertEqual(os.listdir(self.tmp.name), ["file.json"])
+
+    def test_retry_after_failure(self):
+        """test that the changes of a failed write are made by the next"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__objects = {}
+                strg = FileStorage(journal=journal)
+                first, second = User(), User()
+                strg.save()
+                first.first_name = "Lost"
+                failing = "models.engine.file_storage.atomic_open" \
+                    if not journal else "models.engine.journal.Journal.append"
+                with patch(failing, side_effect=OSError("disk full")):
+                    with self.assertRaises(OSError):
+                        strg.save(first)
+                second.first_name = "Next"
+                strg.save(second)
+                saved = self.reloaded()
+                self.assertEqual(saved["User." + first.id].first_name, "Lost")
+                self.assertEqual(saved["User." + second.id].first_name,
+                                 "Next")
+
+    def test_missing_directory(self):
+        """test that a save error is raised"""
+        FileStorage._FileStorage__file_path = os.path.join(
+            self.tmp.name, "nowhere", "file.json")
+        with self.assertRaises(FileNotFoundError):
+            FileStorage().save(User())
+
+    def test_checkpoint(self):
+        """test that saves are written by the checkpoint thread"""
+        strg = FileStorage(checkpoint=60)
+        for i in range(3):
+            strg.save(User())
+        self.assertFalse(os.path.exists(self.path))
+        strg.close()
+        self.assertEqual(len(self.reloaded()), 3)
+
+    def test_checkpoint_begin(self):
+        """test that saves requested before begin survive a rollback"""
+        strg = FileStorage(checkpoint=60)
+        user = User()
+        strg.save(user)
+        strg.begin()
+        strg.save(User())
+        strg.rollback()
+        self.assertEqual(list(strg.all()), ["User." + user.id])
+        strg.close()
+        self.assertEqual(list(self.reloaded()), ["User." + user.id])
+
+    def test_checkpoint_error(self):
+        """test that a failed background write is raised by next save"""
+        strg = FileStorage(checkpoint=60)
+        user = User()
+        user.friend = object()
+        strg.save(user)
+        strg._FileStorage__checkpointer.checkpoint()
+        with self.assertRaises(TypeError):
+            strg.save()
+        del user.friend
+        strg.close()
+        self.assertEqual(list(self.reloaded()), ["User." + user.id])
+
+
+class TestFileStorageDirty(TmpStorageTestCase):
+    """test for the change tracking of FileStorage"""
+
+    def setUp(self):
+        """saves a few objects"""
+        super().setUp()
+        self.strg = FileStorage()
+        self.users = [User() for i in range(3)]
+        self.strg.save()
+        self.dumps = []
+        codec = self.strg._FileStorage__codec
+        encode = codec.encode
+
+        def counted(obj):
+            """records the objects being encoded"""
+            self.dumps.append(obj.id)
+            return encode(obj)
+        codec.encode = counted
+
+    def test_setattr_marks(self):
+        """test that setting an attribute marks the object"""
+        self.users[1].first_name = "Betty"
+        self.assertEqual(list(FileStorage._FileStorage__dirty),
+                         ["User." + self.users[1].id])
+        del self.users[1].first_name
+        self.users[2].touch = 1
+        self.assertEqual(len(FileStorage._FileStorage__dirty), 2)
+
+    def test_only_changed_encoded(self):
+        """test that a save only encodes the changed objects"""
+        self.users[1].first_name = "Betty"
+        self.strg.save()
+        self.assertEqual(self.dumps, [self.users[1].id])
+        objs = self.reloaded()
+        self.assertEqual(len(objs), 3)
+        self.assertEqual(objs["User." + self.users[1].id].first_name,
+                         "Betty")
+
+    def test_same_file(self):
+        """test that the file is the plain JSON of the objects"""
+        self.users[0].last_name = "Holberton"
+        place = Place()
+        self.strg.save()
+        self.assertEqual(self.dumps, [self.users[0].id, place.id])
+        with open(self.path) as fil:
+            data = json.load(fil)
+        expected = {key: obj.to_dict()
+                    for key, obj in self.strg.all().items()}
+        self.assertEqual(data, expected)
+
+    def test_untracked_objects(self):
+        """test that unregistered objects are not marked"""
+        user = User(**self.users[0].to_dict())
+        user.first_name = "Betty"
+        self.assertEqual(FileStorage._FileStorage__dirty, {})
+
+    def test_journal_then_compact(self):
+        """test that objects saved to the journal are encoded by compact"""
+        strg = FileStorage(journal=True)
+        self.users[0].first_name = "Betty"
+        strg.save()
+        strg.compact()
+        objs = self.reloaded()
+        self.assertEqual(objs["User." + self.users[0].id].first_name,
+                         "Betty")
+
+
+class TestFileStorageJsonLines(TmpStorageTestCase):
+    """test for FileStorage in the jsonl format"""
+
+    def setUp(self):
+        """points at file.jsonl"""
+        super().setUp()
+        self.jsonl = os.path.join(self.tmp.name, "file.jsonl")
+
+    def test_save(self):
+        """test that each object is saved on its own line"""
+        users = [User() for i in range(3)]
+        FileStorage(file_format="jsonl").save()
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.jsonl) as fil:
+            lines = [json.loads(line) for line in fil]
+        self.assertEqual(lines, [user.to_dict() for user in users])
+
+    def test_reload(self):
+        """test that objects are reloaded with the journal replayed"""
+        strg = FileStorage(journal=True, file_format="jsonl")
+        users = [User() for i in range(3)]
+        strg.compact()
+        users[0].first_name = "Betty"
+        strg.save(users[0])
+        strg.delete(users[1])
+        strg.save()
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(file_format="jsonl")
+        strg.reload()
+        objs = strg.all()
+        self.assertEqual(len(objs), 2)
+        self.assertEqual(objs["User." + users[0].id].first_name, "Betty")
+        self.assertIs(type(objs["User." + users[2].id]), User)
+
+    def test_bad_format(self):
+        """test that an unknown format is refused"""
+        with self.assertRaises(ValueError):
+            FileStorage(file_format="xml")
+
+
+class TestFileStorageCompact(TmpStorageTestCase):
+    """test for FileStorage in compact mode"""
+
+    def test_reload(self):
+        """test that objects are reloaded as compact variants"""
+        review = Review()
+        review.place_id = "1234"
+        review.rating = 4
+        FileStorage().save()
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(compact=True)
+        strg.reload()
+        obj = strg.all()["Review." + review.id]
+        self.assertIsNot(type(obj), Review)
+        self.assertIsInstance(obj, Review)
+        self.assertEqual(obj.to_dict(), review.to_dict())
+        self.assertEqual(strg.find(Review, place_id="1234"), [obj])
+
+    def test_save_rollback(self):
+        """test that compact objects are saved and rolled back"""
+        User()
+        FileStorage().save()
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(compact=True)
+        strg.reload()
+        user, = strg.all().values()
+        user.first_name = "Betty"
+        strg.save(user)
+        with self.assertRaises(KeyError), strg.batch():
+            user.first_name = "Holberton"
+            user.nickname = "H"
+            raise KeyError
+        self.assertEqual(user.first_name, "Betty")
+        self.assertFalse(hasattr(user, "nickname"))
+        self.assertEqual(self.reloaded()["User." + user.id].first_name,
+                         "Betty")
+
+
+class TestFileStorageFilter(TmpStorageTestCase):
+    """test for the columnar filter of FileStorage"""
+
+    def setUp(self):
+        """stores places priced 0, 50, ... 200"""
+        super().setUp()
+        self.strg = FileStorage()
+        self.places = [Place() for i in range(5)]
+        for i, place in enumerate(self.places):
+            place.price_by_night = 50 * i
+            place.max_guest = i
+
+    def test_filter(self):
+        """test lookups on columns and on other attributes"""
+        places = self.places
+        self.assertEqual(self.strg.filter(Place, price_by_night__le=100),
+                         places[:3])
+        self.assertEqual(self.strg.filter("Place", max_guest__ge=2,
+                                          price_by_night__between=(0, 150)),
+                         places[2:4])
+        places[1].name = "Loft"
+        self.assertEqual(self.strg.filter(Place, name="Loft",
+                                          max_guest__lt=3), [places[1]])
+        self.assertEqual(self.strg.filter(Place, price_by_night__ge="0"), [])
+        self.assertEqual(self.strg.filter(Place), places)
+        self.assertEqual(self.strg.filter(User, max_guest=0), [])
+
+    def test_kept_in_step(self):
+        """test that changes made after the first filter are seen"""
+        places = self.places
+        self.assertEqual(self.strg.filter(Place, max_guest__gt=3), places[4:])
+        places[0].max_guest = 10
+        self.strg.delete(places[4])
+        place = Place()
+        place.max_guest = 7
+        self.assertEqual(self.strg.filter(Place, max_guest__gt=3),
+                         [places[0], place])
+        places[3].max_guest = "many"
+        self.assertEqual(self.strg.filter(Place, max_guest__gt=1),
+                         [places[0], places[2], place])
+
+    def test_lazy(self):
+        """test filtering objects not built yet"""
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(lazy=True)
+        strg.reload()
+        found = strg.filter(Place, price_by_night__ge=150)
+        self.assertEqual([obj.id for obj in found],
+                         [place.id for place in self.places[3:]])
+        self.assertEqual(sum(map(strg.all().is_built, strg.all())), 2)
+
+
+class TestFileStorageQuery(TmpStorageTestCase):
+    """test for the query planner of FileStorage"""
+
+    def setUp(self):
+        """stores places priced 0, 50, ... 200"""
+        super().setUp()
+        self.strg = FileStorage()
+        self.places = [Place() for i in range(5)]
+        for i, place in enumerate(self.places):
+            place.price_by_night = 50 * i
+            place.max_guest = i
+
+    def test_query(self):
+        """test the predicates, the order and the limit"""
+        places = self.places
+        places[1].city_id = places[3].city_id = "c1"
+        self.assertEqual(self.strg.query(Place, [("max_guest", "ge", 2)],
+                                         [("price_by_night", True)], 2),
+                         [places[4], places[3]])
+        self.assertCountEqual(self.strg.query("Place",
+                                              [("city_id", "eq", "c1")]),
+                              [places[1], places[3]])
+        self.assertEqual(self.strg.query(Place, [("city_id", "eq", "c1"),
+                                                 ("max_guest", "lt", 3)]),
+                         [places[1]])
+        self.assertEqual(self.strg.query(Place, limit=1), places[:1])
+        self.assertEqual(self.strg.query("Nowhere"), [])
+
+    def test_plan(self):
+        """test that the cheapest access path is chosen"""
+        self.places[1].city_id = "c1"
+        plan = self.strg.plan(Place, [("city_id", "eq", "c1")])
+        self.assertTrue(plan.access.startswith("index lookup"))
+        plan = self.strg.plan(Place, [("max_guest", "gt", 1),
+                                      ("name", "eq", "")])
+        self.assertTrue(plan.access.startswith("column filter"))
+        self.assertEqual(plan.residual, [("name", "eq", "")])
+        plan = self.strg.plan(Place, [("name", "eq", "")])
+        self.assertEqual(plan.access, "scan of 5 objects")
+        self.assertEqual(plan.explain(), ["Place: scan of 5 objects "
+                                          "(cost 5)", "  check: name == ''"])
+
+    def test_plan_run_later(self):
+        """test that a plan run once the objects changed fetches them as
+        they are then"""
+        places = self.places
+        places[1].city_id = "c1"
+        lookup = self.strg.plan(Place, [("city_id", "eq", "c1")])
+        scan = self.strg.plan(Place, [("name", "eq", "")])
+        places[2].city_id = "c1"
+        self.strg.delete(places[0])
+        place = Place()
+        self.assertCountEqual(lookup.run(), places[1:3])
+        self.assertEqual(scan.run(), places[1:] + [place])
+
+
+class TestFileStorageNear(TmpStorageTestCase):
+    """test for the location queries of FileStorage"""
+
+    def setUp(self):
+        """stores places along the equator, one degree apart, and one
+        never located"""
+        super().setUp()
+        self.strg = FileStorage()
+        self.places = [Place() for i in range(4)]
+        for i, place in enumerate(self.places):
+            place.latitude, place.longitude = 0.0, float(i)
+        Place()
+
+    def test_near(self):
+        """test radius queries, kept in step with the changes"""
+        places = self.places
+        self.assertEqual(self.strg.near(Place, 0, 1.1, 120), places[1:3])
+        self.assertEqual(self.strg.near("Place", 0, 0, 1), places[:1])
+        places[3].longitude = 1.2
+        self.strg.delete(places[2])
+        self.assertEqual(self.strg.near(Place, 0, 1.1, 120),
+                         [places[3], places[1]])
+        self.assertEqual(self.strg.near("Nowhere", 0, 0, 1), [])
+        with self.assertRaises(ValueError):
+            self.strg.near(User, 0, 0, 1)
+
+    def test_nearest(self):
+        """test the nearest objects"""
+        self.assertEqual(self.strg.nearest(Place, 0, 2.2, 2),
+                         [self.places[2], self.places[3]])
+        self.assertEqual(self.strg.nearest(Place, 50, 50, 9),
+                         self.places[::-1])
+
+
+class TestFileStorageSearch(TmpStorageTestCase):
+    """test for the full-text search of FileStorage"""
+
+    def setUp(self):
+        """stores a place and a review"""
+        super().setUp()
+        self.strg = FileStorage()
+        self.place = Place()
+        self.place.name = "Quiet loft"
+        self.review = Review()
+        self.review.text = "Clean and quiet"
+
+    def tearDown(self):
+        """forgets the index of the temporary file"""
+        FileStorage._FileStorage__text = None
+        super().tearDown()
+
+    def test_search(self):
+        """test ranked results, kept up to date"""
+        self.assertEqual(self.strg.search(Place, "loft"), [self.place])
+        self.assertEqual(self.strg.search(None, "quiet"),
+                         [self.place, self.review])
+        self.review.text = "Noisy"
+        self.strg.delete(self.place)
+        self.assertEqual(self.strg.search(None, "quiet"), [])
+        self.assertEqual(self.strg.search("Review", "noisy"), [self.review])
+
+    def test_saved(self):
+        """test that the index is saved with the file and reloaded"""
+        self.assertFalse(os.path.exists(self.path + ".search"))
+        self.strg.save()
+        self.assertFalse(os.path.exists(self.path + ".search"))
+        self.strg.search(Place, "loft")
+        self.strg.save()
+        self.assertTrue(os.path.exists(self.path + ".search"))
+        self.review.text = "Noisy"
+        self.strg.save(self.review)
+        FileStorage._FileStorage__text = None
+        objs = self.reloaded()
+        text = FileStorage._FileStorage__text
+        self.assertIsNotNone(text)
+        self.assertEqual(FileStorage().search(Review, "noisy"),
+                         [objs["Review." + self.review.id]])
+        self.assertEqual(text.unsaved, {})  # nothing tokenized again
+
+
+class TestFileStorageShards(TmpStorageTestCase):
+    """test for FileStorage kept in a file per class or hash bucket"""
+
+    def files(self):
+        """the names of the files in the temporary directory"""
+        return sorted(os.listdir(self.tmp.name))
+
+    def load(self, shards):
+        """returns the objects a fresh storage in shards reads back"""
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(shards=shards)
+        strg.reload()
+        return strg
+
+    def users(self, count):
+        """stores count users of ids 0 to count - 1 and returns them"""
+        users = [User(id=str(i), created_at="2017-09-28T21:05:54",
+                      updated_at="2017-09-28T21:05:54")
+                 for i in range(count)]
+        for user in users:
+            FileStorage().new(user)
+        return users
+
+    def written(self, strg, obj=None):
+        """saves and returns the names of the files written"""
+        with patch("models.engine.file_storage.atomic_open",
+                   wraps=atomic_open) as opened:
+            strg.save(obj)
+        return sorted(os.path.basename(call.args[0])
+                      for call in opened.call_args_list)
+
+    def test_class_shards(self):
+        """test that only the shards of changed objects are written"""
+        strg = FileStorage(shards=1)
+        users = [User() for i in range(3)]
+        place = Place()
+        strg.save()
+        self.assertEqual(self.files(), ["file.Place.json", "file.User.json"])
+        users[1].first_name = "Betty"
+        self.assertEqual(self.written(strg), ["file.User.json"])
+        self.assertEqual(self.written(strg), [])
+        strg.delete(place)
+        self.assertEqual(self.written(strg), [])  # removed
+        self.assertEqual(self.files(), ["file.User.json"])
+        objs = self.load(1).all()
+        self.assertEqual(sorted(objs), sorted("User." + user.id
+                                              for user in users))
+        self.assertEqual(objs["User." + users[1].id].first_name, "Betty")
+
+    def test_buckets(self):
+        """test that the objects are spread over buckets of their class"""
+        strg = FileStorage(shards=4)
+        users = self.users(20)
+        strg.save()
+        self.assertEqual(self.files(), ["file.User.{}.json".format(i)
+                                        for i in range(4)])
+        users[0].first_name = "Betty"
+        self.assertEqual(len(self.written(strg)), 1)
+        strg = self.load(4)
+        self.assertEqual(strg.count(User), 20)
+        self.assertEqual(strg.all()["User." + users[0].id].first_name,
+                         "Betty")
+
+    def test_layout_change(self):
+        """test that a store written in another layout is read and
+        rewritten in shards"""
+        users = self.users(6)
+        FileStorage().save()
+        strg = self.load(1)
+        self.assertEqual(strg.count(), 6)
+        strg.save(users[0])
+        self.assertEqual(self.files(), ["file.User.json"])
+        strg = self.load(2)
+        self.assertEqual(strg.count(), 6)
+        self.assertEqual(self.written(strg, users[0]),
+                         ["file.User.0.json", "file.User.1.json"])
+        self.assertEqual(self.files(), ["file.User.0.json",
+                                        "file.User.1.json"])
+        self.assertEqual(self.load(2).count(), 6)
+
+    def test_all_deleted(self):
+        """test that objects deleted from every shard stay deleted once
+        the single file they were read from is resharded"""
+        users = self.users(2)
+        FileStorage().save()
+        strg = self.load(1)
+        strg.save()
+        for user in users:
+            strg.delete(user)
+        strg.save()
+        self.assertEqual(self.files(), [])
+        self.assertEqual(self.load(1).count(), 0)
+
+    def test_bad_shards(self):
+        """test that an invalid number of shards is refused"""
+        with self.assertRaises(ValueError):
+            FileStorage(shards=-1)
+
+
+class TestFileStorageSnapshot(TmpStorageTestCase):
+    """test for FileStorage in the snapshot format"""
+
+    def setUp(self):
+        """saves a few objects to file.snap"""
+        super().setUp()
+        self.snap = os.path.join(self.tmp.name, "file.snap")
+        strg = FileStorage(file_format="snapshot")
+        self.users = [User() for i in range(3)]
+        self.place = Place()
+        strg.save()
+        self.users[0].first_name = "Betty"
+        FileStorage(journal=True, file_format="snapshot").save()
+
+    def tearDown(self):
+        """closes the mapped snapshot"""
+        FileStorage()._FileStorage__materialize()
+        super().tearDown()
+
+    def load(self):
+        """returns a fresh storage reloaded from file.snap"""
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(file_format="snapshot")
+        strg.reload()
+        return strg
+
+    def test_get(self):
+        """test that get() only reads the objects looked up"""
+        strg = self.load()
+        self.assertEqual(dict.__len__(strg._FileStorage__objects), 0)
+        user = strg.get(User, self.users[0].id)
+        self.assertEqual(user.first_name, "Betty")
+        self.assertIs(strg.get("User", self.users[0].id), user)
+        self.assertIsNone(strg.get(User, "nope"))
+        strg.save()  # nothing changed: the snapshot stays mapped
+        self.assertEqual(dict.__len__(strg._FileStorage__objects), 1)
+        self.assertEqual(strg.count(), 4)
+        self.assertIs(strg.all()["User." + user.id], user)
+
+    def test_save(self):
+        """test that the objects changed after get() are saved"""
+        strg = self.load()
+        user = strg.get(User, self.users[1].id)
+        user.first_name = "Holberton"
+        strg.delete(strg.get(Place, self.place.id))
+        strg.save()
+        self.assertFalse(os.path.exists(self.path))
+        strg = self.load()
+        self.assertEqual(strg.get(User, user.id).first_name, "Holberton")
+        self.assertIsNone(strg.get(Place, self.place.id))
+        self.assertEqual(sorted(strg.all()), sorted("User." + user.id
+                                                    for user in self.users))
+
+
+class TestFileStorageShared(TmpStorageTestCase):
+    """test for FileStorage shared by several processes"""
+
+    def setUp(self):
+        """saves two users"""
+        super().setUp()
+        self.strg = FileStorage(shared=True)
+        self.users = [User() for i in range(2)]
+        self.strg.save()
+
+    def other(self, code):
+        """runs code in another process sharing the store as strg, the
+        users being in users"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        script = "\n".join((
+            "from models.engine.file_storage import FileStorage",
+            "from models.place import Place",
+            "FileStorage._FileStorage__file_path = {!r}".format(self.path),
+            "FileStorage._FileStorage__objects = {}",
+            "strg = FileStorage(shared=True)",
+            "strg.reload()",
+            "users = [strg.all()['User.' + id] for id in {!r}]".format(
+                [user.id for user in self.users]),
+            code))
+        subprocess.run([sys.executable, "-c", script], cwd=self.tmp.name,
+                       env=dict(os.environ, PYTHONPATH=root), check=True)
+
+    def test_merge(self):
+        """test that a save keeps the objects other processes saved"""
+        self.other("users[1].first_name = 'Other'\n"
+                   "Place()\n"
+                   "strg.save()")
+        self.users[0].first_name = "Mine"
+        self.strg.save()
+        self.assertEqual(self.users[1].first_name, "Other")
+        self.assertIs(self.strg.all()["User." + self.users[1].id],
+                      self.users[1])
+        self.assertEqual(self.strg.count(Place), 1)
+        objs = self.reloaded()
+        self.assertEqual(objs["User." + self.users[0].id].first_name,
+                         "Mine")
+        self.assertEqual(objs["User." + self.users[1].id].first_name,
+                         "Other")
+
+    def test_sync(self):
+        """test that only the changes of other processes are read"""
+        self.assertEqual(self.strg.sync(), 0)
+        self.other("users[0].first_name = 'Other'\n"
+                   "strg.delete(users[1])\n"
+                   "strg.save()")
+        self.assertEqual(self.strg.sync(), 2)
+        self.assertEqual(self.users[0].first_name, "Other")
+        self.assertEqual(list(self.strg.all()), ["User." + self.users[0].id])
+        self.assertEqual(self.strg.sync(), 0)
+
+    def test_conflict(self):
+        """test that an object changed by both processes is theirs"""
+        self.users[0].first_name = "Mine"
+        self.users[1].first_name = "Mine too"
+        self.other("users[0].first_name = 'Other'\n"
+                   "strg.save()")
+        with self.assertRaises(ConflictError) as raised:
+            self.strg.save()
+        self.assertEqual(raised.exception.keys, ["User." + self.users[0].id])
+        self.assertEqual(self.users[0].first_name, "Other")
+        objs = self.reloaded()
+        self.assertEqual(objs["User." + self.users[0].id].first_name,
+                         "Other")
+        self.assertEqual(objs["User." + self.users[1].id].first_name,
+                         "Mine too")
+
+
+class TestFileStorageThreads(TmpStorageTestCase):
+    """test for FileStorage used by several threads"""
+
+    def setUp(self):
+        """creates a threadsafe storage"""
+        super().setUp()
+        self.strg = FileStorage(threadsafe=True)
+
+    def test_view(self):
+        """test that all() is a read-only copy, made again on changes"""
+        user = User()
+        objs = self.strg.all()
+        self.assertIs(self.strg.all(), objs)
+        with self.assertRaises(TypeError):
+            objs["User.x"] = user
+        place = Place()
+        self.assertNotIn("Place." + place.id, objs)
+        self.assertIn("Place." + place.id, self.strg.all())
+        self.strg.delete(user)
+        self.assertNotIn("User." + user.id, self.strg.all())
+
+    def test_concurrent(self):
+        """test threads adding objects while others iterate and save"""
+        errors = []
+
+        def run(work):
+            """runs work, keeping its error"""
+            try:
+                work()
+            except Exception as error:
+                errors.append(error)
+
+        def add():
+            """adds and changes users"""
+            for i in range(300):
+                User().first_name = str(i)
+
+        def read():
+            """iterates the objects and the users"""
+            for i in range(50):
+                list(self.strg.all().values())
+                list(self.strg.stream(User))
+                self.strg.find(User, first_name="1")
+
+        def save():
+            """saves the store"""
+            for i in range(20):
+                self.strg.save()
+
+        threads = [threading.Thread(target=run, args=(work,))
+                   for work in (add, add, read, save)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.strg.save()
+        self.assertEqual(self.strg.count(User), 600)
+        self.assertEqual(self.reloaded(), dict(self.strg.all()))
+
+    def test_readers_during_save(self):
+        """test that the objects are read, queried and searched while a
+        save is encoding"""
+        users = [User() for i in range(3)]
+        place = Place()
+        place.name = "Quiet loft"
+        place.city_id = "c1"
+        codec = self.strg._FileStorage__codec
+        encode, started, release = codec.encode, threading.Event(), \
+            threading.Event()
+
+        def slow(obj):
+            """encodes obj once released"""
+            started.set()
+            release.wait(5)
+            return encode(obj)
+
+        with patch.object(codec, "encode", slow):
+            saver = threading.Thread(target=self.strg.save)
+            saver.start()
+            self.assertTrue(started.wait(5))
+            self.assertEqual(self.strg.count(User), 3)
+            self.assertEqual(self.strg.find(User, id=users[0].id),
+                             [users[0]])
+            self.assertEqual(self.strg.search(Place, "loft"), [place])
+            self.assertEqual(self.strg.query(Place, [("city_id", "eq",
+                                                      "c1")]), [place])
+            users[1].first_name = "Changed"
+            self.assertTrue(saver.is_alive())
+            release.set()
+            saver.join()
+        self.assertIn("User." + users[1].id,
+                      FileStorage._FileStorage__dirty)
+        self.strg.save()
+        self.assertEqual(self.reloaded()["User." + users[1].id].first_name,
+                         "Changed")
+        FileStorage._FileStorage__text = None
+
+
+class TestFileStorageAsync(TmpStorageTestCase):
+    """test for the asyncio methods of FileStorage"""
+
+    def test_asave(self):
+        """test that saves asked for at once are written together, by
+        another thread"""
+        strg = FileStorage()
+        users = [User() for i in range(3)]
+        saver = strg._FileStorage__saver
+        threads = []
+
+        def write():
+            """writes, noting the thread"""
+            threads.append(threading.get_ident())
+            strg.flush()
+
+        async def main():
+            """saves every user at once"""
+            await asyncio.gather(*(strg.asave(user) for user in users))
+
+        with patch.object(saver, "write", side_effect=write):
+            asyncio.run(main())
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+        self.assertEqual(set(self.reloaded()),
+                         {"User." + user.id for user in users})
+
+    def test_asave_batch(self):
+        """test that asave() in a batch leaves the write to the commit"""
+        strg = FileStorage()
+        with strg.batch():
+            user = User()
+            asyncio.run(strg.asave(user))
+            self.assertFalse(os.path.exists(self.path))
+        self.assertIn("User." + user.id, self.reloaded())
+
+    def test_aiter(self):
+        """test iterating the objects while others are added"""
+        strg = FileStorage()
+        users = [User() for i in range(5)]
+
+        async def main():
+            """adds a user at each object iterated"""
+            seen = []
+            async for obj in strg.aiter(User, after="User." + users[0].id,
+                                        chunk=2):
+                seen.append(obj)
+                User()
+            return seen
+
+        self.assertEqual(asyncio.run(main()), users[1:])
+        self.assertEqual(strg.count(User), 9)
+        with self.assertRaises(KeyError):
+            strg.aiter(User, after="User.nope")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""The models engine indexes test module"""
+from models.engine.indexes import HashIndex
+import unittest
+
+
+class TestHashIndex(unittest.TestCase):
+    """test for HashIndex class"""
+
+    def test_add_lookup(self):
+        """test that keys are found by their value"""
+        index = HashIndex("place_id")
+        index.add("Review.1", "p1")
+        index.add("Review.2", "p1")
+        index.add("Review.3", "p2")
+        self.assertEqual(index.lookup("p1"), {"Review.1", "Review.2"})
+        self.assertEqual(index.lookup("p2"), {"Review.3"})
+        self.assertEqual(index.lookup("p3"), set())
+
+    def test_moved_value(self):
+        """test that adding again refiles a key"""
+        index = HashIndex("place_id")
+        index.add("Review.1", "p1")
+        index.add("Review.1", "p2")
+        self.assertEqual(index.lookup("p1"), set())
+        self.assertEqual(index.lookup("p2"), {"Review.1"})
+        self.assertNotIn("p1", index.buckets)
+
+    def test_remove(self):
+        """test that a removed key is not found"""
+        index = HashIndex("place_id")
+        index.add("Review.1", "")
+        self.assertEqual(index.lookup(""), {"Review.1"})
+        index.remove("Review.1")
+        self.assertEqual(index.lookup(""), set())
+        self.assertEqual(index.buckets, {})
+
+    def test_unhashable(self):
+        """test that unhashable values are still found"""
+        index = HashIndex("amenity_ids")
+        index.add("Place.1", ["a1"])
+        index.add("Place.2", "a1")
+        self.assertEqual(index.lookup(["a1"]), {"Place.1"})
+        self.assertEqual(index.lookup("a1"), {"Place.2"})
+        index.add("Place.1", "a1")
+        self.assertEqual(index.lookup("a1"), {"Place.1", "Place.2"})
+        self.assertEqual(index.unhashable, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
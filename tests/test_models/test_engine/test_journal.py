@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""The models Journal test module"""
+from models.engine.journal import Journal
+import os
+import tempfile
+import unittest
+
+
+class TestJournal(unittest.TestCase):
+    """test for Journal class"""
+
+    def setUp(self):
+        """creates a journal in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json.journal")
+        self.journal = Journal(self.path)
+
+    def tearDown(self):
+        """removes the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_append_replay(self):
+        """test that appended records are replayed in order"""
+        self.journal.append([("User.1", {"id": "1"}), ("User.2", None)])
+        self.journal.append([("User.1", {"id": "1", "name": "Betty"})])
+        self.assertEqual(self.journal.records, 3)
+        replayed = list(Journal(self.path).replay())
+        self.assertEqual(replayed, [("User.1", {"id": "1"}),
+                                    ("User.2", None),
+                                    ("User.1", {"id": "1", "name": "Betty"})])
+
+    def test_batch_line(self):
+        """test that several changes are appended as one line"""
+        self.journal.append([("User.1", {"id": "1"}), ("User.2", None)])
+        with open(self.path) as fil:
+            self.assertEqual(len(fil.readlines()), 1)
+        with open(self.path, "a") as fil:
+            fil.write('{"op": "batch", "records": [{"op": "del", "key": "')
+        self.assertEqual(list(Journal(self.path).replay()),
+                         [("User.1", {"id": "1"}), ("User.2", None)])
+
+    def test_append_nothing(self):
+        """test that no file is created for an empty change list"""
+        self.journal.append([])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(list(self.journal.replay()), [])
+
+    def test_torn_record(self):
+        """test that a half written last record is ignored"""
+        self.journal.append([("User.1", {"id": "1"})])
+        with open(self.path, "a") as fil:
+            fil.write('{"op": "set", "key": "User.2", "ob')
+        journal = Journal(self.path)
+        self.assertEqual(list(journal.replay()), [("User.1", {"id": "1"})])
+        self.assertEqual(journal.records, 1)
+
+    def test_append_after_torn(self):
+        """test that records appended after a torn one are replayed"""
+        self.journal.append([("User.1", {"id": "1"})])
+        with open(self.path, "a") as fil:
+            fil.write('{"op": "set", "key": "User.2", "ob')
+        journal = Journal(self.path)
+        list(journal.replay())
+        journal.append([("User.3", {"id": "3"})])
+        self.assertEqual(list(Journal(self.path).replay()),
+                         [("User.1", {"id": "1"}), ("User.3", {"id": "3"})])
+
+    def test_truncate(self):
+        """test that truncate empties the journal"""
+        self.journal.append([("User.1", {"id": "1"})])
+        self.journal.truncate()
+        self.assertEqual(self.journal.records, 0)
+        self.assertEqual(list(self.journal.replay()), [])
+        self.journal.truncate()  # nothing to remove
+
+    def test_rewrite(self):
+        """test that rewrite replaces the records"""
+        self.journal.append([("User.1", {"id": "1"}), ("User.2", None)])
+        self.journal.rewrite([("User.3", {"id": "3"})])
+        self.assertEqual(self.journal.records, 1)
+        self.assertEqual(list(Journal(self.path).replay()),
+                         [("User.3", {"id": "3"})])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""The models engine lazy test module"""
+from models.engine.lazy import LazyObjects
+import unittest
+
+
+class TestLazyObjects(unittest.TestCase):
+    """test for LazyObjects class"""
+
+    def setUp(self):
+        """creates a lazy dict counting the objects built"""
+        self.built = []
+        self.objs = LazyObjects({"a": {"n": 1}, "b": {"n": 2}}, self.build)
+
+    def build(self, record):
+        """builds a tuple out of record"""
+        self.built.append(record["n"])
+        return ("obj", record["n"])
+
+    def test_getitem(self):
+        """test that an object is built once on first lookup"""
+        self.assertFalse(self.objs.is_built("a"))
+        self.assertEqual(self.objs["a"], ("obj", 1))
+        self.assertEqual(self.objs["a"], ("obj", 1))
+        self.assertTrue(self.objs.is_built("a"))
+        self.assertFalse(self.objs.is_built("b"))
+        self.assertEqual(self.built, [1])
+
+    def test_keys_len(self):
+        """test that keys and len do not build anything"""
+        self.assertEqual(list(self.objs), ["a", "b"])
+        self.assertEqual(len(self.objs), 2)
+        self.assertIn("b", self.objs)
+        self.assertEqual(self.built, [])
+
+    def test_get_pop(self):
+        """test get, pop and setdefault"""
+        self.assertEqual(self.objs.get("b"), ("obj", 2))
+        self.assertIsNone(self.objs.get("c"))
+        self.assertEqual(self.objs.pop("a"), ("obj", 1))
+        self.assertEqual(self.objs.pop("a", None), None)
+        self.assertEqual(self.objs.setdefault("c", ("obj", 3)), ("obj", 3))
+        self.assertEqual(self.objs.setdefault("b"), ("obj", 2))
+
+    def test_values_items(self):
+        """test that values, items, copy and == give built objects"""
+        expected = {"a": ("obj", 1), "b": ("obj", 2)}
+        self.assertEqual(self.objs.values(), list(expected.values()))
+        self.assertEqual(self.objs.items(), list(expected.items()))
+        self.assertEqual(self.objs.copy(), expected)
+        self.assertEqual(self.objs, expected)
+        self.assertEqual(self.built, [1, 2])
+
+    def test_raw_access(self):
+        """test that dict methods give the raw values"""
+        self.assertEqual(dict.items(self.objs),
+                         {"a": {"n": 1}, "b": {"n": 2}}.items())
+        self.assertEqual(self.built, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""The models locking test module"""
+from models.engine.locking import ConflictError, StoreLock
+import os
+import tempfile
+import unittest
+
+
+class TestStoreLock(unittest.TestCase):
+    """test for StoreLock class"""
+
+    def setUp(self):
+        """creates a lock in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lock = StoreLock(os.path.join(self.tmp.name, "file.json"),
+                              keep=3)
+
+    def tearDown(self):
+        """removes the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_generation(self):
+        """test that each write bumps the generation"""
+        self.assertEqual(self.lock.generation(), 0)
+        with self.lock.hold() as generation:
+            self.assertEqual(generation, 0)
+            self.assertTrue(self.lock.held)
+            with self.lock.hold(exclusive=False) as nested:
+                self.assertEqual(nested, 0)
+            self.assertEqual(self.lock.bump(["User.1"]), 1)
+        self.assertFalse(self.lock.held)
+        with self.lock.hold(exclusive=False) as generation:
+            self.assertEqual(generation, 1)
+        self.assertEqual(self.lock.generation(), 1)
+
+    def test_changed_since(self):
+        """test the keys written after a generation, while logged"""
+        for keys in (["User.1"], ["User.2"], ["User.3", "User.1"],
+                     ["Place.1"]):
+            with self.lock.hold():
+                self.lock.bump(keys)
+        self.assertEqual(self.lock.changed_since(4), set())
+        self.assertEqual(self.lock.changed_since(2),
+                         {"User.1", "User.3", "Place.1"})
+        self.assertEqual(self.lock.changed_since(1),
+                         {"User.1", "User.2", "User.3", "Place.1"})
+        self.assertIsNone(self.lock.changed_since(0))  # no longer logged
+
+    def test_conflict_error(self):
+        """test that the conflicting keys are named"""
+        error = ConflictError({"User.2", "User.1"})
+        self.assertEqual(error.keys, ["User.1", "User.2"])
+        self.assertIn("User.1, User.2", str(error))
+
+
+if __name__ == "__main__":
+    unittest.main()
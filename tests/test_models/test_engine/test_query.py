@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""The models engine query test module"""
+from datetime import datetime
+from models.engine.query import Plan, order, parse_query, sort_key
+from types import SimpleNamespace
+import unittest
+
+
+class TestParseQuery(unittest.TestCase):
+    """test for parse_query function"""
+
+    def test_parse(self):
+        """test every part of a query"""
+        self.assertEqual(
+            parse_query('Place.where(city_id == "a-1", max_guest>=4,'
+                        " price_by_night < -2.5, name != 'x', ok = true)"
+                        ".order_by(-price_by_night, name).limit(5)"),
+            ("Place", [("city_id", "eq", "a-1"), ("max_guest", "ge", 4),
+                       ("price_by_night", "lt", -2.5), ("name", "ne", "x"),
+                       ("ok", "eq", True)],
+             [("price_by_night", True), ("name", False)], 5))
+        self.assertEqual(parse_query("User.where(first_name == Betty)"),
+                         ("User", [("first_name", "eq", "Betty")], [], None))
+        self.assertEqual(parse_query("User.limit(1)"),
+                         ("User", [], [], 1))
+        self.assertEqual(parse_query("User"), ("User", [], [], None))
+
+    def test_errors(self):
+        """test that invalid queries raise ValueError"""
+        for text in ("", "User.", "User.all()", "User.where(a)",
+                     "User.where(a <)", "User.where(a < 1", "User.limit()",
+                     "User.limit(1, 2)", "User.limit(-1)", "User.limit(a)",
+                     "User.where(a < 1 b < 2)", "User.where(a ~ 1)"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_query(text)
+
+
+class TestOrder(unittest.TestCase):
+    """test for order and sort_key functions"""
+
+    def test_sort_key(self):
+        """test that values of any types sort together"""
+        values = [None, "b", 2, datetime(2017, 1, 1), ["x"], 1.5, "a"]
+        self.assertEqual(sorted(values, key=sort_key),
+                         [1.5, 2, "a", "b", datetime(2017, 1, 1), ["x"],
+                          None])
+
+    def test_order(self):
+        """test sorting by several keys with a limit"""
+        objs = [SimpleNamespace(name=name, rank=rank)
+                for name, rank in (("a", 2), ("b", 1), ("c", 2))]
+        self.assertEqual(order(objs, [("rank", True), ("name", False)]),
+                         [objs[0], objs[2], objs[1]])
+        self.assertEqual(order(objs, [("rank", False)], 2),
+                         [objs[1], objs[0]])
+        self.assertEqual(order(objs, [("name", True)], 1), [objs[2]])
+        self.assertEqual(order(objs, limit=1), objs[:1])
+
+
+class TestPlan(unittest.TestCase):
+    """test for Plan class"""
+
+    def test_plan(self):
+        """test that the cheapest path runs and is explained"""
+        objs = [SimpleNamespace(rank=rank) for rank in range(4)]
+        plan = Plan("Thing", [
+            (4, "scan", lambda: objs, [("rank", "ge", 1)]),
+            (2, "lookup", lambda: objs[1:3], []),
+        ], [("rank", True)], 1)
+        self.assertEqual(plan.run(), [objs[2]])
+        self.assertEqual(plan.explain(), [
+            "Thing: lookup (cost 2)", "  sort: rank desc (top 1)",
+            "  limit: 1", "  rejected: scan (cost 4)"])
+        plan = Plan("Thing", [(4, "scan", lambda: objs, [("rank", "ge", 1)])])
+        self.assertEqual(plan.run(), objs[1:])
+        self.assertEqual(plan.explain(), ["Thing: scan (cost 4)",
+                                          "  check: rank >= 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
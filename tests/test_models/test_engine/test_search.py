@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""The models engine search test module"""
+from models.engine.search import TextIndex, tokenize
+from models.place import Place
+from models.review import Review
+from models.user import User
+import os
+import tempfile
+import unittest
+
+classes = {"Place": Place, "Review": Review, "User": User}
+
+
+class TestTextIndex(unittest.TestCase):
+    """test for TextIndex class"""
+
+    def setUp(self):
+        """creates an index saved in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json.search")
+        self.index = TextIndex(self.path, classes)
+        self.index.changed("Place.1", {"name": "Cozy loft",
+                                       "description": "Quiet, near the park"})
+        self.index.changed("Place.2", {"name": "Beach house",
+                                       "description": "Loud; a loft bed"})
+        self.index.changed("Review.1", {"text": "Quiet quiet quiet"})
+
+    def tearDown(self):
+        """removes the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_tokenize(self):
+        """test that words are lower cased without punctuation"""
+        self.assertEqual(tokenize("Quiet, near the PARK!"),
+                         ["quiet", "near", "the", "park"])
+
+    def test_search(self):
+        """test ranked results by class"""
+        self.assertEqual(self.index.search("Place", "quiet loft"),
+                         ["Place.1", "Place.2"])
+        self.assertEqual(self.index.search("Place", "loft", limit=1),
+                         ["Place.1"])
+        self.assertEqual(self.index.search(None, "quiet"),
+                         ["Review.1", "Place.1"])
+        self.assertEqual(self.index.search("Place", "castle"), [])
+        self.assertEqual(self.index.search("City", "quiet"), [])
+
+    def test_ignored(self):
+        """test that classes without __search__ are not indexed"""
+        self.index.changed("User.1", {"first_name": "quiet"})
+        self.index.refresh()
+        self.assertNotIn("User.1", self.index.docs)
+
+    def test_changes(self):
+        """test that updates and deletions are applied"""
+        self.index.search(None, "")
+        self.index.changed("Place.2", {"name": "Quiet house"})
+        self.index.changed("Review.1", None)
+        self.assertEqual(self.index.search(None, "quiet"),
+                         ["Place.2", "Place.1"])
+        self.assertNotIn("loud", self.index.postings["Place"])
+        self.assertEqual(self.index.sizes["Review"], [0, 0])
+
+    def test_save_load(self):
+        """test that saves append the changes only"""
+        self.index.save()
+        self.assertEqual(self.index.journal.records, 3)
+        self.index.changed("Place.1", {"name": "Cozy loft",
+                                       "description": "Quiet, near the park"})
+        self.index.save()
+        self.assertEqual(self.index.journal.records, 3)
+        self.index.changed("Place.1", {"name": "Castle"})
+        self.index.save()
+        self.assertEqual(self.index.journal.records, 4)
+        index = TextIndex(self.path, classes)
+        index.load()
+        self.assertEqual(index.docs, self.index.docs)
+        self.assertEqual(index.search("Place", "castle"), ["Place.1"])
+
+    def test_unchanged_not_tokenized(self):
+        """test that a reloaded text with the same checksum is kept"""
+        self.index.save()
+        index = TextIndex(self.path, classes)
+        index.load()
+        index.changed("Review.1", {"text": "Quiet quiet quiet"})
+        index.refresh()
+        self.assertEqual(index.unsaved, {})
+        index.retain({"Review.1"})
+        index.refresh()
+        self.assertEqual(list(index.docs), ["Review.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
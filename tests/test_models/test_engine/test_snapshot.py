@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""The models snapshot test module"""
+from models.engine.codec import JSONCodec, get_codec
+from models.engine.snapshot import Snapshot, write_snapshot
+import os
+import tempfile
+import unittest
+
+
+class TestSnapshot(unittest.TestCase):
+    """test for the snapshot format"""
+
+    def setUp(self):
+        """writes a snapshot in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.snap")
+        self.entries = [("User.{}".format(i), '{{"id": "{}"}}'.format(i))
+                        for i in (3, 1, 20, 2, "é")]
+        with open(self.path, "wb") as fil:
+            self.assertEqual(write_snapshot(fil, self.entries), 5)
+
+    def tearDown(self):
+        """removes the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        """test that records are found by key, with any codec"""
+        for codec in (JSONCodec(), get_codec()):
+            with self.subTest(codec=codec.name):
+                snapshot = Snapshot(self.path, codec)
+                self.assertEqual(len(snapshot), 5)
+                for key, data in self.entries:
+                    self.assertIn(key, snapshot)
+                    self.assertEqual(snapshot.get(key),
+                                     {"id": key.split(".")[1]})
+                self.assertNotIn("User.4", snapshot)
+                self.assertIsNone(snapshot.get("User.0"))
+                self.assertEqual(snapshot.get("A", 1), 1)
+                snapshot.close()
+
+    def test_keys_items(self):
+        """test that the keys and records are read in key order"""
+        snapshot = Snapshot(self.path, JSONCodec())
+        keys = sorted(key for key, data in self.entries)
+        self.assertEqual(list(snapshot.keys()), keys)
+        self.assertEqual([key for key, record in snapshot.items()], keys)
+        snapshot.close()
+
+    def test_empty(self):
+        """test a snapshot without records"""
+        with open(self.path, "wb") as fil:
+            write_snapshot(fil, [])
+        snapshot = Snapshot(self.path, JSONCodec())
+        self.assertEqual(list(snapshot.items()), [])
+        self.assertIsNone(snapshot.get("User.1"))
+        snapshot.close()
+
+    def test_not_snapshot(self):
+        """test that other files are refused"""
+        with open(self.path, "w") as fil:
+            fil.write('{"User.1": {}}')
+        with self.assertRaises(ValueError):
+            Snapshot(self.path, JSONCodec())
+
+
+if __name__ == "__main__":
+    unittest.main()
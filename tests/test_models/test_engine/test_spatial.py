@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""The models engine spatial test module"""
+from models.engine.spatial import GridIndex, distance
+from models.place import Place
+import random
+import unittest
+
+
+class TestDistance(unittest.TestCase):
+    """test for the distance function"""
+
+    def test_distance(self):
+        """test some known distances"""
+        self.assertEqual(distance(10, 20, 10, 20), 0)
+        self.assertAlmostEqual(distance(0, 0, 1, 0), 111.195, places=3)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5), 111.195,
+                               places=3)
+        self.assertAlmostEqual(distance(90, 0, -90, 0), 20015.1, places=1)
+
+
+class TestGridIndex(unittest.TestCase):
+    """test for GridIndex class"""
+
+    def setUp(self):
+        """creates an empty grid of Places"""
+        self.grid = GridIndex(Place)
+
+    def add(self, key, lat, lon):
+        """queues a place at lat, lon"""
+        self.grid.changed(key, {"latitude": lat, "longitude": lon})
+
+    def test_near(self):
+        """test radius queries, closest first"""
+        self.add("Place.1", 40.7128, -74.0060)  # New York
+        self.add("Place.2", 40.7306, -73.9352)  # Brooklyn
+        self.add("Place.3", 51.5074, -0.1278)  # London
+        found = self.grid.near(40.72, -74.0, 10)
+        self.assertEqual([key for dist, key in found], ["Place.1", "Place.2"])
+        self.assertLess(found[0][0], found[1][0])
+        self.assertEqual(self.grid.near(40.72, -74.0, 0.5), [])
+        self.assertEqual(len(self.grid.near(0, 0, 20100)), 3)
+
+    def test_edges(self):
+        """test queries across the antimeridian and the poles"""
+        self.add("Place.1", 0, 179.99)
+        self.add("Place.2", 0, -180)
+        self.add("Place.3", 89.99, 45)
+        self.add("Place.4", 89.99, -135)
+        self.assertEqual(len(self.grid.near(0, -179.99, 5)), 2)
+        self.assertEqual(len(self.grid.near(89.99, 0, 5)), 2)
+
+    def test_changes(self):
+        """test that moved, deleted and invalid points are applied"""
+        self.add("Place.1", 10, 10)
+        self.add("Place.2", 10, 10.01)
+        self.assertEqual(len(self.grid.near(10, 10, 5)), 2)
+        self.add("Place.1", 20, 20)
+        self.grid.changed("Place.2", None)
+        self.add("Place.3", "10", 10)
+        self.assertEqual(self.grid.near(10, 10, 5), [])
+        self.assertEqual(len(self.grid), 1)
+        self.assertEqual(len(self.grid.cells), 1)
+
+    def test_nearest(self):
+        """test the nearest neighbours"""
+        self.add("Place.1", 0, 0)
+        self.add("Place.2", 0, 1)
+        self.add("Place.3", 0, 30)
+        self.assertEqual([key for dist, key in self.grid.nearest(0, 29)],
+                         ["Place.3"])
+        self.assertEqual([key for dist, key in self.grid.nearest(0, 0.6, 2)],
+                         ["Place.2", "Place.1"])
+        self.assertEqual(len(self.grid.nearest(0, 0, 5)), 3)
+
+    def test_against_scan(self):
+        """test random queries against a scan of all the points"""
+        rand = random.Random(0)
+        points = {}
+        for i in range(2000):
+            points[i] = (rand.uniform(-90, 90), rand.uniform(-180, 180))
+            self.add(i, *points[i])
+        for i in range(50):
+            lat, lon = rand.uniform(-90, 90), rand.uniform(-180, 180)
+            km = rand.choice((10, 500, 3000))
+            expected = sorted((distance(lat, lon, *point), key)
+                              for key, point in points.items()
+                              if distance(lat, lon, *point) <= km)
+            self.assertEqual(self.grid.near(lat, lon, km), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
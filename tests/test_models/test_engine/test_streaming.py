@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""The models engine streaming test module"""
+from io import StringIO
+from models.engine.streaming import (file_format, iter_json_lines,
+                                     iter_json_object, migrate)
+import json
+import os
+import tempfile
+import unittest
+
+
+class TestIterJsonObject(unittest.TestCase):
+    """test for iter_json_object"""
+
+    def items(self, text, size=3):
+        """the pairs of text read size characters at a time"""
+        return list(iter_json_object(StringIO(text), size))
+
+    def test_pairs(self):
+        """test that the pairs come out in order, whatever the read size"""
+        data = {"User.1": {"id": "1", "name": 'a, "b" {c}: d'},
+                "Place.2": {"ids": [1, 2.5, None, True], "x": {"y": {}}},
+                "n": 12345, "s": "}", "e": []}
+        for text in (json.dumps(data), json.dumps(data, indent=4)):
+            for size in (1, 2, 7, 1 << 16):
+                with self.subTest(size=size):
+                    self.assertEqual(self.items(text, size),
+                                     list(data.items()))
+
+    def test_empty(self):
+        """test empty objects"""
+        self.assertEqual(self.items("{}"), [])
+        self.assertEqual(self.items("  {\n }  "), [])
+
+    def test_malformed(self):
+        """test that malformed text raises ValueError"""
+        for text in ("", "[]", '{"a" 1}', '{1: 2}', '{"a": 1 "b": 2}',
+                     '{"a": {', '{"a": 1'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    self.items(text)
+
+
+class TestStreaming(unittest.TestCase):
+    """test for iter_json_lines and migrate"""
+
+    def setUp(self):
+        """creates a file.json in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data = {"User.{}".format(i): {"id": str(i), "__class__": "User",
+                                           "n": i} for i in range(50)}
+        self.json = self.path("file.json")
+        with open(self.json, "w") as fil:
+            json.dump(self.data, fil)
+
+    def tearDown(self):
+        """removes the temporary directory"""
+        self.tmp.cleanup()
+
+    def path(self, name):
+        """path of name in the temporary directory"""
+        return os.path.join(self.tmp.name, name)
+
+    def test_file_format(self):
+        """test the format given by the extension"""
+        self.assertEqual(file_format("file.jsonl"), "jsonl")
+        self.assertEqual(file_format("a/file.json"), "json")
+        self.assertEqual(file_format("file"), "json")
+
+    def test_iter_json_lines(self):
+        """test that lines are read with their keys"""
+        lines = StringIO('{"__class__": "User", "id": "1"}\n\n'
+                         '{"__class__": "City", "id": "2"}\n')
+        self.assertEqual(list(iter_json_lines(lines)), [
+            ("User.1", {"__class__": "User", "id": "1"}),
+            ("City.2", {"__class__": "City", "id": "2"})])
+
+    def test_migrate(self):
+        """test converting json to jsonl and back"""
+        jsonl = self.path("file.jsonl")
+        self.assertEqual(migrate(self.json, jsonl), 50)
+        with open(jsonl) as fil:
+            lines = fil.readlines()
+        self.assertEqual(len(lines), 50)
+        self.assertEqual(json.loads(lines[3]), self.data["User.3"])
+        back = self.path("back.json")
+        self.assertEqual(migrate(jsonl, back), 50)
+        with open(back) as fil:
+            self.assertEqual(json.load(fil), self.data)
+
+
+if __name__ == "__main__":
+    unittest.main()